@@ -0,0 +1,80 @@
+"""
+Compare the throughput of the fine-tuned detection with the remote Roboflow backend and with a local CPU backend.
+
+The Roboflow backend is replaced by a local stub that waits for a simulated round trip, so the benchmark runs
+without network access nor API key. The local backend runs exported YOLO weights with ONNX Runtime (or
+OpenVINO); without --weights, the stock yolo11n.pt is exported to ONNX with ultralytics.
+
+Usage:
+    python benchmarks/bench_backends.py [--weights model.onnx] [--runtime onnx] [--latency 0.15] [--image frame.jpg]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from benchmarks.bench_utils import print_table, summarize_latencies, time_call
+from src.detection.ai.backends import InferenceResult, LocalYoloBackend, Prediction
+from src.detection.ai.detection_finetuning import detection_yolov11_fine_tuning
+from src.detection.utils.registry import registry
+
+
+class RemoteBackendStub:
+    """
+    Stand-in for the Roboflow backend: waits for the round trip and returns one prediction.
+    """
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def infer(self, image: np.ndarray) -> list:
+        time.sleep(self.latency)
+        return [InferenceResult([Prediction('person', 0, 0.9, 640, 360, 200, 100)])]
+
+
+def export_onnx(directory: str) -> str:
+    """
+    Export the stock YOLO weights to ONNX with ultralytics.
+    """
+    from ultralytics import YOLO
+
+    return YOLO("yolo11n.pt").export(format='onnx', imgsz=640, project=directory)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--weights', help="Exported weights (.onnx, or .xml for OpenVINO).")
+    parser.add_argument('--runtime', default='onnx', choices=['onnx', 'openvino'], help="Local runtime.")
+    parser.add_argument('--latency', type=float, default=0.15, help="Simulated Roboflow round trip (s).")
+    parser.add_argument('--image', help="Image used as frame. Defaults to the reference image of camera 4.",
+                        default=os.path.join(os.path.dirname(__file__), "../images/frame_ref_cam4_lightV2.jpg"))
+    parser.add_argument('--repeat', type=int, default=20, help="Number of measured calls.")
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+
+    with tempfile.TemporaryDirectory() as directory:
+        weights = args.weights or export_onnx(directory)
+        backends = {
+            f'roboflow (stub, {args.latency * 1000:.0f} ms round trip)': RemoteBackendStub(args.latency),
+            f'{args.runtime} ({os.path.basename(weights)})': LocalYoloBackend(weights, 'detect', runtime=args.runtime),
+        }
+
+        rows = {}
+        for name, backend in backends.items():
+            registry.set('detection_finetuning', backend)
+            rows[name] = summarize_latencies(time_call(detection_yolov11_fine_tuning, frame, repeat=args.repeat))
+        registry.unload('detection_finetuning')
+
+    print_table("Fine-tuned detection per backend", rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the frame skipping strategies of read_sampled_frames on a long MP4.
+
+Usage:
+    python benchmarks/bench_frame_skipping.py [VIDEO] [--skip 100] [--max-frames 0]
+
+Without VIDEO, a synthetic 1280x800 video of 5 minutes at 25 images/s is generated in a temporary folder.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from src.detection.utils.video_reader import SKIP_STRATEGIES, read_sampled_frames
+
+
+def generate_video(path: str, nb_frames: int, width: int = 1280, height: int = 800, fps: int = 25) -> None:
+    """
+    Write a synthetic video with a moving rectangle, so that the encoder produces real inter frames.
+
+    Args:
+        path (str): The path of the video to write.
+        nb_frames (int): Number of frames of the video.
+        width (int): Width of the frames. Defaults to 1280.
+        height (int): Height of the frames. Defaults to 800.
+        fps (int): Frame rate of the video. Defaults to 25.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(nb_frames):
+        frame = background.copy()
+        x = (i * 7) % (width - 100)
+        cv2.rectangle(frame, (x, 300), (x + 100, 400), (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def run_strategy(video_path: str, nb_of_img_skip_between_2: int, strategy: str, max_frames: int) -> dict:
+    """
+    Read a video with one strategy and measure the time spent.
+
+    Returns:
+        dict: Number of analysed frames, duration, analysed frames/sec and video frames/sec.
+    """
+    cap = cv2.VideoCapture(video_path)
+    analysed = 0
+    last_index = -1
+    start = time.perf_counter()
+    for frame_index, _ in read_sampled_frames(cap, nb_of_img_skip_between_2, strategy):
+        analysed += 1
+        last_index = frame_index
+        if max_frames and analysed >= max_frames:
+            break
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return {'analysed': analysed, 'last_index': last_index, 'elapsed': elapsed,
+            'analysed_per_sec': analysed / elapsed, 'video_frames_per_sec': (last_index + 1) / elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', nargs='?', help="Path to the MP4 file to read.")
+    parser.add_argument('--skip', type=int, default=100, help="Number of images skipped between 2 images.")
+    parser.add_argument('--max-frames', type=int, default=0, help="Stop after this number of analysed frames.")
+    parser.add_argument('--duration', type=int, default=300, help="Duration (s) of the synthetic video.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(tmp_dir, 'synthetic.mp4')
+            print(f"Génération d'une vidéo de {args.duration} s dans {video_path}")
+            generate_video(video_path, args.duration * 25)
+
+        print(f"\n{'strategy':<10}{'analysed':>10}{'last frame':>12}{'time s':>10}{'analysed/s':>12}{'video fps':>12}")
+        for strategy in SKIP_STRATEGIES:
+            result = run_strategy(video_path, args.skip, strategy, args.max_frames)
+            print(f"{strategy:<10}{result['analysed']:>10}{result['last_index']:>12}{result['elapsed']:>10.2f}"
+                  f"{result['analysed_per_sec']:>12.1f}{result['video_frames_per_sec']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare the occlusion filters on hundreds of boxes: the former row by row Shapely version (DataFrame.apply),
+the vectorized N x M ratio matrix (Shapely 2.0 + STRtree) and the pixel counting on the rasterized zones.
+
+Usage:
+    python benchmarks/bench_occlusion.py [--boxes 100 500 1000] [--camera 4]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Polygon, box
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from benchmarks.bench_utils import print_table, summarize_latencies, time_call
+from src.detection.windows.manual.windows import define_occlusion_parallelograms
+from src.detection.windows.manual.windows import filter_occluded_objects as filter_occluded_objects_manual
+from src.detection.windows.occlusion import is_occluded
+
+
+def filter_occluded_objects_apply(df: pd.DataFrame, occlusion_polygons: list[Polygon],
+                                  threshold: float) -> pd.DataFrame:
+    """
+    Former implementation of the occlusion filters, kept as the reference of the benchmark.
+    """
+    def is_row_occluded(row):
+        obj_polygon = box(row['xmin'], row['ymin'], row['xmax'], row['ymax'])
+        obj_area = obj_polygon.area
+
+        for occ_poly in occlusion_polygons:
+            intersection = obj_polygon.intersection(occ_poly)
+            if intersection.area / obj_area >= threshold:
+                return True
+        return False
+
+    return df[~df.apply(is_row_occluded, axis=1)].reset_index(drop=True)
+
+
+def filter_occluded_objects_vectorized(df: pd.DataFrame, occlusion_polygons: list[Polygon],
+                                       threshold: float) -> pd.DataFrame:
+    occluded = is_occluded(df[['xmin', 'ymin', 'xmax', 'ymax']].to_numpy(), occlusion_polygons, threshold)
+    return df[~occluded].reset_index(drop=True)
+
+
+def random_boxes(nb_boxes: int, rng: np.random.Generator) -> pd.DataFrame:
+    x1 = rng.uniform(0, 1200, nb_boxes)
+    y1 = rng.uniform(0, 700, nb_boxes)
+    return pd.DataFrame({'xmin': x1, 'ymin': y1,
+                         'xmax': x1 + rng.uniform(10, 300, nb_boxes), 'ymax': y1 + rng.uniform(10, 300, nb_boxes)})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boxes', type=int, nargs='+', default=[100, 500, 1000], help="Numbers of boxes.")
+    parser.add_argument('--camera', type=int, default=4, help="Camera whose parallelograms are used.")
+    parser.add_argument('--repeat', type=int, default=10, help="Number of measured calls.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    polygons = [Polygon(zone) for zone in define_occlusion_parallelograms(args.camera)]
+    rows = {}
+    for nb_boxes in args.boxes:
+        df = random_boxes(nb_boxes, rng)
+
+        expected = filter_occluded_objects_apply(df, polygons, 0.75)
+        pd.testing.assert_frame_equal(filter_occluded_objects_vectorized(df, polygons, 0.75), expected)
+        pd.testing.assert_frame_equal(filter_occluded_objects_manual(df, args.camera, method='geometry'),
+                                      filter_occluded_objects_apply(df, polygons, 0.95))
+
+        rows[f'apply (0.75), {nb_boxes} boxes'] = summarize_latencies(
+            time_call(filter_occluded_objects_apply, df, polygons, 0.75, repeat=args.repeat))
+        rows[f'vectorized (0.75), {nb_boxes} boxes'] = summarize_latencies(
+            time_call(filter_occluded_objects_vectorized, df, polygons, 0.75, repeat=args.repeat))
+        rows[f'manual geometry (0.95), {nb_boxes} boxes'] = summarize_latencies(
+            time_call(filter_occluded_objects_manual, df, args.camera, method='geometry', repeat=args.repeat))
+        rows[f'manual mask (0.95), {nb_boxes} boxes'] = summarize_latencies(
+            time_call(filter_occluded_objects_manual, df, args.camera, method='mask', repeat=args.repeat))
+
+    print_table("Occlusion filtering (identical results checked against apply)", rows)
+
+
+if __name__ == '__main__':
+    main()
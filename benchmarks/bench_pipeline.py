@@ -0,0 +1,244 @@
+"""
+Benchmark every stage of the detection pipeline, and process_frame as a whole, on synthetic and reference frames.
+
+The models are replaced by stub backends returning fixed predictions (after an optional simulated latency), so the
+benchmark measures the pipeline itself and runs without network access, API key nor weights. The models given
+with --real are loaded from their usual backend instead, with a fallback on the stub if they are unavailable.
+
+The summaries (latency percentiles, throughput) can be saved to JSON with --output, and compared with a previous
+run with --baseline: the benchmark exits with status 1 when a latency exceeds the baseline by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--cameras 4 5 7 8] [--repeat 20] [--real yolo enhance_net]
+                                        [--output results.json] [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from benchmarks.bench_utils import compare_to_baseline, print_table, save_results, summarize_latencies, time_call
+from src.detection.ai.backends import InferenceResult, Point, Prediction
+from src.detection.ai.classification_finetuning import classification_fine_tuning
+from src.detection.ai.detection import detection_yolov11
+from src.detection.ai.detection_finetuning import detection_yolov11_fine_tuning
+from src.detection.background_substraction.background_sub import background_subtraction, background_subtraction_on_edges
+from src.detection.light.ai.lowlight_test import enhance_image
+from src.detection.light.equalization.light_fast import enhance_brightness
+from src.detection.objet_detection import process_frame
+from src.detection.utils.registry import registry
+from src.detection.windows.ai.windows_finetuning import detection_windows, filter_occluded_objects
+from src.detection.windows.manual.windows import filter_occluded_objects as filter_occluded_objects_manual
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), "../images")
+
+# Boxes (xmin, ymin, xmax, ymax) returned by the stub detectors, in the coordinates of a 1280x720 frame
+STUB_BOXES = np.array([[100, 200, 220, 560], [400, 250, 520, 600], [700, 150, 760, 300], [900, 300, 1100, 700],
+                       [1150, 100, 1270, 400]], dtype=np.float64)
+
+MODELS = ('yolo', 'detection_finetuning', 'classification_finetuning', 'windows_finetuning', 'enhance_net')
+
+
+class YoloStub:
+    """
+    Stand-in for the ultralytics YOLO model: returns STUB_BOXES for every image.
+    """
+    names = {0: 'person', 56: 'chair'}
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __call__(self, images: Any, verbose: bool = False, imgsz: int = 640) -> list:
+        images = images if isinstance(images, list) else [images]
+        time.sleep(self.latency * len(images))
+        data = np.column_stack([STUB_BOXES, np.full(len(STUB_BOXES), 0.8), np.zeros(len(STUB_BOXES))])
+        data[-1, 5] = 56
+        return [YoloResultStub(data) for _ in images]
+
+
+class YoloResultStub:
+    """
+    Results of one image, with the `boxes.data.cpu().numpy()` accessors of ultralytics.
+    """
+    def __init__(self, data: np.ndarray):
+        self.boxes = self
+        self.data = self
+        self.array = data
+
+    def cpu(self) -> 'YoloResultStub':
+        return self
+
+    def numpy(self) -> np.ndarray:
+        return self.array
+
+
+class BackendStub:
+    """
+    Stand-in for the backends of the fine-tuned models: returns fixed predictions for every image.
+    """
+    def __init__(self, predictions: List[Prediction], latency: float):
+        self.predictions = predictions
+        self.latency = latency
+
+    def infer(self, image: np.ndarray) -> list:
+        time.sleep(self.latency)
+        return [InferenceResult(self.predictions)]
+
+
+def stub_models(latency: float) -> Dict[str, Any]:
+    """
+    Build a stub for each model of the pipeline.
+
+    Args:
+        latency (float): Simulated inference time of each call, in seconds.
+
+    Returns:
+        Dict[str, Any]: The stub of each model, by registry name.
+    """
+    centers = (STUB_BOXES[:, :2] + STUB_BOXES[:, 2:]) / 2
+    sizes = STUB_BOXES[:, 2:] - STUB_BOXES[:, :2]
+    detections = [Prediction('person', 0, 0.9, x, y, width, height)
+                  for (x, y), (width, height) in zip(centers.tolist(), sizes.tolist())]
+    windows = [Prediction('window', 0, 0.9, points=tuple(Point(x, y) for x, y in polygon))
+               for polygon in ([(50, 150), (350, 150), (350, 450), (50, 450)],
+                               [(850, 250), (1150, 250), (1150, 550), (850, 550)])]
+    return {
+        'yolo': YoloStub(latency),
+        'detection_finetuning': BackendStub(detections, latency),
+        'classification_finetuning': BackendStub([Prediction('full', 1, 0.8)], latency),
+        'windows_finetuning': BackendStub(windows, latency),
+        'enhance_net': lambda image: (image, image, image),
+    }
+
+
+def install_models(real: List[str], latency: float) -> Dict[str, str]:
+    """
+    Register the stub of each model, except the real models that can be loaded.
+
+    Args:
+        real (List[str]): The models loaded from their usual backend.
+        latency (float): Simulated inference time of the stubs, in seconds.
+
+    Returns:
+        Dict[str, str]: 'real' or 'stub' for each model.
+    """
+    kinds = {}
+    for name, stub in stub_models(latency).items():
+        if name in real:
+            try:
+                registry.unload(name)
+                registry.get(name)
+                kinds[name] = 'real'
+                continue
+            except Exception as error:
+                print(f"Erreur: Modèle {name} indisponible ({error}), remplacé par un stub.")
+        registry.set(name, stub)
+        kinds[name] = 'stub'
+    return kinds
+
+
+def load_frames(cameras: List[int]) -> Dict[str, tuple]:
+    """
+    Load the benchmarked frames: the lighted reference frame of each camera (compared with its reference frame by
+    the background subtractions) and a synthetic frame of camera 4 with moving objects drawn on its reference.
+
+    Args:
+        cameras (List[int]): The cameras whose reference frames are used.
+
+    Returns:
+        Dict[str, tuple]: The (camera, frame) of each benchmarked frame, by name.
+    """
+    frames = {}
+    for camera in cameras:
+        frame = cv2.imread(os.path.join(IMAGES_DIR, f"frame_ref_cam{camera}_lightV2.jpg"))
+        if frame is None:
+            print(f"Erreur: Image de référence de la caméra {camera} introuvable.")
+            continue
+        frames[f"cam{camera}"] = (camera, frame)
+
+    synthetic = cv2.imread(os.path.join(IMAGES_DIR, "frame_ref_cam4.jpg"))
+    if synthetic is None:
+        synthetic = np.full((720, 1280, 3), 90, dtype=np.uint8)
+    rng = np.random.default_rng(0)
+    for x1, y1, x2, y2 in STUB_BOXES.astype(int):
+        cv2.rectangle(synthetic, (x1, y1), (x2, y2), rng.integers(0, 255, 3).tolist(), -1)
+    frames["synthetic"] = (4, synthetic)
+    return frames
+
+
+def run_benchmarks(frames: Dict[str, tuple], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Measure every stage of the pipeline on each frame.
+
+    Args:
+        frames (Dict[str, tuple]): The (camera, frame) of each benchmarked frame, by name.
+        repeat (int): Number of measured calls of each stage.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The summary of each benchmark, by name ('stage [frame]').
+    """
+    rows = {}
+    for frame_name, (camera, frame) in frames.items():
+        detections = detection_yolov11(frame)
+        polygons = detection_windows(frame)
+        detections_df = detections.to_dataframe()
+        stages = {
+            'process_frame': lambda: process_frame(frame, camera, draw_windows=False),
+            'process_frame (parallel)': lambda: process_frame(frame, camera, draw_windows=False, parallel=True),
+            'detection_yolov11': lambda: detection_yolov11(frame),
+            'detection_yolov11_fine_tuning': lambda: detection_yolov11_fine_tuning(frame),
+            'classification_fine_tuning': lambda: classification_fine_tuning(frame),
+            'detection_windows': lambda: detection_windows(frame),
+            'enhance_brightness': lambda: enhance_brightness(frame),
+            'enhance_image': lambda: enhance_image(frame),
+            'background_subtraction': lambda: background_subtraction(camera, frame),
+            'background_subtraction_on_edges': lambda: background_subtraction_on_edges(camera, frame),
+            'filter_occluded_objects (ai)': lambda: filter_occluded_objects(detections, polygons),
+            'filter_occluded_objects (manual)': lambda: filter_occluded_objects_manual(detections_df, camera),
+        }
+        for stage_name, stage in stages.items():
+            rows[f"{stage_name} [{frame_name}]"] = summarize_latencies(time_call(stage, repeat=repeat))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cameras', type=int, nargs='+', default=[4, 5, 7, 8], help="Reference frames used.")
+    parser.add_argument('--repeat', type=int, default=20, help="Number of measured calls of each stage.")
+    parser.add_argument('--real', nargs='*', default=[], choices=MODELS, help="Models not replaced by a stub.")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="Simulated inference time of the stubs (s).")
+    parser.add_argument('--output', help="JSON file where the results are saved.")
+    parser.add_argument('--baseline', help="JSON file of a previous run to compare with.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative increase of the latencies.")
+    args = parser.parse_args()
+
+    models = install_models(args.real, args.stub_latency)
+    rows = run_benchmarks(load_frames(args.cameras), args.repeat)
+    print_table("Pipeline stages (models: " + ", ".join(f"{name} {kind}" for name, kind in models.items()) + ")",
+                rows)
+
+    if args.output:
+        save_results(args.output, rows, {'models': models, 'stub_latency': args.stub_latency, 'repeat': args.repeat,
+                                         'python': platform.python_version(), 'machine': platform.machine(),
+                                         'opencv': cv2.__version__, 'date': time.strftime('%Y-%m-%d %H:%M:%S')})
+        print(f"\nRésultats enregistrés dans {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(rows, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) par rapport à {args.baseline} :")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nAucune régression par rapport à {args.baseline} (tolérance {args.tolerance * 100:.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
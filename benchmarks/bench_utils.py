@@ -0,0 +1,120 @@
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """
+    Summarize a list of latencies.
+
+    Args:
+        latencies (List[float]): The measured latencies, in seconds.
+
+    Returns:
+        Dict[str, float]: Number of samples, mean, p50/p95/p99 in milliseconds and throughput in calls/sec.
+    """
+    if not latencies:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'throughput': 0.0}
+
+    ordered = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'throughput': len(latencies) / total if total > 0 else 0.0,
+    }
+
+
+def time_call(function: Callable[..., Any], *args: Any, repeat: int = 20, warmup: int = 2,
+              **kwargs: Any) -> List[float]:
+    """
+    Measure the latency of a function call.
+
+    Args:
+        function (Callable[..., Any]): The function to measure.
+        *args (Any): Positional arguments of the function.
+        repeat (int): Number of measured calls. Defaults to 20.
+        warmup (int): Number of calls made before measuring. Defaults to 2.
+        **kwargs (Any): Keyword arguments of the function.
+
+    Returns:
+        List[float]: The latency of each measured call, in seconds.
+    """
+    for _ in range(warmup):
+        function(*args, **kwargs)
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print the summaries of several benchmarks as a table.
+
+    Args:
+        title (str): The title of the table.
+        rows (Dict[str, Dict[str, float]]): The summary of each benchmark, by name.
+    """
+    width = max([40] + [len(name) + 2 for name in rows])
+    print(f"\n{title}")
+    print(f"{'benchmark':<{width}}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'per sec':>12}")
+    for name, summary in rows.items():
+        print(f"{name:<{width}}{summary['count']:>8}{summary['p50_ms']:>12.3f}{summary['p95_ms']:>12.3f}"
+              f"{summary['p99_ms']:>12.3f}{summary['throughput']:>12.1f}")
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]], metadata: Dict[str, Any]) -> None:
+    """
+    Save the summaries of several benchmarks to a JSON file, usable later as a baseline.
+
+    Args:
+        path (str): The path to the JSON file.
+        results (Dict[str, Dict[str, float]]): The summary of each benchmark, by name.
+        metadata (Dict[str, Any]): Description of the run (options, machine...).
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'metadata': metadata, 'results': results}, file, indent=2, ensure_ascii=False)
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline_path: str, tolerance: float = 0.2,
+                        metrics: Tuple[str, ...] = ('p50_ms', 'p95_ms'), min_delta_ms: float = 0.5) -> List[str]:
+    """
+    Compare the summaries of several benchmarks with those saved in a baseline file.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): The summary of each benchmark, by name.
+        baseline_path (str): The path to a JSON file written by save_results.
+        tolerance (float): Allowed relative increase of each metric. Defaults to 0.2 (20%).
+        metrics (Tuple[str, ...]): The compared latency metrics. Defaults to ('p50_ms', 'p95_ms').
+        min_delta_ms (float): Increases smaller than this are measurement noise, not regressions. Defaults to 0.5.
+
+    Returns:
+        List[str]: One message per regression (empty if there is none). The benchmarks missing from the
+            baseline are ignored.
+    """
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+
+    regressions = []
+    for name, summary in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric in metrics:
+            limit = max(reference[metric] * (1 + tolerance), reference[metric] + min_delta_ms)
+            if reference[metric] > 0 and summary[metric] > limit:
+                regressions.append(f"{name}: {metric} {summary[metric]:.3f} > {reference[metric]:.3f} "
+                                   f"(+{(summary[metric] / reference[metric] - 1) * 100:.0f}%)")
+    return regressions
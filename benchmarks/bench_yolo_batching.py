@@ -0,0 +1,74 @@
+"""
+Compare YOLO run on the frames of several cameras one by one, as a single batch and through the YoloBatcher
+fed by one thread per camera.
+
+Each measured call analyses one frame of every camera (the reference images of the cameras). The pipeline
+does not batch YOLO because no gain was measured on CPU: this benchmark checks it again on other hardware.
+
+Usage:
+    python benchmarks/bench_yolo_batching.py [--cameras 4 5 7 8] [--repeat 10] [--imgsz 640]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from benchmarks.bench_utils import print_table, summarize_latencies, time_call
+from src.detection.ai.detection import YoloBatcher, detection_yolov11, detection_yolov11_batch
+
+IMAGES_FOLDER = os.path.join(os.path.dirname(__file__), "../images")
+
+
+def load_frames(cameras: List[int]) -> List[np.ndarray]:
+    """
+    Load the reference image of each camera, or a random frame when it is missing.
+    """
+    frames = []
+    for camera in cameras:
+        frame = cv2.imread(os.path.join(IMAGES_FOLDER, f"frame_ref_cam{camera}_lightV2.jpg"))
+        if frame is None:
+            frame = np.random.default_rng(camera).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+        frames.append(frame)
+    return frames
+
+
+def sequential(frames: List[np.ndarray]) -> List[Any]:
+    return [detection_yolov11(frame) for frame in frames]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cameras', type=int, nargs='+', default=[4, 5, 7, 8], help="Cameras analysed together.")
+    parser.add_argument('--repeat', type=int, default=10, help="Number of measured calls.")
+    parser.add_argument('--imgsz', type=int, default=640, help="Inference size of the batches.")
+    args = parser.parse_args()
+
+    frames = load_frames(args.cameras)
+    batcher = YoloBatcher(max_batch_size=len(frames), imgsz=args.imgsz)
+    pool = ThreadPoolExecutor(len(frames), thread_name_prefix='camera')
+
+    def batched_by_threads(frames: List[np.ndarray]) -> List[Any]:
+        return list(pool.map(batcher.detect, frames))
+
+    rows = {
+        'one by one': summarize_latencies(time_call(sequential, frames, repeat=args.repeat)),
+        'single batch': summarize_latencies(time_call(detection_yolov11_batch, frames, args.imgsz,
+                                                      repeat=args.repeat)),
+        'YoloBatcher (1 thread per camera)': summarize_latencies(time_call(batched_by_threads, frames,
+                                                                           repeat=args.repeat)),
+    }
+    pool.shutdown()
+    batcher.close()
+
+    print_table(f"YOLO on {len(frames)} cameras (1 frame per camera per call)", rows)
+    print(f"Taille moyenne des batchs du YoloBatcher : {np.mean(batcher.batch_sizes):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.detection.objet_detection import list_videos, process_video
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'partial', 'failed', 'cancelled')
+
+# States of the jobs that will not run anymore
+FINISHED_STATES = ('succeeded', 'partial', 'failed', 'cancelled')
+
+# Number of jobs waiting for a worker, beyond which new jobs are refused
+MAX_QUEUED_JOBS = 8
+
+# Number of finished jobs kept for the /jobs routes
+FINISHED_JOBS_KEPT = 100
+
+
+class Job:
+    """
+    Analysis of the videos of a folder, run in the background by a JobManager.
+
+    The job goes through the states 'queued', 'running' and then 'succeeded', 'partial' (some videos failed),
+    'failed' (every video failed) or 'cancelled'. Its progress
+    (current video, analysed frames, frames/sec) is updated by the progress_callback of process_video.
+    """
+    def __init__(self, folder_path: str, nb_of_img_skip_between_2: int = 0, **options: Any):
+        """
+        Create a queued job.
+
+        Args:
+            folder_path (str): The path to the folder containing video files.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            **options (Any): Options forwarded to process_video (e.g. parallel_stages=True).
+        """
+        self.id = uuid.uuid4().hex
+        self.folder_path = folder_path
+        self.nb_of_img_skip_between_2 = nb_of_img_skip_between_2
+        self.options = options
+        self.state = 'queued'
+        self.videos: List[str] = []
+        self.results: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, str]] = []
+        # Last progress of the video being analysed, None between 2 videos
+        self.progress: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def key(self) -> str:
+        """
+        str: The folder of the job, normalized to detect the duplicate submissions.
+        """
+        return os.path.realpath(self.folder_path)
+
+    @property
+    def finished(self) -> bool:
+        """
+        bool: True once the job succeeded, failed or was cancelled.
+        """
+        return self.state in FINISHED_STATES
+
+    def report_progress(self, progress: Dict[str, Any]) -> None:
+        """
+        Record the progress of the current video (progress_callback of process_video).
+
+        Args:
+            progress (Dict[str, Any]): The progress reported by process_video.
+        """
+        self.progress = progress
+
+    def run(self) -> None:
+        """
+        Analyse the videos of the folder one after the other, in headless mode, until the job is cancelled.
+        The failure of a video is recorded in `errors` and does not stop the job.
+        """
+        self.videos = list_videos(self.folder_path)
+        for video_path in self.videos:
+            if self.cancel_event.is_set():
+                break
+            try:
+                self.results.append(process_video(video_path, self.nb_of_img_skip_between_2, headless=True,
+                                                  progress_callback=self.report_progress,
+                                                  stop_event=self.cancel_event, **self.options))
+            except Exception as error:
+                print(f"Erreur: Échec de l'analyse de la vidéo {video_path} : {error}")
+                self.errors.append({'video': video_path, 'error': str(error)})
+            finally:
+                self.progress = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Describe the job for the /jobs routes.
+
+        Returns:
+            Dict[str, Any]: The id, folder and state of the job, its progress (videos done, current video, analysed
+                frames, frames/sec of the current video and of the whole job), the statistics of each analysed
+                video and the errors.
+        """
+        results = list(self.results)
+        progress = self.progress
+        frames_analysed = sum(stats['frames_analysed'] for stats in results)
+        if progress is not None:
+            frames_analysed += progress['analysed']
+
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at is not None else 0.0
+        return {
+            'id': self.id,
+            'folder': self.folder_path,
+            'state': self.state,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'videos_total': len(self.videos),
+            'videos_done': len(results) + len(self.errors),
+            'current_video': progress['video'] if progress is not None else None,
+            'current_fps': progress['fps'] if progress is not None else None,
+            'frames_analysed': frames_analysed,
+            'elapsed': elapsed,
+            'fps': frames_analysed / elapsed if elapsed > 0 else 0.0,
+            'results': results,
+            'errors': list(self.errors),
+        }
+
+
+class JobManager:
+    """
+    Run the analysis jobs in background threads, fed by a bounded queue.
+
+    A folder submitted while a job of the same folder is queued or running is not analysed twice: the existing
+    job is returned. The workers are started with the first job, so that importing the module starts no thread.
+    """
+    def __init__(self, workers: int = 1, max_queued: int = MAX_QUEUED_JOBS,
+                 runner: Callable[[Job], None] = Job.run):
+        """
+        Create the manager.
+
+        Args:
+            workers (int): Number of jobs running at the same time. Defaults to 1.
+            max_queued (int): Number of jobs waiting for a worker, beyond which new jobs are refused.
+                Defaults to MAX_QUEUED_JOBS.
+            runner (Callable[[Job], None]): Function running a job. Defaults to Job.run.
+        """
+        self.workers = workers
+        self.runner = runner
+        self.queue: queue.Queue = queue.Queue(max_queued)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def submit(self, folder_path: str, nb_of_img_skip_between_2: int = 0, **options: Any) -> Tuple[Job, bool]:
+        """
+        Queue the analysis of a folder, unless the folder is already queued or being analysed.
+
+        Args:
+            folder_path (str): The path to the folder containing video files.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            **options (Any): Options forwarded to process_video.
+
+        Raises:
+            RuntimeError: If the queue of jobs is full or the manager was shut down.
+
+        Returns:
+            Tuple[Job, bool]: The job, and True if it was created (False if it already existed).
+        """
+        job = Job(folder_path, nb_of_img_skip_between_2, **options)
+        with self.lock:
+            if self.stopped:
+                raise RuntimeError("Erreur: Les analyses sont arrêtées.")
+            for existing in self.jobs.values():
+                if existing.key == job.key and not existing.finished:
+                    return existing, False
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                raise RuntimeError(f"Erreur: Trop d'analyses en attente ({self.queue.maxsize}), réessayer plus tard.")
+            self.jobs[job.id] = job
+            self._prune()
+            self._start_workers()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Return a job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            Optional[Job]: The job, or None if it is unknown.
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """
+        Return the known jobs, the oldest first.
+
+        Returns:
+            List[Job]: The queued, running and last finished jobs.
+        """
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job: a queued job will not run, a running job stops before its next frame.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            Optional[Job]: The job, or None if it is unknown.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_event.set()
+            if job.state == 'queued':
+                job.state = 'cancelled'
+                job.finished_at = time.time()
+        return job
+
+    def shutdown(self) -> None:
+        """
+        Cancel every job and stop the workers.
+        """
+        with self.lock:
+            self.stopped = True
+            threads, self.threads = self.threads, []
+        for job in self.list():
+            self.cancel(job.id)
+        # The cancelled jobs are dropped from the queue so that the stop signal never waits behind them
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(None)
+        for thread in threads:
+            thread.join()
+
+    def _start_workers(self) -> None:
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"analysis-worker-{len(self.threads)}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - FINISHED_JOBS_KEPT, 0)]:
+            del self.jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job = self.queue.get()
+            if job is None:
+                # Pass the stop signal on to the next worker
+                self.queue.put_nowait(None)
+                return
+            with self.lock:
+                if job.finished:
+                    continue
+                job.state = 'running'
+                job.started_at = time.time()
+            try:
+                self.runner(job)
+                if job.cancel_event.is_set():
+                    state = 'cancelled'
+                elif job.errors and not job.results:
+                    state = 'failed'
+                elif job.errors:
+                    state = 'partial'
+                else:
+                    state = 'succeeded'
+            except Exception as error:
+                print(f"Erreur: Échec de l'analyse du dossier {job.folder_path} : {error}")
+                job.errors.append({'video': job.folder_path, 'error': str(error)})
+                state = 'failed'
+            with self.lock:
+                job.state = state
+                job.finished_at = time.time()
+
+
+# Analysis jobs of the Flask application
+job_manager = JobManager()
@@ -1,5 +1,7 @@
-from flask import Flask, render_template, jsonify, Response
-from src.detection.objet_detection import process_videos
+from flask import Flask, render_template, jsonify, request, Response
+from src.app.jobs import job_manager
+from src.detection.utils.live_view import MJPEG_BOUNDARY, live_views
+from src.detection.utils.metrics import metrics
 from src.config.config_loader import load_config, get_video_path
 
 
@@ -25,17 +27,112 @@ def init_routes(app: Flask) -> None:
         return render_template('index.html')
 
     @app.route('/start-analysis', methods=['POST'])
-    def start_analysis() -> Response:
+    def start_analysis() -> tuple[Response, int]:
         """
-        Start the video analysis process.
+        Start the video analysis process in the background.
 
-        This route loads the configuration, retrieves the video path,
-        and starts the video processing.
+        The videos of the folder of the configuration are analysed. The number of images to skip between 2
+        images can be given in the JSON body (`nb_of_img_skip_between_2`, 0 by default). The analysis is queued
+        as a job and the route returns at once with its id; the progress is read with /jobs/<job_id>. A folder
+        already queued or being analysed is not analysed twice, its job is returned.
 
         Returns:
-            Response: A JSON response indicating the status of the analysis.
+            tuple[Response, int]: A JSON response with the status of the analysis and the id of its job, and the
+                status code (202, 400 if the body is invalid, or 503 if too many analyses are waiting).
         """
-        config = load_config()
-        config_path = get_video_path(config)
-        process_videos(config_path)
-        return jsonify({"status": "success", "message": "Analyse lancée!"})
+        body = request.get_json(silent=True) or {}
+        nb_of_img_skip_between_2 = body.get('nb_of_img_skip_between_2', 0)
+        if not isinstance(nb_of_img_skip_between_2, int) or isinstance(nb_of_img_skip_between_2, bool) \
+                or nb_of_img_skip_between_2 < 0:
+            return jsonify({"status": "error",
+                            "message": "Erreur: nb_of_img_skip_between_2 doit être un entier positif."}), 400
+        try:
+            job, created = job_manager.submit(get_video_path(load_config()), nb_of_img_skip_between_2)
+        except RuntimeError as error:
+            return jsonify({"status": "error", "message": str(error)}), 503
+        message = "Analyse lancée!" if created else "Analyse déjà en cours."
+        return jsonify({"status": "success", "message": message, "job_id": job.id, "state": job.state}), 202
+
+    @app.route('/jobs')
+    def list_jobs() -> Response:
+        """
+        List the analysis jobs (queued, running and last finished).
+
+        Returns:
+            Response: A JSON list of the jobs, the oldest first.
+        """
+        return jsonify([job.to_dict() for job in job_manager.list()])
+
+    @app.route('/jobs/<job_id>')
+    def get_job(job_id: str) -> tuple[Response, int]:
+        """
+        Report the state, progress, throughput and results of an analysis job.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            tuple[Response, int]: The job as JSON and 200, or an error and 404 if the job is unknown.
+        """
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({"status": "error", "message": f"Erreur: Analyse inconnue {job_id}."}), 404
+        return jsonify(job.to_dict()), 200
+
+    @app.route('/jobs/<job_id>/cancel', methods=['POST'])
+    def cancel_job(job_id: str) -> tuple[Response, int]:
+        """
+        Cancel an analysis job: a queued job will not run, a running job stops before its next frame.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            tuple[Response, int]: The job as JSON and 200, or an error and 404 if the job is unknown.
+        """
+        job = job_manager.cancel(job_id)
+        if job is None:
+            return jsonify({"status": "error", "message": f"Erreur: Analyse inconnue {job_id}."}), 404
+        return jsonify(job.to_dict()), 200
+
+    @app.route('/live')
+    def list_live_views() -> Response:
+        """
+        List the cameras broadcast so far, with their number of viewers.
+
+        Returns:
+            Response: A JSON list of the cameras.
+        """
+        return jsonify(live_views.cameras())
+
+    @app.route('/live/<int:camera>')
+    def live_view(camera: int) -> Response:
+        """
+        Stream the 2x2 mosaic of the results of a camera as MJPEG, e.g. in an <img> tag.
+
+        Each image is encoded once for all the viewers of the camera, at a capped frame rate, and only while at
+        least one viewer is connected.
+
+        Args:
+            camera (int): The camera number.
+
+        Returns:
+            Response: The multipart/x-mixed-replace stream.
+        """
+        return Response(live_views.get(camera).stream(),
+                        mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}')
+
+    @app.route('/metrics')
+    def get_metrics() -> Response:
+        """
+        Export the latencies of the stages of the pipeline and the counters, per camera.
+
+        The Prometheus text format is returned by default, JSON with `?format=json`. The metrics are only
+        recorded when enabled (environment variable OBJDET_METRICS=1 or `metrics.enable()`).
+
+        Returns:
+            Response: The metrics.
+        """
+        if request.args.get('format') == 'json':
+            return jsonify(metrics.snapshot())
+        return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -73,4 +73,48 @@ def get_windows_detection(config: Dict[str, Any]) -> tuple[str, str]:
         tuple[str, str]: A tuple containing the Roboflow API key and the model ID.
     """
     config_ai = config.get('ai-windows', {})
-    return config_ai.get('roboflow_api_key', ''), config_ai.get('model_id', '')
\ No newline at end of file
+    return config_ai.get('roboflow_api_key', ''), config_ai.get('model_id', '')
+
+
+def get_ai_model_config(config: Dict[str, Any], section: str) -> Dict[str, Any]:
+    """
+    Retrieve the whole configuration of an AI model, including its inference backend.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+        section (str): The section of the model ('ai-detection', 'ai-empty' or 'ai-windows').
+
+    Returns:
+        Dict[str, Any]: The configuration of the model. 'backend' defaults to 'roboflow'.
+    """
+    model_config = dict(config.get(section, {}))
+    model_config.setdefault('backend', 'roboflow')
+    return model_config
+
+
+def get_streams(config: Dict[str, Any]) -> list[Dict[str, Any]]:
+    """
+    Retrieve the live streams of the cameras from the configuration.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        list[Dict[str, Any]]: One dictionary per stream, with its 'url' and its 'camera' number.
+    """
+    return list(config.get('streams', []))
+
+
+def get_profiling_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retrieve the profiling settings from the configuration.
+
+    Args:
+        config (Dict[str, Any]): The configuration dictionary.
+
+    Returns:
+        Dict[str, Any]: The settings 'frames' (0: disabled), 'skip', 'output_dir', 'mode' and 'torch'.
+    """
+    settings = {'frames': 0, 'skip': 0, 'output_dir': 'profiles', 'mode': 'cprofile', 'torch': False}
+    settings.update(config.get('profiling', {}))
+    return settings
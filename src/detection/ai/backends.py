@@ -0,0 +1,354 @@
+import ast
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+BACKENDS = ('roboflow', 'onnx', 'openvino')
+TASKS = ('detect', 'classify', 'segment')
+
+project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+
+
+class Point(NamedTuple):
+    """
+    A point of a segmentation polygon.
+    """
+    x: float
+    y: float
+
+
+class Prediction(NamedTuple):
+    """
+    A prediction with the same attributes as the Roboflow predictions.
+
+    (x, y) is the center of the box. The box and the points are empty for the classification.
+    """
+    class_name: str
+    class_id: int
+    confidence: float
+    x: float = 0.0
+    y: float = 0.0
+    width: float = 0.0
+    height: float = 0.0
+    points: Tuple[Point, ...] = ()
+
+
+class InferenceResult(NamedTuple):
+    """
+    The result of an image, with the `predictions` attribute of the Roboflow responses.
+    """
+    predictions: List[Prediction]
+
+
+class RoboflowBackend:
+    """
+    Backend running a Roboflow model through `inference.get_model`.
+    """
+    def __init__(self, model_id: str, roboflow_api_key: str = ''):
+        """
+        Load the model.
+
+        Args:
+            model_id (str): The Roboflow model ID.
+            roboflow_api_key (str): The Roboflow API key, used if ROBOFLOW_API_KEY is not set. Defaults to ''.
+        """
+        from inference import get_model
+
+        if not os.environ.get('ROBOFLOW_API_KEY'):
+            os.environ['ROBOFLOW_API_KEY'] = roboflow_api_key
+        self.model = get_model(model_id=model_id)
+
+    def infer(self, image: Union[np.ndarray, List[np.ndarray]]) -> list:
+        """
+        Run the model on an image, or on a list of images in a single call.
+
+        Args:
+            image (Union[np.ndarray, List[np.ndarray]]): The image in BGR format, or a list of images.
+
+        Returns:
+            list: The Roboflow responses, one per image.
+        """
+        return self.model.infer(image=image)
+
+
+class LocalYoloBackend:
+    """
+    Backend running exported YOLO weights in-process on the CPU with ONNX Runtime or OpenVINO.
+
+    The outputs are converted into predictions with the same attributes as the Roboflow ones, so the functions
+    using the models do not depend on the backend.
+    """
+    def __init__(self, weights: str, task: str, runtime: str = 'onnx', class_names: Optional[Sequence[str]] = None,
+                 imgsz: Optional[int] = None, confidence: float = 0.4, iou: float = 0.5,
+                 session: Optional[Any] = None):
+        """
+        Load the exported weights.
+
+        Args:
+            weights (str): Path to the .onnx file (or the OpenVINO .xml file).
+            task (str): 'detect', 'classify' or 'segment'.
+            runtime (str): 'onnx' or 'openvino'. Defaults to 'onnx'.
+            class_names (Optional[Sequence[str]]): The names of the classes. Defaults to None
+                (read from the metadata of the ONNX export).
+            imgsz (Optional[int]): The input size of the model. Defaults to None (read from the model input).
+            confidence (float): Minimum confidence of the predictions. Defaults to 0.4.
+            iou (float): IoU threshold of the non-maximum suppression. Defaults to 0.5.
+            session (Optional[Any]): A callable taking the input blob and returning the list of outputs,
+                used instead of loading the weights. Defaults to None.
+
+        Raises:
+            ValueError: If the task or the runtime is unknown.
+        """
+        if task not in TASKS:
+            raise ValueError(f"Erreur: Tâche inconnue {task}, choisir parmi {TASKS}.")
+        self.task = task
+        self.confidence = confidence
+        self.iou = iou
+        self.class_names = list(class_names) if class_names is not None else None
+
+        # Number of images of each call of the session, None if the model accepts any batch size
+        self.batch_size: Optional[int] = 1
+        if session is not None:
+            self.session = session
+            self.imgsz = imgsz or 640
+        elif runtime == 'onnx':
+            self.session, self.imgsz, self.batch_size, names = self._load_onnx(weights)
+            self.imgsz = imgsz or self.imgsz
+            self.class_names = self.class_names or names
+        elif runtime == 'openvino':
+            self.session, self.imgsz, self.batch_size = self._load_openvino(weights)
+            self.imgsz = imgsz or self.imgsz
+        else:
+            raise ValueError(f"Erreur: Runtime inconnu {runtime}, choisir parmi ('onnx', 'openvino').")
+
+    @staticmethod
+    def _load_onnx(weights: str) -> Tuple[Any, int, Optional[int], Optional[List[str]]]:
+        import onnxruntime
+
+        session = onnxruntime.InferenceSession(weights, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        input_size = session.get_inputs()[0].shape[-1]
+        # The batch dimension is a name when the model was exported with dynamic=True
+        batch_size = session.get_inputs()[0].shape[0]
+
+        # Ultralytics stores the names of the classes in the metadata of the export
+        names = session.get_modelmeta().custom_metadata_map.get('names')
+        class_names = None
+        if names:
+            names = ast.literal_eval(names)
+            class_names = [names[i] for i in sorted(names)]
+
+        def run(blob: np.ndarray) -> List[np.ndarray]:
+            return session.run(None, {input_name: blob})
+
+        return (run, input_size if isinstance(input_size, int) else 640,
+                batch_size if isinstance(batch_size, int) else None, class_names)
+
+    @staticmethod
+    def _load_openvino(weights: str) -> Tuple[Any, int, Optional[int]]:
+        import openvino
+
+        compiled_model = openvino.Core().compile_model(weights, 'CPU')
+        shape = compiled_model.inputs[0].get_partial_shape()
+        input_size = shape[-1].get_length() if shape[-1].is_static else 640
+        batch_size = shape[0].get_length() if shape[0].is_static else None
+
+        def run(blob: np.ndarray) -> List[np.ndarray]:
+            outputs = compiled_model([blob])
+            return [outputs[output] for output in compiled_model.outputs]
+
+        return run, input_size, batch_size
+
+    def infer(self, image: Union[np.ndarray, List[np.ndarray]]) -> List[InferenceResult]:
+        """
+        Run the model on an image, or on a list of images. The detection of a list runs in batches of
+        `batch_size` images (a single batch if the model was exported with a dynamic batch size).
+
+        Args:
+            image (Union[np.ndarray, List[np.ndarray]]): The image in BGR format, or a list of images.
+
+        Returns:
+            List[InferenceResult]: The result of each image, in a list like the Roboflow responses.
+        """
+        images = image if isinstance(image, list) else [image]
+        if self.task == 'classify':
+            return [InferenceResult(self._classify(image)) for image in images]
+        return [InferenceResult(predictions) for predictions in self._detect(images)]
+
+    def class_name(self, class_id: int) -> str:
+        """
+        Return the name of a class.
+
+        Args:
+            class_id (int): The index of the class.
+
+        Returns:
+            str: The name of the class, or its index when the names are unknown.
+        """
+        if self.class_names is not None and class_id < len(self.class_names):
+            return self.class_names[class_id]
+        return str(class_id)
+
+    def _classify(self, image: np.ndarray) -> List[Prediction]:
+        # Resize the shorter side and crop the center, like the Ultralytics classification transforms
+        height, width = image.shape[:2]
+        scale = self.imgsz / min(height, width)
+        resized = cv2.resize(image, (max(self.imgsz, round(width * scale)), max(self.imgsz, round(height * scale))))
+        top = (resized.shape[0] - self.imgsz) // 2
+        left = (resized.shape[1] - self.imgsz) // 2
+        cropped = resized[top:top + self.imgsz, left:left + self.imgsz]
+
+        blob = cv2.dnn.blobFromImage(cropped, 1 / 255.0, swapRB=True)
+        probabilities = np.asarray(self.session(blob)[0]).reshape(-1)
+
+        order = np.argsort(-probabilities)
+        return [Prediction(self.class_name(int(i)), int(i), float(probabilities[i])) for i in order]
+
+    def _run(self, blob: np.ndarray) -> List[np.ndarray]:
+        # Split the batch when the model only accepts a fixed number of images
+        if self.batch_size is None or len(blob) <= self.batch_size:
+            return [np.asarray(output) for output in self.session(blob)]
+        batches = [self.session(blob[start:start + self.batch_size])
+                   for start in range(0, len(blob), self.batch_size)]
+        return [np.concatenate([np.asarray(outputs[k]) for outputs in batches]) for k in range(len(batches[0]))]
+
+    def _detect(self, images: List[np.ndarray]) -> List[List[Prediction]]:
+        letterboxed = [letterbox(image, self.imgsz) for image in images]
+        blob = cv2.dnn.blobFromImages([canvas for canvas, _, _ in letterboxed], 1 / 255.0, swapRB=True)
+        outputs = self._run(blob)
+        return [self._predictions(outputs, index, image.shape[:2], scale, padding)
+                for index, (image, (_, scale, padding)) in enumerate(zip(images, letterboxed))]
+
+    def _predictions(self, outputs: List[np.ndarray], index: int, image_shape: Tuple[int, int], scale: float,
+                     padding: Tuple[int, int]) -> List[Prediction]:
+        height, width = image_shape
+        left, top = padding
+
+        # (4 + nb_classes [+ 32 mask coefficients], nb_anchors) -> one row per anchor
+        rows = outputs[0][index].T
+        nb_mask_coefficients = outputs[1].shape[1] if self.task == 'segment' else 0
+        nb_classes = rows.shape[1] - 4 - nb_mask_coefficients
+
+        scores = rows[:, 4:4 + nb_classes]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(rows)), class_ids]
+        keep = confidences >= self.confidence
+        rows, class_ids, confidences = rows[keep], class_ids[keep], confidences[keep]
+        if len(rows) == 0:
+            return []
+
+        # Non-maximum suppression per class, on boxes in the letterboxed image
+        boxes_xywh = np.column_stack([rows[:, 0] - rows[:, 2] / 2, rows[:, 1] - rows[:, 3] / 2, rows[:, 2], rows[:, 3]])
+        indices = cv2.dnn.NMSBoxesBatched(boxes_xywh.tolist(), confidences.tolist(), class_ids.tolist(),
+                                          self.confidence, self.iou)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+        masks = None
+        if self.task == 'segment':
+            masks = self._masks(rows[indices, 4 + nb_classes:], outputs[1][index], rows[indices, :4],
+                                scale, (left, top), (height, width))
+
+        predictions = []
+        for k, i in enumerate(indices):
+            cx, cy, w, h = rows[i, :4]
+            points: Tuple[Point, ...] = ()
+            if masks is not None:
+                points = mask_to_points(masks[k])
+                if len(points) < 3:
+                    continue
+            predictions.append(Prediction(self.class_name(int(class_ids[i])), int(class_ids[i]), float(confidences[i]),
+                                          float((cx - left) / scale), float((cy - top) / scale),
+                                          float(w / scale), float(h / scale), points))
+        return predictions
+
+    def _masks(self, coefficients: np.ndarray, protos: np.ndarray, boxes_cxcywh: np.ndarray, scale: float,
+               padding: Tuple[int, int], image_shape: Tuple[int, int]) -> np.ndarray:
+        nb_coefficients, mask_height, mask_width = protos.shape
+        masks = 1 / (1 + np.exp(-(coefficients @ protos.reshape(nb_coefficients, -1))))
+        masks = masks.reshape(-1, mask_height, mask_width)
+
+        left, top = padding
+        height, width = image_shape
+        results = np.zeros((len(masks), height, width), np.uint8)
+        for k, mask in enumerate(masks):
+            # Keep the mask inside its box, remove the letterbox padding and go back to the image size
+            mask = cv2.resize(mask, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+            cx, cy, w, h = boxes_cxcywh[k]
+            box_mask = np.zeros_like(mask)
+            y1, y2 = max(int(cy - h / 2), 0), min(int(np.ceil(cy + h / 2)), self.imgsz)
+            x1, x2 = max(int(cx - w / 2), 0), min(int(np.ceil(cx + w / 2)), self.imgsz)
+            box_mask[y1:y2, x1:x2] = mask[y1:y2, x1:x2]
+
+            content = box_mask[top:top + round(height * scale), left:left + round(width * scale)]
+            results[k] = cv2.resize(content, (width, height), interpolation=cv2.INTER_LINEAR) > 0.5
+        return results
+
+
+def letterbox(image: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Resize an image keeping its aspect ratio and pad it to a square.
+
+    Args:
+        image (np.ndarray): The image.
+        size (int): The side of the square.
+
+    Returns:
+        Tuple[np.ndarray, float, Tuple[int, int]]: The padded image, the scale and the (left, top) padding.
+    """
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_height, new_width = round(height * scale), round(width * scale)
+    top, left = (size - new_height) // 2, (size - new_width) // 2
+
+    canvas = np.full((size, size, 3), 114, np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = cv2.resize(image, (new_width, new_height),
+                                                                     interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (left, top)
+
+
+def mask_to_points(mask: np.ndarray) -> Tuple[Point, ...]:
+    """
+    Convert a binary mask into the points of its largest contour.
+
+    Args:
+        mask (np.ndarray): The binary mask.
+
+    Returns:
+        Tuple[Point, ...]: The points of the contour (empty if the mask is empty).
+    """
+    contours, _ = cv2.findContours(mask.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return ()
+    contour = max(contours, key=cv2.contourArea).reshape(-1, 2)
+    return tuple(Point(float(x), float(y)) for x, y in contour)
+
+
+def load_backend(model_config: Dict[str, Any], task: str) -> Any:
+    """
+    Load the backend selected in the configuration of a model.
+
+    Args:
+        model_config (Dict[str, Any]): The section of the model in config.json ('backend' defaults to 'roboflow').
+            Relative 'weights' paths are relative to the root of the project.
+        task (str): 'detect', 'classify' or 'segment'.
+
+    Raises:
+        ValueError: If the backend is unknown.
+
+    Returns:
+        Any: The backend, with an `infer(image)` method returning results with a `predictions` attribute.
+    """
+    backend = model_config.get('backend', 'roboflow')
+    match backend:
+        case 'roboflow':
+            return RoboflowBackend(model_config.get('model_id', ''), model_config.get('roboflow_api_key', ''))
+        case 'onnx' | 'openvino':
+            return LocalYoloBackend(os.path.join(project_dir, model_config['weights']), task, runtime=backend,
+                                    class_names=model_config.get('class_names'),
+                                    imgsz=model_config.get('imgsz'),
+                                    confidence=model_config.get('confidence', 0.4),
+                                    iou=model_config.get('iou', 0.5))
+        case _:
+            raise ValueError(f"Erreur: Backend inconnu {backend}, choisir parmi {BACKENDS}.")
@@ -1,17 +1,25 @@
 import os
 import sys
-from inference import get_model
 from typing import Any
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.config.config_loader import load_config, get_ai_model_empty
+from src.config.config_loader import load_config, get_ai_model_config
+from src.detection.ai.backends import load_backend
+from src.detection.utils.registry import registry
 
-config = load_config()
-roboflow_api_key, model_id = get_ai_model_empty(config)
-if not os.environ.get('ROBOFLOW_API_KEY'):
-    os.environ['ROBOFLOW_API_KEY'] = roboflow_api_key
-model_empty = get_model(model_id=model_id)
+def load_model_empty() -> Any:
+    """
+    Load the empty/full classification model with the backend selected in the configuration (Roboflow by default).
+
+    Returns:
+        Any: The model backend.
+    """
+    config = load_config()
+    return load_backend(get_ai_model_config(config, 'ai-empty'), 'classify')
+
+
+registry.register('classification_finetuning', load_model_empty)
 
 def classification_fine_tuning(frame: Any) -> list:
     """
@@ -23,4 +31,4 @@ def classification_fine_tuning(frame: Any) -> list:
     Returns:
         list: A list of predictions from the model.
     """
-    return model_empty.infer(image=frame)[0].predictions
\ No newline at end of file
+    return registry.get('classification_finetuning').infer(image=frame)[0].predictions
\ No newline at end of file
@@ -1,10 +1,63 @@
-from ultralytics import YOLO
-import pandas as pd
-from typing import Any
+from concurrent.futures import Future
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, List, Optional, Tuple
 
-model_yolo = YOLO("yolo11n.pt")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-def detection_yolov11(frame: Any) -> pd.DataFrame:
+from src.detection.utils.detections import Detections
+from src.detection.utils.profiling import profiled_section
+from src.detection.utils.registry import registry
+
+
+def load_model_yolo() -> Any:
+    """
+    Load the stock YOLO model.
+
+    Returns:
+        Any: The ultralytics YOLO model.
+    """
+    from ultralytics import YOLO
+
+    return YOLO("yolo11n.pt")
+
+
+registry.register('yolo', load_model_yolo)
+
+
+def get_model_yolo() -> Any:
+    """
+    Return the stock YOLO model, loaded on first use.
+
+    Returns:
+        Any: The ultralytics YOLO model.
+    """
+    return registry.get('yolo')
+
+
+def results_to_detections(result: Any) -> Detections:
+    """
+    Convert the YOLO results of one image into Detections.
+
+    Args:
+        result (Any): The ultralytics Results of one image.
+
+    Returns:
+        Detections: The detected objects.
+    """
+    # Récupérer les boîtes englobantes et les confiances
+    detections = result.boxes.data.cpu().numpy()
+    class_ids = detections[:, 5].astype(int)
+
+    names = get_model_yolo().names
+    return Detections.from_arrays(detections[:, :4], detections[:, 4], class_ids,
+                                  [names[class_id] for class_id in class_ids.tolist()])
+
+
+def detection_yolov11(frame: Any) -> Detections:
     """
     Perform object detection on a single frame using YOLO
 
@@ -12,15 +65,135 @@ def detection_yolov11(frame: Any) -> pd.DataFrame:
         frame (Any): The frame to perform object detection on.
 
     Returns:
-        pd.DataFrame: The DataFrame containing the detected objects.
+        Detections: The detected objects.
     """
-    results = model_yolo(frame, verbose=False)
+    with profiled_section('yolo'):
+        results = get_model_yolo()(frame, verbose=False)
 
-    # Récupérer les boîtes englobantes et les confiances
-    detections = results[0].boxes.data.cpu().numpy()
+    return results_to_detections(results[0])
+
+
+def detection_yolov11_batch(frames: List[Any], imgsz: int = 640) -> List[Detections]:
+    """
+    Perform object detection on several frames with a single YOLO call.
+
+    Args:
+        frames (List[Any]): The frames to perform object detection on.
+        imgsz (int): The inference size, fixed so that every frame of the batch has the same shape. Defaults to 640.
+
+    Returns:
+        List[Detections]: The detected objects of each frame.
+    """
+    if not frames:
+        return []
+    with profiled_section('yolo'):
+        results = get_model_yolo()(frames, imgsz=imgsz, verbose=False)
+    return [results_to_detections(result) for result in results]
+
+
+class YoloBatcher:
+    """
+    Batching front-end for YOLO shared by several videos or cameras.
+
+    The frames submitted from different threads are collected by a background thread and run through YOLO
+    as one batch, as soon as `max_batch_size` frames are waiting or `max_wait` seconds after the first one.
+    Each caller gets back the detections of its own frame.
+
+    process_sources uses it with batch_yolo=True, for the sources analysed at the same time. On CPU a batch is not
+    significantly faster than the same frames run one by one (see benchmarks/bench_yolo_batching.py).
+    """
+    def __init__(self, max_batch_size: int = 8, max_wait: float = 0.02, imgsz: int = 640):
+        """
+        Create the batcher. The background thread is started on the first submitted frame.
+
+        Args:
+            max_batch_size (int): Maximum number of frames in a batch. Defaults to 8.
+            max_wait (float): Maximum time (s) the first frame of a batch waits for other frames. Defaults to 0.02.
+            imgsz (int): The inference size of the batches. Defaults to 640.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.imgsz = imgsz
+        self.queue: queue.Queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.batch_sizes: List[int] = []
+
+    def submit(self, frame: Any) -> Future:
+        """
+        Submit a frame to the next batch.
+
+        Args:
+            frame (Any): The frame to perform object detection on.
+
+        Returns:
+            Future: A future resolved with the detected objects.
+        """
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='yolo-batcher', daemon=True)
+                self.thread.start()
+
+        future: Future = Future()
+        self.queue.put((frame, future))
+        return future
+
+    def detect(self, frame: Any) -> Detections:
+        """
+        Perform object detection on a frame, batched with the frames submitted at the same time.
+
+        Args:
+            frame (Any): The frame to perform object detection on.
+
+        Returns:
+            Detections: The detected objects.
+        """
+        return self.submit(frame).result()
+
+    def close(self) -> None:
+        """
+        Process the frames already submitted and stop the background thread.
+        """
+        with self.lock:
+            if self.thread is None:
+                return
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            batch: List[Tuple[Any, Future]] = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._infer(batch)
+
+    def _infer(self, batch: List[Tuple[Any, Future]]) -> None:
+        self.batch_sizes.append(len(batch))
+        try:
+            detections = detection_yolov11_batch([frame for frame, _ in batch], self.imgsz)
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
 
-    # Convertir les résultats en DataFrame
-    detections_df = pd.DataFrame(detections, columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class'])
-    detections_df['name'] = detections_df['class'].apply(lambda x: model_yolo.names[int(x)])
+        for (_, future), frame_detections in zip(batch, detections):
+            future.set_result(frame_detections)
 
-    return detections_df
\ No newline at end of file
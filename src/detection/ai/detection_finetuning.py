@@ -1,20 +1,29 @@
-from typing import Any
-import pandas as pd
+from typing import Any, List
+import numpy as np
 import os
 import sys
-from inference import get_model
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.config.config_loader import load_config, get_ai_model_detection
+from src.config.config_loader import load_config, get_ai_model_config
+from src.detection.ai.backends import load_backend
+from src.detection.utils.detections import Detections
+from src.detection.utils.registry import registry
+
+def load_model_detection() -> Any:
+    """
+    Load the fine-tuned detection model with the backend selected in the configuration (Roboflow by default).
+
+    Returns:
+        Any: The model backend.
+    """
+    config = load_config()
+    return load_backend(get_ai_model_config(config, 'ai-detection'), 'detect')
 
-config = load_config()
-roboflow_api_key, model_id = get_ai_model_detection(config)
-if not os.environ.get('ROBOFLOW_API_KEY'):
-    os.environ['ROBOFLOW_API_KEY'] = roboflow_api_key
-model_detection = get_model(model_id=model_id)
 
-def detection_yolov11_fine_tuning(frame: Any) -> pd.DataFrame:
+registry.register('detection_finetuning', load_model_detection)
+
+def detection_yolov11_fine_tuning(frame: Any) -> Detections:
     """
     Perform object detection on a single frame using YOLOv1.1.
 
@@ -22,24 +31,43 @@ def detection_yolov11_fine_tuning(frame: Any) -> pd.DataFrame:
         frame (Any): The frame to perform object detection on.
 
     Returns:
-        pd.DataFrame: The DataFrame containing the detected objects.
+        Detections: The detected objects.
     """
-    results = model_detection.infer(frame)[0]
+    results = registry.get('detection_finetuning').infer(frame)[0]
+    return predictions_to_detections(results.predictions)
 
-    # Convert predictions into DataFrame
-    detections_list = []
-    for prediction in results.predictions:
-        x1 = prediction.x - prediction.width / 2
-        y1 = prediction.y - prediction.height / 2
-        x2 = prediction.x + prediction.width / 2
-        y2 = prediction.y + prediction.height / 2
-        confidence = prediction.confidence
-        class_id = prediction.class_id
-        class_name = prediction.class_name
 
-        detections_list.append([x1, y1, x2, y2, confidence, class_id, class_name])
+def detection_yolov11_fine_tuning_batch(frames: List[Any]) -> List[Detections]:
+    """
+    Perform object detection on several frames with a single call of the fine-tuned model.
 
-    detections_df = pd.DataFrame(detections_list,
-                                 columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name'])
+    Args:
+        frames (List[Any]): The frames to perform object detection on.
+
+    Returns:
+        List[Detections]: The detected objects of each frame.
+    """
+    if not frames:
+        return []
+    results = registry.get('detection_finetuning').infer(list(frames))
+    return [predictions_to_detections(result.predictions) for result in results]
+
+
+def predictions_to_detections(predictions: List[Any]) -> Detections:
+    """
+    Convert the predictions of the fine-tuned model on one image into Detections.
+
+    Args:
+        predictions (List[Any]): The predictions, with the attributes of the Roboflow predictions.
+
+    Returns:
+        Detections: The detected objects.
+    """
+    # Convert the centers and sizes of the predictions into boxes
+    centers = np.array([(prediction.x, prediction.y, prediction.width, prediction.height)
+                        for prediction in predictions], dtype=np.float64).reshape(-1, 4)
+    boxes = np.concatenate([centers[:, :2] - centers[:, 2:] / 2, centers[:, :2] + centers[:, 2:] / 2], axis=1)
 
-    return detections_df
\ No newline at end of file
+    return Detections.from_arrays(boxes, [prediction.confidence for prediction in predictions],
+                                  [prediction.class_id for prediction in predictions],
+                                  [prediction.class_name for prediction in predictions])
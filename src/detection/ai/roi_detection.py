@@ -0,0 +1,185 @@
+import math
+import os
+import sys
+import cv2
+import numpy as np
+from typing import Any, Callable, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.detection.ai.detection import detection_yolov11, detection_yolov11_batch
+from src.detection.ai.detection_finetuning import detection_yolov11_fine_tuning, detection_yolov11_fine_tuning_batch
+from src.detection.utils.detections import Detections
+
+# Margin (pixels) added around each candidate so the whole object is inside its crop
+ROI_PADDING = 48
+
+# Above this fraction of the frame covered by the crops, the full frame is analysed instead
+MAX_ROI_AREA_RATIO = 0.5
+
+
+def merge_regions(boxes: np.ndarray, frame_shape: Tuple[int, int], padding: int = ROI_PADDING) -> np.ndarray:
+    """
+    Pad the candidate boxes and merge the overlapping ones into disjoint regions.
+
+    Args:
+        boxes (np.ndarray): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        frame_shape (Tuple[int, int]): The (height, width) of the frame.
+        padding (int): Margin added around each box. Defaults to ROI_PADDING.
+
+    Returns:
+        np.ndarray: Array of shape (M, 4) of integer regions inside the frame, M <= N.
+    """
+    height, width = frame_shape
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    regions = [[max(0, int(x1) - padding), max(0, int(y1) - padding),
+                min(width, math.ceil(x2) + padding), min(height, math.ceil(y2) + padding)]
+               for x1, y1, x2, y2 in boxes]
+
+    # Sweep over the regions sorted by xmin, each region is only compared with the regions still open along x.
+    # A merged region can grow over a region already closed, so the sweep is repeated until nothing merges.
+    merged = True
+    while merged:
+        merged = False
+        regions.sort(key=lambda region: region[0])
+        swept, open_regions = [], []
+        for region in regions:
+            open_regions = [other for other in open_regions if other[2] > region[0]]
+            while True:
+                overlapping = [other for other in open_regions if other[1] < region[3] and region[1] < other[3]]
+                if not overlapping:
+                    break
+                for other in overlapping:
+                    region = [min(region[0], other[0]), min(region[1], other[1]),
+                              max(region[2], other[2]), max(region[3], other[3])]
+                open_regions = [other for other in open_regions if all(other is not o for o in overlapping)]
+                swept = [other for other in swept if all(other is not o for o in overlapping)]
+                merged = True
+            swept.append(region)
+            open_regions.append(region)
+        regions = swept
+
+    return np.array(regions, dtype=np.int64).reshape(-1, 4)
+
+
+def deduplicate_detections(detections: Detections, iou_threshold: float = 0.5) -> Detections:
+    """
+    Remove the detections of the same object found in several overlapping crops (non-maximum suppression
+    per class).
+
+    Args:
+        detections (Detections): The detections.
+        iou_threshold (float): Minimum IoU of two detections of the same object. Defaults to 0.5.
+
+    Returns:
+        Detections: The detections without the duplicates.
+    """
+    if len(detections) < 2:
+        return detections
+
+    boxes = detections.boxes
+    boxes_xywh = np.column_stack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+    keep = cv2.dnn.NMSBoxesBatched(boxes_xywh.tolist(), np.nan_to_num(detections.confidence).tolist(),
+                                   detections.data['name_id'].tolist(), 0.0, iou_threshold)
+    return detections[np.sort(np.asarray(keep, dtype=np.int64).reshape(-1))]
+
+
+def detection_roi(frame: np.ndarray, candidates: Any, detect_crops: Callable[[List[np.ndarray]], List[Detections]],
+                  detect_frame: Callable[[np.ndarray], Detections], padding: int = ROI_PADDING,
+                  max_area_ratio: float = MAX_ROI_AREA_RATIO) -> Detections:
+    """
+    Perform object detection only on the regions around the candidates of the background subtraction.
+
+    The padded candidates are merged into disjoint regions, the crops are analysed by detect_crops (which
+    chooses their inference size), the boxes are mapped back to the frame and the duplicates are removed. When
+    the crops cover more than `max_area_ratio` of the frame, the full frame is analysed instead.
+
+    Args:
+        frame (np.ndarray): The frame to perform object detection on.
+        candidates (Any): The candidates of the background subtraction, as Detections or as a DataFrame.
+        detect_crops (Callable[[List[np.ndarray]], List[Detections]]): Detection on a list of crops.
+        detect_frame (Callable[[np.ndarray], Detections]): Detection on the full frame.
+        padding (int): Margin added around each candidate. Defaults to ROI_PADDING.
+        max_area_ratio (float): Maximum fraction of the frame covered by the crops. Defaults to MAX_ROI_AREA_RATIO.
+
+    Returns:
+        Detections: The detected objects, in the coordinates of the frame.
+    """
+    candidates = Detections.coerce(candidates)
+    if candidates.empty:
+        return Detections()
+
+    height, width = frame.shape[:2]
+    regions = merge_regions(candidates.boxes, (height, width), padding)
+    areas = (regions[:, 2] - regions[:, 0]) * (regions[:, 3] - regions[:, 1])
+    if areas.sum() > max_area_ratio * height * width:
+        return detect_frame(frame)
+
+    crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+    detections = [Detections.coerce(crop_detections).translate(x1, y1)
+                  for (x1, y1, _, _), crop_detections in zip(regions, detect_crops(crops))]
+    return deduplicate_detections(Detections.concat(detections))
+
+
+def roi_imgsz(crop: np.ndarray, max_imgsz: int = 640) -> int:
+    """
+    Return the smallest inference size (multiple of 32) keeping a crop at its native resolution.
+
+    Args:
+        crop (np.ndarray): The crop.
+        max_imgsz (int): The inference size of the full frame. Defaults to 640.
+
+    Returns:
+        int: The inference size of the crop.
+    """
+    return min(max_imgsz, max(64, math.ceil(max(crop.shape[:2]) / 32) * 32))
+
+
+def detection_yolov11_crops(crops: List[np.ndarray]) -> List[Detections]:
+    """
+    Perform object detection with YOLO on crops of different sizes, one batch per inference size (see roi_imgsz),
+    so that each crop is analysed at its native resolution instead of being upscaled to the size of the largest.
+
+    Args:
+        crops (List[np.ndarray]): The crops.
+
+    Returns:
+        List[Detections]: The detected objects of each crop.
+    """
+    sizes = [roi_imgsz(crop) for crop in crops]
+    detections: List[Optional[Detections]] = [None] * len(crops)
+    for imgsz in sorted(set(sizes)):
+        indices = [index for index, size in enumerate(sizes) if size == imgsz]
+        for index, crop_detections in zip(indices, detection_yolov11_batch([crops[i] for i in indices], imgsz)):
+            detections[index] = crop_detections
+    return detections
+
+
+def detection_yolov11_roi(frame: np.ndarray, candidates: Detections) -> Detections:
+    """
+    Perform object detection with YOLO on the crops around the candidates, at their native resolution, with one
+    batch per inference size.
+
+    Args:
+        frame (np.ndarray): The frame to perform object detection on.
+        candidates (Detections): The candidates of the background subtraction.
+
+    Returns:
+        Detections: The detected objects.
+    """
+    return detection_roi(frame, candidates, detection_yolov11_crops, detection_yolov11)
+
+
+def detection_yolov11_fine_tuning_roi(frame: np.ndarray, candidates: Detections) -> Detections:
+    """
+    Perform object detection with the fine-tuned model on the crops around the candidates, in a single call.
+    The backend resizes each crop to the input size of the model.
+
+    Args:
+        frame (np.ndarray): The frame to perform object detection on.
+        candidates (Detections): The candidates of the background subtraction.
+
+    Returns:
+        Detections: The detected objects.
+    """
+    return detection_roi(frame, candidates, detection_yolov11_fine_tuning_batch, detection_yolov11_fine_tuning)
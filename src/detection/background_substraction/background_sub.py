@@ -2,12 +2,14 @@ import os
 import sys
 import cv2
 import numpy as np
-import pandas as pd
+from typing import Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from src.detection.light.equalization.light_fast import enhance_brightness
-from src.detection.windows.manual.windows import define_occlusion_parallelograms
+from src.detection.utils.detections import Detections
+from src.detection.utils.frame_context import FrameContext
+from src.detection.utils.registry import registry
+from src.detection.windows.manual.windows import define_occlusion_parallelograms, get_exclusion_mask
 
 project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
 
@@ -17,11 +19,14 @@ frame_ref_cam5_path = os.path.join(project_dir, "images/frame_ref_cam5_lightV2.j
 frame_ref_cam7_path = os.path.join(project_dir, "images/frame_ref_cam7_lightV2.jpg")
 frame_ref_cam8_path = os.path.join(project_dir, "images/frame_ref_cam8_lightV2.jpg")
 
-# Load reference frames using the absolute paths
-frame_ref_cam4 = cv2.imread(frame_ref_cam4_path)
-frame_ref_cam5 = cv2.imread(frame_ref_cam5_path)
-frame_ref_cam7 = cv2.imread(frame_ref_cam7_path)
-frame_ref_cam8 = cv2.imread(frame_ref_cam8_path)
+# Reference frames are loaded on first use
+registry.register('frame_ref_cam4', lambda: cv2.imread(frame_ref_cam4_path))
+registry.register('frame_ref_cam5', lambda: cv2.imread(frame_ref_cam5_path))
+registry.register('frame_ref_cam7', lambda: cv2.imread(frame_ref_cam7_path))
+registry.register('frame_ref_cam8', lambda: cv2.imread(frame_ref_cam8_path))
+
+# Kernel of the morphological closing applied to the thresholded differences
+MORPH_KERNEL = np.ones((5, 5), np.uint8)
 
 
 def match_frame_reference(camera: int) -> np.ndarray:
@@ -31,82 +36,101 @@ def match_frame_reference(camera: int) -> np.ndarray:
     Args:
         camera (int): The camera number.
 
+    Raises:
+        ValueError: If the camera has no reference frame.
+
     Returns:
         np.ndarray: The reference frame corresponding to the camera number.
     """
     match camera:
-        case 4:
-            frame_ref = frame_ref_cam4
-        case 5:
-            frame_ref = frame_ref_cam5
-        case 7:
-            frame_ref = frame_ref_cam7
-        case 8:
-            frame_ref = frame_ref_cam8
+        case 4 | 5 | 7 | 8:
+            frame_ref = registry.get(f"frame_ref_cam{camera}")
         case _:
-            print("Erreur : Camera non reconnue")
-            exit()
+            raise ValueError(f"Erreur : Camera {camera} non reconnue, seules les caméras 4, 5, 7 et 8 ont une "
+                             f"image de référence.")
     return frame_ref
 
 
+class CameraReference:
+    """
+    Data derived from the reference frame of a camera.
 
-def background_subtraction_on_edges(camera: int, frame_tested: np.ndarray) -> pd.DataFrame:
+    The reference frame never changes, so its grayscale, blurred and edge images as well as the exclusion
+    zones are computed once per camera instead of once per frame.
     """
-        Performs background subtraction to detect objects in a video frame using edge detection.
-        The function returns a DataFrame containing the detected objects with their bounding box coordinates.
+    def __init__(self, camera: int):
+        """
+        Compute the data of the reference frame of the camera.
 
         Args:
             camera (int): The camera number.
-            frame_tested (np.ndarray): The frame to be tested.
+        """
+        self.camera = camera
 
-        Returns:
-            pd.DataFrame: A DataFrame containing the detected objects with their bounding box coordinates.
-    """
-    detections_list = []
+        frame_ref = match_frame_reference(camera)
+        self.gray = cv2.cvtColor(frame_ref, cv2.COLOR_BGR2GRAY)
+        self.blurred = cv2.GaussianBlur(self.gray, (5, 5), 0)
+        self.edges = cv2.Canny(self.blurred, 250, 300) # (frame, minVal, maxVal)
 
-    # Select the reference frame corresponding to the camera number 
-    frame_ref = match_frame_reference(camera)
-        
-    # Luminosity treatment
-    frame_cur_light = enhance_brightness(frame_tested)
+        # Define the points of the parallelograms (exclusion zones) and their rasterized mask
+        self.parallelograms = [np.array(points, np.int32) for points in define_occlusion_parallelograms(camera)]
+        self.exclusion_mask = get_exclusion_mask(camera, *self.gray.shape)
 
-    # --- DEFINE RECTANGLES FOR EXCLUSION ZONES ---
 
-    coord = define_occlusion_parallelograms(camera)
+camera_references: dict[int, CameraReference] = {}
 
-    # Define the points of the parallelograms
-    parallelograms = []
 
-    for points in coord:
-        parallelogram = np.array(points, np.int32)
-        parallelograms.append(parallelogram)
+def get_camera_reference(camera: int) -> CameraReference:
+    """
+    Return the precomputed reference of a camera, building it on first use.
 
-    # Convert to grayscale
-    gray_ref = cv2.cvtColor(frame_ref, cv2.COLOR_BGR2GRAY)
-    gray_cur = cv2.cvtColor(frame_cur_light, cv2.COLOR_BGR2GRAY)
+    Args:
+        camera (int): The camera number.
+
+    Returns:
+        CameraReference: The reference data of the camera.
+    """
+    reference = camera_references.get(camera)
+    if reference is None:
+        reference = CameraReference(camera)
+        camera_references[camera] = reference
+    return reference
 
-    # Apply a blur to reduce noise
-    gray_ref = cv2.GaussianBlur(gray_ref, (5,5), 0)
-    gray_cur = cv2.GaussianBlur(gray_cur, (5,5), 0)
 
-    # Apply Canny edge detection
-    edges_ref = cv2.Canny(gray_ref, 250, 300) # (frame, minVal, maxVal)
-    edges_cur = cv2.Canny(gray_cur, 250, 300)
+def background_subtraction_on_edges(camera: int, frame_tested: np.ndarray,
+                                    context: Optional[FrameContext] = None) -> Detections:
+    """
+        Performs background subtraction to detect objects in a video frame using edge detection.
+        The function returns the detected objects with their bounding box coordinates.
+
+        Args:
+            camera (int): The camera number.
+            frame_tested (np.ndarray): The frame to be tested.
+            context (Optional[FrameContext]): The context of the frame, shared with the other stages
+                to reuse its derived images. Defaults to None (a new context is created).
+
+        Returns:
+            Detections: The detected objects with their bounding box coordinates.
+    """
+    # Select the precomputed reference corresponding to the camera number
+    reference = get_camera_reference(camera)
+
+    # Luminosity treatment, conversion to grayscale, blur and Canny edge detection (shared by the stages)
+    if context is None:
+        context = FrameContext(frame_tested)
 
     # Edge subtraction
-    diff = cv2.absdiff(edges_ref, edges_cur)
+    diff = cv2.absdiff(reference.edges, context.edges)
 
     # Threshold to detect significant differences
     _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
 
 
     # Remove window zones (set pixels in this region to zero)
-    for parallelogram in parallelograms:
-        cv2.fillPoly(thresh, [parallelogram], 0)
+    cv2.bitwise_and(thresh, reference.exclusion_mask, dst=thresh)
 
     # Apply morphological operations to reduce noise
-    kernel = np.ones((5, 5), np.uint8)
-    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, MORPH_KERNEL)
 
     # Detect contours of present objects
     contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -115,66 +139,47 @@ def background_subtraction_on_edges(camera: int, frame_tested: np.ndarray) -> pd
     min_size = 25  # (minimum size in pixels)
     filtered_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > min_size ** 2]
 
-    # Draw detected objects on the current image
-    output = frame_tested.copy()
-    for cnt in filtered_contours:
-        x, y, w, h = cv2.boundingRect(cnt)
-        detections_list.append([x, y, x + w, y + h, 0, None, None])
+    # Convert the contours into bounding boxes
+    boxes = np.array([cv2.boundingRect(cnt) for cnt in filtered_contours], dtype=np.float64).reshape(-1, 4)
+    boxes[:, 2:] += boxes[:, :2]
 
-    detections_df = pd.DataFrame(detections_list,
-                                     columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name'])
+    return Detections.from_arrays(boxes, confidence=np.zeros(len(boxes)))
 
-    return detections_df
 
-
-def background_subtraction(camera: int, frame_tested: np.ndarray) -> pd.DataFrame:
+def background_subtraction(camera: int, frame_tested: np.ndarray,
+                           context: Optional[FrameContext] = None) -> Detections:
     """
         Performs background subtraction to detect objects in a video frame.
-        The function returns a DataFrame containing the detected objects with their bounding box coordinates.
+        The function returns the detected objects with their bounding box coordinates.
 
         Args:
             camera (int): The camera number.
             frame_tested (np.ndarray): The frame to be tested.
+            context (Optional[FrameContext]): The context of the frame, shared with the other stages
+                to reuse its derived images. Defaults to None (a new context is created).
 
         Returns:
-            pd.DataFrame: A DataFrame containing the detected objects with their bounding box coordinates.
+            Detections: The detected objects with their bounding box coordinates.
     """
-    detections_list = []
-
-    # Select the reference frame corresponding to the camera number 
-    frame_ref = match_frame_reference(camera)
-     
-    # Luminosity treatment
-    frame_cur_light = enhance_brightness(frame_tested)
+    # Select the precomputed reference corresponding to the camera number
+    reference = get_camera_reference(camera)
 
-    # --- DEFINE RECTANGLES FOR EXCLUSION ZONES ---
-    coord = define_occlusion_parallelograms(camera)
+    # Luminosity treatment and conversion to grayscale (shared by the stages)
+    if context is None:
+        context = FrameContext(frame_tested)
 
-    # Define the points of the parallelograms
-    parallelograms = []
+    # Apply image subtraction
+    diff = cv2.absdiff(reference.gray, context.gray)
 
-    for points in coord:
-        parallelogram = np.array(points, np.int32)
-        parallelograms.append(parallelogram)
-
-        # Convert to grayscale for subtraction
-        gray_ref = cv2.cvtColor(frame_ref, cv2.COLOR_BGR2GRAY)
-        gray_cur = cv2.cvtColor(frame_cur_light, cv2.COLOR_BGR2GRAY)
-
-        # Apply image subtraction
-        diff = cv2.absdiff(gray_ref, gray_cur)
-
-        # Threshold to detect significant differences
-        _, thresh = cv2.threshold(diff, 120, 255, cv2.THRESH_BINARY)
+    # Threshold to detect significant differences
+    _, thresh = cv2.threshold(diff, 120, 255, cv2.THRESH_BINARY)
 
 
     # Remove window zones (set pixels in this region to zero)
-    for parallelogram in parallelograms:
-        cv2.fillPoly(thresh, [parallelogram], 0)
+    cv2.bitwise_and(thresh, reference.exclusion_mask, dst=thresh)
 
     # Apply morphological operations to reduce noise
-    kernel = np.ones((5, 5), np.uint8)
-    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, MORPH_KERNEL)
 
     # Detect contours of present objects
     contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -183,16 +188,8 @@ def background_subtraction(camera: int, frame_tested: np.ndarray) -> pd.DataFram
     min_size = 25  # (minimum size in pixels)
     filtered_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > min_size ** 2]
 
-    # Draw detected objects on the current image
-    output = frame_tested.copy()
-    for cnt in filtered_contours:
-        x, y, w, h = cv2.boundingRect(cnt)
-        detections_list.append([x, y, x + w, y + h, None, None, None])
-
-    detections_df = pd.DataFrame(detections_list,
-                                 columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name'])
-
-    return detections_df
-
-
+    # Convert the contours into bounding boxes
+    boxes = np.array([cv2.boundingRect(cnt) for cnt in filtered_contours], dtype=np.float64).reshape(-1, 4)
+    boxes[:, 2:] += boxes[:, :2]
 
+    return Detections.from_arrays(boxes)
@@ -13,13 +13,28 @@ from PIL import Image
 import time
 import cv2
 from src.detection.light.ai import model as light_model
+from src.detection.utils.profiling import profiled_section
+from src.detection.utils.registry import registry
 
 # Initialize the low-light enhancement model
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots', 'epoch99.pth')
-DCE_net = light_model.enhance_net_nopool().to(device)
-DCE_net.load_state_dict(torch.load(model_path, map_location=device))
-DCE_net.eval()
+
+
+def load_enhance_net() -> light_model.enhance_net_nopool:
+    """
+    Load the low-light enhancement model from its snapshot.
+
+    Returns:
+        light_model.enhance_net_nopool: The model, in evaluation mode.
+    """
+    DCE_net = light_model.enhance_net_nopool().to(device)
+    DCE_net.load_state_dict(torch.load(model_path, map_location=device))
+    DCE_net.eval()
+    return DCE_net
+
+
+registry.register('enhance_net', load_enhance_net)
 
 
 def enhance_image(frame):
@@ -47,8 +62,8 @@ def enhance_image(frame):
     data_lowlight = data_lowlight.permute(2, 0, 1)
     data_lowlight = data_lowlight.unsqueeze(0)  # Add batch dimension
 
-    with torch.no_grad():
-        _, enhanced_image, _ = DCE_net(data_lowlight)
+    with torch.no_grad(), profiled_section('enhance_net_nopool'):
+        _, enhanced_image, _ = registry.get('enhance_net')(data_lowlight)
 
     enhanced_image = enhanced_image.squeeze().permute(1, 2, 0).cpu().numpy()
     enhanced_image = (enhanced_image * 255).astype(np.uint8)
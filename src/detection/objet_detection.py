@@ -1,171 +1,540 @@
 import os
 import sys
+import threading
+import time
 import cv2
-import pandas as pd
-from typing import Any
-
-from pandas import DataFrame
+import numpy as np
+from collections import Counter
+from typing import Any, Callable, Iterable, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.detection.ai.detection import detection_yolov11
+from src.detection.ai.detection import YoloBatcher, detection_yolov11
 from src.detection.ai.detection_finetuning import detection_yolov11_fine_tuning
 from src.detection.ai.classification_finetuning import classification_fine_tuning
+from src.detection.ai.roi_detection import detection_yolov11_roi, detection_yolov11_fine_tuning_roi
 from src.detection.background_substraction.background_sub import background_subtraction, background_subtraction_on_edges
 from src.detection.windows.ai.windows_finetuning import detection_windows, filter_occluded_objects
-from src.detection.utils.utils import extract_camera_data, draw_detections, draw_classification
-
-def process_videos(folder_path: str, nb_of_img_skip_between_2: int=0) -> None:
+from src.detection.windows.window_cache import WindowCache
+from src.detection.utils.results_sink import open_results_sink, frame_to_record
+from src.detection.utils.results_store import capture_start, open_results_store
+from src.detection.utils.video_reader import PREFETCH_DEPTH
+from src.detection.utils.frame_source import FrameSource, VideoFileSource, open_frame_source
+from src.detection.utils.detections import Detections
+from src.detection.utils.frame_context import FrameContext
+from src.detection.utils.frame_dedup import FrameDeduplicator
+from src.detection.utils.live_view import live_views
+from src.detection.utils.motion_gate import MotionGate
+from src.detection.utils.metrics import metrics
+from src.detection.utils.profiling import FrameProfiler
+from src.detection.utils.registry import registry
+from src.detection.utils.mosaic import DisplayWindow, MosaicRenderer
+from src.detection.utils.stage_executor import Stage, StageExecutor
+from src.detection.utils.utils import extract_camera_data
+from src.detection.video_pool import iter_videos_in_pool
+
+# Models of the registry used by the stages of process_frame, whatever the options
+STAGE_RESOURCES = ('yolo', 'detection_finetuning', 'classification_finetuning', 'windows_finetuning')
+
+# Classes of the stock YOLO model detected on the tram itself
+UNWANTED_OBJECTS = ['couch', 'surfboard', 'train', 'bench', 'chair']
+
+# Thread pool running the stages of a frame when process_frame is called with parallel=True
+stage_executor = StageExecutor(max_workers=6)
+
+# Suggested number of frames between 2 detections of the windows of a camera, when the window cache is enabled
+WINDOW_REFRESH_INTERVAL = 25
+
+# Windows of each camera, detected again every window_refresh_interval frames or when the scene changes
+window_cache = WindowCache()
+
+# Results of the last analysed frame of each camera, reused for the nearly identical frames
+frame_deduplicator = FrameDeduplicator()
+
+# Stages skipped by the cascade when the candidates of the background subtraction do not change
+EXPENSIVE_STAGES = ('detections', 'fine_tuning', 'classification')
+
+# First stage of the cascade, remembers the candidates and the expensive results of each camera
+motion_gate = MotionGate()
+
+
+def process_videos(folder_path: str, nb_of_img_skip_between_2: int=0, results_dir: Optional[str] = None,
+                   workers: int = 1, threads_per_worker: Optional[int] = None, results_store: Optional[str] = None,
+                   **options: Any) -> list[dict[str, Any]]:
     """
     Process all video files in the specified folder.
 
     Args:
         folder_path (str): The path to the folder containing video files.
         nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+        results_dir (Optional[str]): Folder where a .jsonl results file is written for each video. Defaults to None.
+        workers (int): Number of processes analysing videos at the same time. With more than one worker the
+            videos are processed in a process pool, in headless mode. Defaults to 1 (one video after the other).
+        threads_per_worker (Optional[int]): Threads allowed to torch and OpenCV in each worker.
+            Defaults to None (cores divided by the number of workers).
+        results_store (Optional[str]): Path to the results store shared by the videos: a SQLite database (.sqlite,
+            .db) or the folder of a Parquet dataset partitioned by camera and date (see open_results_store).
+            Defaults to None.
+        **options (Any): Options forwarded to process_video (e.g. headless=True).
 
     Returns:
-        None
+        list[dict[str, Any]]: The statistics returned by process_video for each video.
+    """
+    videos = []
+    for video_path in list_videos(folder_path):
+        video_options = dict(options)
+        if results_dir is not None:
+            filename = os.path.basename(video_path)
+            video_options['results_path'] = os.path.join(results_dir, os.path.splitext(filename)[0] + '.jsonl')
+        videos.append((video_path, video_options))
+
+    if workers <= 1:
+        # A single store, and a single writer thread, for all the videos
+        store = open_results_store(results_store) if results_store is not None else None
+        if store is not None:
+            for _, video_options in videos:
+                video_options['results_store'] = store
+        try:
+            return [process_video(video_path, nb_of_img_skip_between_2, **video_options)
+                    for video_path, video_options in videos]
+        finally:
+            if store is not None:
+                store.close()
+
+    # No window can be opened from the worker processes, each worker writes its own batches to the store
+    for _, video_options in videos:
+        video_options['headless'] = True
+        if results_store is not None:
+            video_options['results_store'] = results_store
+
+    resources = stage_resources(extract_camera_data(video_path)[0] for video_path, _ in videos)
+    stats = []
+    for event in iter_videos_in_pool(videos, nb_of_img_skip_between_2, workers, threads_per_worker, resources):
+        match event['type']:
+            case 'progress':
+                if event['analysed'] % 100 == 0:
+                    print(f"{os.path.basename(event['video'])} : {event['analysed']} images analysées "
+                          f"({event['fps']:.2f} images/s)")
+            case 'result':
+                stats.append(event['stats'])
+            case 'error':
+                print(f"Erreur: Échec de l'analyse de la vidéo {event['video']} : {event['error']}")
+    return stats
+
+
+def stage_resources(cameras: Iterable[int]) -> list[str]:
     """
-    for filename in os.listdir(folder_path):
-        if not filename.endswith('.mp4'):
-            continue
-        video_path = os.path.join(folder_path, filename)
-        process_video(video_path, nb_of_img_skip_between_2)
+    Return the resources of the registry used by the analysis of the given cameras.
 
+    Args:
+        cameras (Iterable[int]): The cameras of the analysed videos.
 
-def process_video(video_path: str, nb_of_img_skip_between_2: int) -> None:
+    Returns:
+        list[str]: The models of the stages (STAGE_RESOURCES) and the reference frames of the cameras.
+    """
+    frame_refs = [f"frame_ref_cam{camera}" for camera in sorted(set(cameras))]
+    return list(STAGE_RESOURCES) + [name for name in frame_refs if name in registry.loaders]
+
+
+def list_videos(folder_path: str) -> list[str]:
+    """
+    List the video files of a folder.
+
+    Args:
+        folder_path (str): The path to the folder containing video files.
+
+    Returns:
+        list[str]: The paths to the .mp4 files of the folder.
+    """
+    return [os.path.join(folder_path, filename) for filename in os.listdir(folder_path) if filename.endswith('.mp4')]
+
+
+def process_video(video_path: str, nb_of_img_skip_between_2: int, skip_strategy: str = 'auto',
+                  prefetch_depth: int = PREFETCH_DEPTH, prefetch_overflow: str = 'block',
+                  **options: Any) -> dict[str, Any]:
     """
     Process a single video file for object detection.
-    Opens a window and displays the result.
 
     Args:
         video_path (str): The path to the video file.
         nb_of_img_skip_between_2 (int): Number of images to skip between 2 images.
+        skip_strategy (str): How the skipped images are handled: 'auto', 'read', 'grab' or 'seek'
+            (see read_sampled_frames). Defaults to 'auto'.
+        prefetch_depth (int): Number of frames decoded in advance by a background thread while the previous
+            frames are analysed (see PrefetchReader), 0 to decode in the analysis thread. Defaults to PREFETCH_DEPTH.
+        prefetch_overflow (str): What the decoder does when it is prefetch_depth frames ahead: 'block' waits for
+            the analysis, 'drop_oldest' drops the oldest decoded frame. Defaults to 'block'.
+        **options (Any): Options forwarded to process_source (e.g. headless=True).
 
     Raises:
         IOError: If the video file cannot be opened.
+        ValueError: If the skip strategy or the overflow policy is unknown.
 
     Returns:
-        None
-    """
-    print(f"Début de la vidéo {video_path}")
-
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise IOError(f"Erreur: Impossible d'ouvrir la vidéo {video_path}.")
-
-    window_name_1 = "Detections"
-    window_name_2 = "Fine-tuning and Classification"
-    window_name_3 = "Background subtraction"
-    window_name_4 = "Edge detection"
-    cv2.namedWindow(window_name_1, cv2.WINDOW_NORMAL)
-    cv2.namedWindow(window_name_2, cv2.WINDOW_NORMAL)
-    cv2.namedWindow(window_name_3, cv2.WINDOW_NORMAL)
-    cv2.namedWindow(window_name_4, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(window_name_1, 640, 360)
-    cv2.resizeWindow(window_name_2, 640, 360)
-    cv2.resizeWindow(window_name_3, 640, 360)
-    cv2.resizeWindow(window_name_4, 640, 360)
-    cv2.moveWindow(window_name_1, 0, 0)
-    cv2.moveWindow(window_name_2, 650, 0)
-    cv2.moveWindow(window_name_3, 0, 390)
-    cv2.moveWindow(window_name_4, 650, 390)
-
-    frame_count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print(f"Fin de la vidéo ou erreur de lecture.")
-            break
+        dict[str, Any]: Statistics of the run (see process_source).
+    """
+    source = VideoFileSource(video_path, nb_of_img_skip_between_2, skip_strategy, prefetch_depth, prefetch_overflow)
+    return process_source(source, **options)
 
-        # Skip some images
-        frame_count += 1
-        if frame_count % (nb_of_img_skip_between_2 + 1) != 0:
-            continue
 
-        # Image processing and results
-        camera_number, time_str = extract_camera_data(video_path)
-        (detections_df,
-         detections_df_finetuning,
-         classification_df_finetuning,
-         detections_df_subtraction,
-         detections_df_edgedetection) = process_frame(frame, camera_number)
+def process_sources(uris: list[str], nb_of_img_skip_between_2: int = 0, config: Optional[dict[str, Any]] = None,
+                    replay: bool = False, batch_yolo: bool = False, **options: Any) -> list[dict[str, Any]]:
+    """
+    Process several frame sources at the same time: video files, folders of images or live streams of cameras.
 
-        # Create copies of the frame for each window
-        frame_detections = frame.copy()
-        frame_finetuning = frame.copy()
-        frame_subtraction = frame.copy()
-        frame_edgedetection = frame.copy()
+    Each source is analysed by its own thread, in headless mode when there are several sources since only one
+    thread can show the window. A live stream is analysed until it ends or until the analysis is interrupted
+    (Ctrl+C or stop_event). The state kept between the frames (background subtraction, window cache, frame
+    deduplication, motion gate) is per camera, so the sources must be of different cameras.
 
-        # Show results in the first window
-        draw_detections(frame_detections, detections_df)
+    Args:
+        uris (list[str]): The paths or URLs of the sources (see open_frame_source).
+        nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+        config (Optional[dict[str, Any]]): The configuration, giving the camera of each stream. Defaults to None.
+        replay (bool): If True, the video files are played at the real-time rate. Defaults to False.
+        batch_yolo (bool): If True, the frames analysed at the same time by the sources go through YOLO as one
+            batch (see YoloBatcher), which can be faster on GPU. Defaults to False.
+        **options (Any): Options forwarded to process_source (e.g. results_store="results/").
+
+    Raises:
+        ValueError: If the camera of a stream is unknown, or if several sources are of the same camera.
 
-        # Show results in the second window
-        draw_detections(frame_finetuning, detections_df_finetuning)
-        draw_classification(frame_finetuning, classification_df_finetuning)
+    Returns:
+        list[dict[str, Any]]: The statistics returned by process_source for each source that did not fail.
+    """
+    sources = [open_frame_source(uri, config, replay, nb_of_img_skip_between_2=nb_of_img_skip_between_2)
+               for uri in uris]
+    cameras = Counter(source.camera for source in sources)
+    duplicates = sorted(camera for camera, count in cameras.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Erreur: Plusieurs sources de la caméra {', '.join(map(str, duplicates))}, "
+                         f"elles doivent être analysées l'une après l'autre.")
+    if len(sources) == 1:
+        return [process_source(sources[0], **options)]
+
+    stop_event = options.setdefault('stop_event', threading.Event())
+    options['headless'] = True
+    if batch_yolo:
+        options['yolo_batcher'] = YoloBatcher(max_batch_size=len(sources))
+    stats: list[Optional[dict[str, Any]]] = [None] * len(sources)
+
+    def analyse(index: int, source: FrameSource) -> None:
+        try:
+            stats[index] = process_source(source, **options)
+        except Exception as error:
+            print(f"Erreur: Échec de l'analyse de {source.name} : {error}")
+
+    threads = [threading.Thread(target=analyse, args=(index, source), name=f"source-cam{source.camera}")
+               for index, source in enumerate(sources)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        # Each source stops before its next frame
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        if batch_yolo:
+            options['yolo_batcher'].close()
+    return [source_stats for source_stats in stats if source_stats is not None]
+
+
+def process_source(source: FrameSource, headless: bool = False, results_path: Optional[str] = None,
+                   parallel_stages: bool = False,
+                   window_refresh_interval: int = 1, deduplicate_frames: bool = False,
+                   cascade_cameras: Optional[Iterable[int]] = None, roi: bool = False,
+                   mosaic_consumers: Optional[Iterable[Callable[[Any], Any]]] = None,
+                   progress_callback: Optional[Callable[[dict[str, Any]], None]] = None,
+                   stop_event: Optional[threading.Event] = None,
+                   results_store: Optional[Any] = None,
+                   yolo_batcher: Optional[YoloBatcher] = None) -> dict[str, Any]:
+    """
+    Process the frames of a source (video file, folder of images, live stream...) for object detection.
+    Opens a window and displays the results in a 2x2 mosaic, unless the headless mode is enabled. The mosaic is
+    also broadcast on the live view of the camera (see LiveBroadcaster) while a viewer is connected.
 
-        # Show results in the third window
-        draw_detections(frame_subtraction, detections_df_subtraction)
+    Args:
+        source (FrameSource): The source of the frames, not opened yet (see open_frame_source).
+        headless (bool): If True, no window is opened and nothing is drawn without mosaic consumers.
+            Defaults to False.
+        results_path (Optional[str]): Path to a .jsonl or .parquet file where the detections of each
+            analysed frame are written. Defaults to None (results are not saved).
+        parallel_stages (bool): If True, the independent stages of each frame run concurrently. Defaults to False.
+        window_refresh_interval (int): Number of frames between 2 detections of the windows, which are also
+            detected again when the scene changes (e.g. WINDOW_REFRESH_INTERVAL). Defaults to 1 (every frame,
+            the window cache is not used).
+        deduplicate_frames (bool): If True, the results of the last analysed frame are reused for the nearly
+            identical frames (see FrameDeduplicator). Defaults to False.
+        cascade_cameras (Optional[Iterable[int]]): Cameras analysed in cascade mode: the expensive stages only run
+            when the candidates of the background subtraction change (see MotionGate). Defaults to None (none).
+        roi (bool): If True, the detectors only analyse the regions around the candidates of the background
+            subtraction (see detection_roi). Defaults to False.
+        mosaic_consumers (Optional[Iterable[Callable[[Any], Any]]]): Consumers of the 2x2 mosaic of the results,
+            in addition to the window (see MosaicRenderer). Defaults to None.
+        progress_callback (Optional[Callable[[dict[str, Any]], None]]): Called after each analysed frame with
+            the video, the frame index and timestamp, the number of analysed frames, the frames/sec and the
+            latency. Defaults to None.
+        stop_event (Optional[threading.Event]): When set (e.g. by the cancellation of an analysis job), the
+            analysis stops before the next frame. Defaults to None.
+        results_store (Optional[Any]): Store where the detections and classification of each analysed frame are
+            written in batches, with their camera and capture time: an opened store shared with other videos, or
+            the path of a store opened for this source (see open_results_store). Defaults to None.
+        yolo_batcher (Optional[YoloBatcher]): Batcher shared with the other sources analysed at the same time,
+            through which YOLO runs on the frames (see process_frame). Defaults to None.
 
-        # Show results in the fourth window
-        draw_detections(frame_edgedetection, detections_df_edgedetection)
+    Raises:
+        IOError: If the source cannot be opened.
 
-        cv2.imshow(window_name_1, frame_detections)
-        cv2.imshow(window_name_2, frame_finetuning)
-        cv2.imshow(window_name_3, frame_subtraction)
-        cv2.imshow(window_name_4, frame_edgedetection)
+    Returns:
+        dict[str, Any]: Statistics of the run (number of frames read, analysed and dropped, duration, frames/sec,
+            percentiles of the latency from the decoding of a frame to its results, in seconds, and whether the
+            analysis was cancelled).
+    """
+    print(f"Début de la vidéo {source.name}")
+    source.open()
+
+    # The mosaic is only rendered while a window or another consumer (e.g. a live view) needs it
+    renderer = MosaicRenderer()
+    display = None
+    if not headless:
+        display = DisplayWindow()
+        renderer.attach(display)
+    for consumer in mosaic_consumers or ():
+        renderer.attach(consumer)
+    # The live view of the camera (/live/<camera>) is only active while someone watches it
+    renderer.attach(live_views.get(source.camera))
+
+    results_sink = open_results_sink(results_path) if results_path else None
+    store = open_results_store(results_store) if isinstance(results_store, str) else results_store
+    # Profile of a window of frames, requested through OBJDET_PROFILE_FRAMES or the configuration, even while running
+    profiler = FrameProfiler.from_settings(source.name)
+    camera_number, time_str = source.camera, source.time
+    start_of_capture = capture_start(source.name, time_str)
+    window_cache.reset(camera_number)
+    frame_deduplicator.reset(camera_number)
+    reused_before = frame_deduplicator.hits[camera_number]
+    cascade = camera_number in (cascade_cameras or ())
+    motion_gate.reset(camera_number)
+    skipped_before = motion_gate.skips[camera_number]
+
+    analysed_count = 0
+    cancelled = False
+    last_frame_index = -1
+    latencies = []
+    start_time = time.perf_counter()
+    try:
+        for frame_index, timestamp, frame, captured_at in metrics.timed_iterator('decode', camera_number,
+                                                                                  source.frames()):
+            if stop_event is not None and stop_event.is_set():
+                print(f"Analyse annulée.")
+                cancelled = True
+                break
+            last_frame_index = frame_index
+            profiler.frame_started()
+
+            # Read once per frame: a live view can become due during the analysis, the windows must be drawn on
+            # every rendered frame and only on them
+            consumers = renderer.active_consumers()
+
+            # Image processing and results
+            results = process_frame(frame, camera_number, draw_windows=bool(consumers), parallel=parallel_stages,
+                                    window_refresh_interval=window_refresh_interval,
+                                    deduplicate_frames=deduplicate_frames, cascade=cascade, roi=roi,
+                                    yolo_batcher=yolo_batcher)
+            analysed_count += 1
+            latency = time.perf_counter() - captured_at if captured_at is not None else None
+            if latency is not None:
+                latencies.append(latency)
+
+            if results_sink is not None or store is not None:
+                record = frame_to_record(source.name, camera_number, time_str, frame_index, results, timestamp,
+                                         start_of_capture)
+                if results_sink is not None:
+                    results_sink.write(record)
+                if store is not None:
+                    store.write(record)
+
+            if progress_callback is not None:
+                elapsed = time.perf_counter() - start_time
+                progress_callback({'video': source.name, 'frame': frame_index, 'timestamp': timestamp,
+                                   'analysed': analysed_count, 'fps': analysed_count / elapsed if elapsed > 0 else 0.0,
+                                   'latency': latency})
+
+            if consumers:
+                with metrics.timer('drawing', camera_number):
+                    renderer.render(frame, results, consumers)
+            if display is not None and display.closed:
+                print(f"Arrêt forcé de la vidéo.")
+                break
+            profiler.frame_done()
+        else:
+            print(f"Fin de la vidéo ou erreur de lecture.")
+    finally:
+        profiler.close()
+        source.close()
+        if results_sink is not None:
+            results_sink.close()
+        if isinstance(results_store, str):
+            store.close()
+        if not headless:
+            cv2.destroyAllWindows()
+
+    elapsed = time.perf_counter() - start_time
+    fps = analysed_count / elapsed if elapsed > 0 else 0.0
+    reused_count = frame_deduplicator.hits[camera_number] - reused_before
+    print(f"{analysed_count} images analysées sur {last_frame_index + 1} en {elapsed:.2f} s ({fps:.2f} images/s)")
+    if deduplicate_frames:
+        print(f"{reused_count} images quasi identiques à la précédente (résultats réutilisés)")
+    skipped_count = motion_gate.skips[camera_number] - skipped_before
+    if cascade:
+        print(f"Détecteurs coûteux évités sur {skipped_count} images (cascade)")
+    if source.dropped:
+        metrics.increment('frames_dropped', camera_number, source.dropped)
+        print(f"{source.dropped} images décodées abandonnées (analyse plus lente que la lecture)")
+    latency_p50, latency_p95, latency_max = np.percentile(latencies, [50, 95, 100]).tolist() if latencies \
+        else (None, None, None)
+    if source.live and latencies:
+        print(f"Latence de bout en bout : {latency_p50 * 1000:.0f} ms (médiane), {latency_p95 * 1000:.0f} ms (p95)")
+
+    return {'video': source.name, 'frames_read': last_frame_index + 1, 'frames_analysed': analysed_count,
+            'frames_dropped': source.dropped, 'frames_reused': reused_count, 'expensive_stages_skipped': skipped_count,
+            'elapsed': elapsed, 'fps': fps, 'latency_p50': latency_p50, 'latency_p95': latency_p95,
+            'latency_max': latency_max, 'cancelled': cancelled}
+
+
+def filter_unwanted_objects(detections: Any) -> Detections:
+    """
+    Remove the classes of the stock YOLO model that are parts of the tram (bad solution).
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            print(f"Arrêt forcé de la vidéo.")
-            break
+    Args:
+        detections (Any): The detections, as Detections or as a DataFrame.
 
-    cap.release()
-    cv2.destroyAllWindows()
+    Returns:
+        Detections: The detections without the unwanted objects.
+    """
+    detections = Detections.coerce(detections)
+    return detections.filter(~detections.isin(UNWANTED_OBJECTS))
 
 
-def process_frame(frame: Any, camera_number: int) -> tuple[DataFrame, DataFrame, list, DataFrame, DataFrame]:
+def process_frame(frame: Any, camera_number: int, draw_windows: bool = True, parallel: bool = False,
+                  window_refresh_interval: int = 1, deduplicate_frames: bool = False,
+                  cascade: bool = False, roi: bool = False, yolo_batcher: Optional[YoloBatcher] = None
+                  ) -> tuple[Detections, Detections, list, Detections, Detections]:
     """
     Process a single frame for object detection.
 
     Args:
         frame (Any): The frame to process.
         camera_number (int): The index of the camera.
+        draw_windows (bool): If True, the detected windows are drawn on the frame. Defaults to True.
+        parallel (bool): If True, the independent stages run concurrently on a thread pool.
+            The results are identical to the sequential run. Defaults to False.
+        window_refresh_interval (int): Number of frames of the camera between 2 detections of the windows,
+            which are reused from the window cache in between (see WindowCache). Defaults to 1 (every frame).
+        deduplicate_frames (bool): If True and the frame is nearly identical to the last analysed frame of the
+            camera, its results are reused instead of running the stages (see FrameDeduplicator).
+            Defaults to False.
+        cascade (bool): If True, the background subtraction runs first and the expensive stages (YOLO,
+            fine-tuned detection, classification) only run when its candidates changed since the last frame
+            of the camera on which they ran. Otherwise their results are reused (see MotionGate). Defaults to False.
+        roi (bool): If True, YOLO and the fine-tuned detection only analyse the padded regions around the
+            candidates of the background subtraction (see detection_roi). Defaults to False.
+        yolo_batcher (Optional[YoloBatcher]): If given, YOLO runs on the frame through the batcher, in one batch
+            with the frames of the other sources (not in ROI mode). Defaults to None.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the detection results after use of ai (yolo).
-        pd.DataFrame: A DataFrame containing the detection results after use of ai with fine tuning.
+        Detections: The detection results after use of ai (yolo).
+        Detections: The detection results after use of ai with fine tuning.
         list: A list containing the empty detection results.
-        pd.DataFrame: A DataFrame containing the detection results after background subtraction.
-        pd.DataFrame: A DataFrame containing the detection results after edge detection.
+        Detections: The detection results after background subtraction.
+        Detections: The detection results after edge detection.
     """
 
-    # Perform window detection
-    windows = detection_windows(frame)
-
-    # Perform object detection using YOLO
-    detections_df = detection_yolov11(frame)
-    detections_df = filter_occluded_objects(detections_df, windows)
-    detections_df = detections_df[~detections_df['name'].isin(['couch', 'surfboard', 'train', 'bench', 'chair'])] # Filter unwanted objects (bad solution)
-
-    # Perform object detection using YOLOv1.1 with fine-tuning
-    detections_df_fine_tuning = detection_yolov11_fine_tuning(frame)
-    detections_df_fine_tuning = filter_occluded_objects(detections_df_fine_tuning, windows)
-
-    # Perform classification using YOLOv1.1 with fine-tuning
-    classification_df_finetuning = classification_fine_tuning(frame)
-
-    # Perform background subtraction
-    detections_df_subtraction = background_subtraction(camera_number, frame)
-
-    # Perform background subtraction using edge detection
-    detections_df_edgedetection = background_subtraction_on_edges(camera_number, frame)
+    start_time = time.perf_counter()
+
+    # Images derived from the frame (enhanced, grayscale, edges...), computed once and shared by the stages
+    context = FrameContext(frame)
+
+    # Stages of the analysis, only the occlusion filters depend on the window detection
+    stages = {
+        # Perform window detection
+        'windows': Stage(lambda: detection_windows(frame) if window_refresh_interval <= 1
+                         else window_cache.get(camera_number, context, detection_windows, window_refresh_interval)),
+
+        # Perform object detection using YOLO
+        'detections': Stage(lambda: yolo_batcher.detect(frame) if yolo_batcher is not None
+                            else detection_yolov11(frame)),
+        'detections_filtered': Stage(lambda detections_df, windows:
+                                     filter_unwanted_objects(filter_occluded_objects(detections_df, windows)),
+                                     ('detections', 'windows')),
+
+        # Perform object detection using YOLOv1.1 with fine-tuning
+        'fine_tuning': Stage(lambda: detection_yolov11_fine_tuning(frame)),
+        'fine_tuning_filtered': Stage(filter_occluded_objects, ('fine_tuning', 'windows')),
+
+        # Perform classification using YOLOv1.1 with fine-tuning
+        'classification': Stage(lambda: classification_fine_tuning(frame)),
+
+        # Perform background subtraction
+        'subtraction': Stage(lambda: background_subtraction(camera_number, frame, context=context)),
+
+        # Perform background subtraction using edge detection
+        'edge_detection': Stage(lambda: background_subtraction_on_edges(camera_number, frame, context=context)),
+    }
+    if roi:
+        # The detectors only analyse the regions around the candidates of the background subtraction
+        stages = {'subtraction': stages.pop('subtraction'), **stages}
+        stages['detections'] = Stage(lambda candidates: detection_yolov11_roi(frame, candidates),
+                                     ('subtraction',))
+        stages['fine_tuning'] = Stage(lambda candidates: detection_yolov11_fine_tuning_roi(frame, candidates),
+                                      ('subtraction',))
+
+    results = frame_deduplicator.lookup(camera_number, context) if deduplicate_frames else None
+    if results is not None:
+        metrics.increment('frames_reused', camera_number)
+    else:
+        previous_results = None
+        reused_stages = ()
+        if cascade:
+            # Stage one of the cascade: the cheap candidates decide whether the expensive stages run
+            with metrics.timer('subtraction', camera_number):
+                candidates = background_subtraction(camera_number, frame, context=context)
+            stages['subtraction'] = Stage(lambda: candidates)
+            reused_stages = ('subtraction',)
+            previous_results = motion_gate.previous_results(camera_number, candidates)
+            if previous_results is not None:
+                metrics.increment('expensive_stages_skipped', camera_number)
+                reused_stages += EXPENSIVE_STAGES
+                for name in EXPENSIVE_STAGES:
+                    stages[name] = Stage(lambda name=name: previous_results[name])
+
+        if metrics.enabled:
+            # Latency of each stage that actually runs
+            stages = {name: stage if name in reused_stages else
+                      Stage(metrics.timed(name, camera_number, stage.function), stage.dependencies)
+                      for name, stage in stages.items()}
+
+        results = stage_executor.run(stages, parallel=parallel)
+        if 'enhanced' in context.timings:
+            metrics.observe('enhancement', camera_number, context.timings['enhanced'])
+        if cascade and previous_results is None:
+            motion_gate.store(camera_number, candidates, {name: results[name] for name in EXPENSIVE_STAGES})
+        if deduplicate_frames:
+            frame_deduplicator.store(camera_number, context, results)
 
     # Dessiner sur la frame le résultat de la détection des fenêtres
-    for polygon in windows:
-        points = [(int(point[0]), int(point[1])) for point in polygon.exterior.coords]
-        for i in range(len(points)):
-            cv2.line(frame, points[i], points[(i + 1) % len(points)], (255, 0, 0), 2)
-
-    return (detections_df, detections_df_fine_tuning,
-            classification_df_finetuning, detections_df_subtraction,
-            detections_df_edgedetection)
+    if draw_windows:
+        for polygon in results['windows']:
+            points = [(int(point[0]), int(point[1])) for point in polygon.exterior.coords]
+            for i in range(len(points)):
+                cv2.line(frame, points[i], points[(i + 1) % len(points)], (255, 0, 0), 2)
+
+    metrics.observe('frame', camera_number, time.perf_counter() - start_time)
+    metrics.increment('frames', camera_number)
+
+    return (results['detections_filtered'], results['fine_tuning_filtered'],
+            results['classification'], results['subtraction'],
+            results['edge_detection'])
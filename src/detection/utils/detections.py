@@ -0,0 +1,279 @@
+import math
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Columns of the DataFrames of detections, kept by to_dataframe for compatibility
+DETECTION_COLUMNS = ['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name']
+
+# One detection: box (xmin, ymin, xmax, ymax), confidence (NaN if unknown), class id and name id (-1 if unknown)
+DETECTION_DTYPE = np.dtype([('box', np.float64, (4,)), ('confidence', np.float64),
+                            ('class_id', np.int32), ('name_id', np.int32)])
+
+# Names of the classes, interned once for the whole process: the detections only store their index
+_names: List[str] = []
+_name_ids: Dict[str, int] = {}
+_names_lock = threading.Lock()
+
+
+def intern_names(names: Iterable[Optional[str]]) -> np.ndarray:
+    """
+    Return the ids of class names, registering the new names.
+
+    Args:
+        names (Iterable[Optional[str]]): The names (None for an unknown name).
+
+    Returns:
+        np.ndarray: The id of each name (-1 for None).
+    """
+    ids = []
+    for name in names:
+        if name is None or (isinstance(name, float) and math.isnan(name)):
+            ids.append(-1)
+            continue
+        name_id = _name_ids.get(name)
+        if name_id is None:
+            with _names_lock:
+                name_id = _name_ids.setdefault(name, len(_names))
+                if name_id == len(_names):
+                    _names.append(name)
+        ids.append(name_id)
+    return np.array(ids, dtype=np.int32)
+
+
+def box_iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute the intersection over union of every pair of boxes.
+
+    Args:
+        boxes_a (np.ndarray): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        boxes_b (np.ndarray): Array of shape (M, 4) containing xmin, ymin, xmax, ymax.
+
+    Returns:
+        np.ndarray: Array of shape (N, M) of the IoU of each pair.
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    top_left = np.maximum(boxes_a[:, np.newaxis, :2], boxes_b[np.newaxis, :, :2])
+    bottom_right = np.minimum(boxes_a[:, np.newaxis, 2:], boxes_b[np.newaxis, :, 2:])
+    intersections = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    areas_a = (boxes_a[:, 2:] - boxes_a[:, :2]).clip(0).prod(axis=1)
+    areas_b = (boxes_b[:, 2:] - boxes_b[:, :2]).clip(0).prod(axis=1)
+    unions = areas_a[:, np.newaxis] + areas_b[np.newaxis, :] - intersections
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(unions > 0, intersections / unions, 0.0)
+
+
+class Detections:
+    """
+    Detections of a frame stored in a single NumPy structured array (see DETECTION_DTYPE).
+
+    Filtering, concatenation and IoU are vectorized and the class names are interned, so the detectors do not
+    build a DataFrame per frame. `to_dataframe` gives the former DataFrame with the columns DETECTION_COLUMNS.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        """
+        Wrap a structured array of detections.
+
+        Args:
+            data (Optional[np.ndarray]): Array of dtype DETECTION_DTYPE. Defaults to None (no detection).
+        """
+        self.data = np.zeros(0, DETECTION_DTYPE) if data is None else data
+
+    @classmethod
+    def from_arrays(cls, boxes: Any, confidence: Optional[Any] = None, class_ids: Optional[Any] = None,
+                    names: Optional[Sequence[Optional[str]]] = None) -> 'Detections':
+        """
+        Build the detections from arrays.
+
+        Args:
+            boxes (Any): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+            confidence (Optional[Any]): The N confidences. Defaults to None (unknown).
+            class_ids (Optional[Any]): The N class ids. Defaults to None (unknown).
+            names (Optional[Sequence[Optional[str]]]): The N class names. Defaults to None (unknown).
+
+        Returns:
+            Detections: The detections.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        data = np.empty(len(boxes), DETECTION_DTYPE)
+        data['box'] = boxes
+        data['confidence'] = np.nan if confidence is None else confidence
+        data['class_id'] = -1 if class_ids is None else class_ids
+        data['name_id'] = -1 if names is None else intern_names(names)
+        return cls(data)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'Detections':
+        """
+        Build the detections from a DataFrame with the columns DETECTION_COLUMNS ('confidence', 'class' and
+        'name' are optional).
+
+        Args:
+            df (pd.DataFrame): The DataFrame containing the detections.
+
+        Returns:
+            Detections: The detections.
+        """
+        confidence = pd.to_numeric(df['confidence'], errors='coerce').to_numpy(np.float64) \
+            if 'confidence' in df else None
+        class_ids = pd.to_numeric(df['class'], errors='coerce').fillna(-1).to_numpy(np.int32) if 'class' in df else None
+        names = df['name'].tolist() if 'name' in df else None
+        return cls.from_arrays(df[['xmin', 'ymin', 'xmax', 'ymax']].to_numpy(np.float64), confidence, class_ids, names)
+
+    @classmethod
+    def coerce(cls, detections: Any) -> 'Detections':
+        """
+        Return Detections from Detections or from a DataFrame of detections.
+
+        Args:
+            detections (Any): The detections, as Detections or as a DataFrame.
+
+        Returns:
+            Detections: The detections.
+        """
+        if isinstance(detections, Detections):
+            return detections
+        return cls.from_dataframe(detections)
+
+    @classmethod
+    def concat(cls, items: Iterable['Detections']) -> 'Detections':
+        """
+        Concatenate detections.
+
+        Args:
+            items (Iterable[Detections]): The detections to concatenate.
+
+        Returns:
+            Detections: The concatenated detections.
+        """
+        arrays = [item.data for item in items]
+        return cls(np.concatenate(arrays)) if arrays else cls()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, key: Any) -> 'Detections':
+        """
+        Select detections with a boolean mask, indices or a slice.
+        """
+        return Detections(np.atleast_1d(self.data[key]))
+
+    def __repr__(self) -> str:
+        return f"Detections({len(self)} detections)"
+
+    @property
+    def empty(self) -> bool:
+        """
+        bool: True if there is no detection.
+        """
+        return len(self.data) == 0
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """
+        np.ndarray: Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        """
+        return self.data['box']
+
+    @property
+    def confidence(self) -> np.ndarray:
+        """
+        np.ndarray: The confidences (NaN if unknown).
+        """
+        return self.data['confidence']
+
+    @property
+    def class_ids(self) -> np.ndarray:
+        """
+        np.ndarray: The class ids (-1 if unknown).
+        """
+        return self.data['class_id']
+
+    @property
+    def names(self) -> List[Optional[str]]:
+        """
+        List[Optional[str]]: The class names (None if unknown).
+        """
+        return [_names[name_id] if name_id >= 0 else None for name_id in self.data['name_id'].tolist()]
+
+    def filter(self, mask: np.ndarray) -> 'Detections':
+        """
+        Keep the detections where the mask is True.
+
+        Args:
+            mask (np.ndarray): Boolean array of shape (N,).
+
+        Returns:
+            Detections: The kept detections.
+        """
+        return Detections(self.data[mask])
+
+    def isin(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Tell which detections have one of the class names.
+
+        Args:
+            names (Iterable[str]): The class names.
+
+        Returns:
+            np.ndarray: Boolean array of shape (N,).
+        """
+        return np.isin(self.data['name_id'], intern_names(names))
+
+    def translate(self, dx: float, dy: float) -> 'Detections':
+        """
+        Move the boxes, e.g. from the coordinates of a crop to those of the frame.
+
+        Args:
+            dx (float): Horizontal offset.
+            dy (float): Vertical offset.
+
+        Returns:
+            Detections: The moved detections.
+        """
+        data = self.data.copy()
+        data['box'] += (dx, dy, dx, dy)
+        return Detections(data)
+
+    def iou(self, other: 'Detections') -> np.ndarray:
+        """
+        Compute the IoU between these detections and other detections.
+
+        Args:
+            other (Detections): The other detections.
+
+        Returns:
+            np.ndarray: Array of shape (N, M) of the IoU of each pair.
+        """
+        return box_iou_matrix(self.boxes, other.boxes)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Convert the detections into serializable dictionaries with the keys DETECTION_COLUMNS.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per detection (None for the unknown values).
+        """
+        return [{'xmin': box[0], 'ymin': box[1], 'xmax': box[2], 'ymax': box[3],
+                 'confidence': None if math.isnan(confidence) else confidence,
+                 'class': None if class_id < 0 else class_id, 'name': name}
+                for box, confidence, class_id, name in zip(self.boxes.tolist(), self.confidence.tolist(),
+                                                           self.class_ids.tolist(), self.names)]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Convert the detections into a DataFrame with the columns DETECTION_COLUMNS.
+
+        Returns:
+            pd.DataFrame: The DataFrame containing the detections.
+        """
+        boxes = self.boxes
+        return pd.DataFrame({'xmin': boxes[:, 0], 'ymin': boxes[:, 1], 'xmax': boxes[:, 2], 'ymax': boxes[:, 3],
+                             'confidence': self.confidence, 'class': self.class_ids, 'name': self.names},
+                            columns=DETECTION_COLUMNS)
@@ -0,0 +1,102 @@
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, Callable, Tuple
+
+from src.detection.light.equalization.light_fast import enhance_brightness
+
+
+class FrameContext:
+    """
+    Lazily computed images derived from a frame.
+
+    Each derived image is computed on first access and memoized, so every transform runs at most once per
+    frame whatever the number of stages reading it. The context can be shared between threads: each derived
+    image has its own lock, so different images are computed concurrently while the threads reading the same
+    image wait for its single computation. The computation time of each derived image is kept in `timings`
+    (including the images it is derived from).
+    """
+    def __init__(self, frame: np.ndarray):
+        """
+        Create the context of a frame.
+
+        Args:
+            frame (np.ndarray): The frame in BGR format. It must not be modified while the context is used.
+        """
+        self.frame = frame
+        self._cache: dict[Any, np.ndarray] = {}
+        self.timings: dict[Any, float] = {}
+        self._locks: dict[Any, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _memoize(self, key: Any, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Return the cached image for the key, computing it on first access.
+
+        Args:
+            key (Any): The key of the derived image.
+            compute (Callable[[], np.ndarray]): The function computing the image.
+
+        Returns:
+            np.ndarray: The derived image.
+        """
+        image = self._cache.get(key)
+        if image is not None:
+            return image
+
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            image = self._cache.get(key)
+            if image is None:
+                start = time.perf_counter()
+                image = compute()
+                self.timings[key] = time.perf_counter() - start
+                self._cache[key] = image
+            return image
+
+    @property
+    def enhanced(self) -> np.ndarray:
+        """
+        np.ndarray: The frame after histogram equalization of its luminance (see enhance_brightness).
+        """
+        return self._memoize('enhanced', lambda: enhance_brightness(self.frame))
+
+    @property
+    def gray(self) -> np.ndarray:
+        """
+        np.ndarray: The enhanced frame in grayscale.
+        """
+        return self._memoize('gray', lambda: cv2.cvtColor(self.enhanced, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def blurred(self) -> np.ndarray:
+        """
+        np.ndarray: The grayscale frame after a 5x5 Gaussian blur.
+        """
+        return self._memoize('blurred', lambda: cv2.GaussianBlur(self.gray, (5, 5), 0))
+
+    @property
+    def edges(self) -> np.ndarray:
+        """
+        np.ndarray: The Canny edges (250, 300) of the blurred frame.
+        """
+        return self._memoize('edges', lambda: cv2.Canny(self.blurred, 250, 300))
+
+    def downscaled(self, size: Tuple[int, int], gray: bool = False) -> np.ndarray:
+        """
+        Return a downscaled copy of the frame.
+
+        Args:
+            size (Tuple[int, int]): The (width, height) of the copy.
+            gray (bool): If True, the copy is in grayscale. Defaults to False.
+
+        Returns:
+            np.ndarray: The downscaled frame.
+        """
+        if gray:
+            return self._memoize(('downscaled_gray', size),
+                                 lambda: cv2.cvtColor(self.downscaled(size), cv2.COLOR_BGR2GRAY))
+        return self._memoize(('downscaled', size),
+                             lambda: cv2.resize(self.frame, size, interpolation=cv2.INTER_AREA))
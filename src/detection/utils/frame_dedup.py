@@ -0,0 +1,100 @@
+import threading
+import cv2
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from src.detection.utils.frame_context import FrameContext
+
+# Size (width, height) of the grayscale thumbnails compared between frames
+THUMBNAIL_SIZE = (64, 36)
+
+
+class FrameDeduplicator:
+    """
+    Reuse of the results of the last analysed frame of a camera for the frames that are nearly identical.
+
+    A frame is compared to the last fully analysed frame of the same camera (mean absolute difference of
+    grayscale thumbnails). Within the tolerance, the results of that frame are reused, at most `max_reuse`
+    times in a row, so a slow change of the scene is still analysed regularly.
+    """
+    def __init__(self, tolerance: float = 2.0, max_reuse: int = 25, thumbnail_size: Tuple[int, int] = THUMBNAIL_SIZE):
+        """
+        Create an empty deduplicator.
+
+        Args:
+            tolerance (float): Maximum mean absolute difference (gray levels) between the thumbnails of two
+                frames considered identical. Defaults to 2.0.
+            max_reuse (int): Maximum number of frames reusing the results of an analysed frame. Defaults to 25.
+            thumbnail_size (Tuple[int, int]): Size (width, height) of the thumbnails. Defaults to THUMBNAIL_SIZE.
+        """
+        self.tolerance = tolerance
+        self.max_reuse = max_reuse
+        self.thumbnail_size = thumbnail_size
+        self.last: Dict[int, Tuple[np.ndarray, Any, int]] = {}
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def lookup(self, camera: int, context: FrameContext) -> Optional[Any]:
+        """
+        Return the results of the last analysed frame of the camera if the frame is nearly identical to it.
+
+        Args:
+            camera (int): The index of the camera.
+            context (FrameContext): The context of the frame.
+
+        Returns:
+            Optional[Any]: The results to reuse, or None if the frame must be analysed.
+        """
+        thumbnail = context.downscaled(self.thumbnail_size, gray=True)
+        with self.lock:
+            last = self.last.get(camera)
+            if last is not None:
+                last_thumbnail, results, reuse_count = last
+                if (reuse_count < self.max_reuse and last_thumbnail.shape == thumbnail.shape
+                        and cv2.absdiff(thumbnail, last_thumbnail).mean() <= self.tolerance):
+                    self.last[camera] = (last_thumbnail, results, reuse_count + 1)
+                    self.hits[camera] += 1
+                    return results
+            self.misses[camera] += 1
+            return None
+
+    def store(self, camera: int, context: FrameContext, results: Any) -> None:
+        """
+        Record the results of an analysed frame of the camera.
+
+        Args:
+            camera (int): The index of the camera.
+            context (FrameContext): The context of the frame.
+            results (Any): The results of the frame.
+        """
+        thumbnail = context.downscaled(self.thumbnail_size, gray=True)
+        with self.lock:
+            self.last[camera] = (thumbnail, results, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the counters of reused (hits) and analysed (misses) frames.
+
+        Returns:
+            Dict[str, Any]: The total hits, misses and hit rate, and the hits and misses of each camera.
+        """
+        with self.lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                    'cameras': {camera: {'hits': self.hits[camera], 'misses': self.misses[camera]}
+                                for camera in sorted(set(self.hits) | set(self.misses))}}
+
+    def reset(self, camera: Optional[int] = None) -> None:
+        """
+        Forget the last analysed frame of a camera (the counters are kept).
+
+        Args:
+            camera (Optional[int]): The index of the camera. Defaults to None (every camera).
+        """
+        with self.lock:
+            if camera is None:
+                self.last.clear()
+            else:
+                self.last.pop(camera, None)
@@ -0,0 +1,323 @@
+import abc
+import os
+import time
+import cv2
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config.config_loader import get_streams
+from src.detection.utils.utils import extract_camera_data
+from src.detection.utils.video_reader import PREFETCH_DEPTH, PrefetchReader, SampledFrame
+
+# Extensions of the images read by ImageDirectorySource
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Prefixes of the URLs read by StreamSource
+STREAM_PREFIXES = ('rtsp://', 'rtsps://', 'http://', 'https://')
+
+
+class FrameSource(abc.ABC):
+    """
+    Source of the frames analysed by process_source: a video file, a folder of images, a live stream...
+
+    A source is opened with `open()` (or as a context manager), yields SampledFrame with `frames()` and is closed
+    with `close()`. Its camera number and time come from extract_camera_data, unless they are given (e.g. from
+    the configuration of a stream). A live source only yields the newest frame when the analysis is slower than
+    the camera, the stale frames are dropped and counted in `dropped`.
+    """
+    live = False
+
+    def __init__(self, name: str, camera: Optional[int] = None, time_str: Optional[str] = None):
+        """
+        Describe the source.
+
+        Args:
+            name (str): The path or URL of the source.
+            camera (Optional[int]): The camera number. Defaults to None (extracted from the name).
+            time_str (Optional[str]): The time of the first frame. Defaults to None (extracted from the name).
+        """
+        default_camera, default_time = extract_camera_data(name)
+        self.name = name
+        self.camera = default_camera if camera is None else camera
+        self.time = default_time if time_str is None else time_str
+
+    @property
+    def dropped(self) -> int:
+        """
+        int: Number of frames dropped because the analysis was too slow.
+        """
+        return 0
+
+    def open(self) -> None:
+        """
+        Open the source.
+
+        Raises:
+            IOError: If the source cannot be opened.
+        """
+
+    @abc.abstractmethod
+    def frames(self) -> Iterator[SampledFrame]:
+        """
+        Yield the frames to analyse.
+
+        Returns:
+            Iterator[SampledFrame]: The frames, with their index, timestamp and decoding time.
+        """
+
+    def close(self) -> None:
+        """
+        Release the source.
+        """
+
+    def __enter__(self) -> 'FrameSource':
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class VideoFileSource(FrameSource):
+    """
+    Frames of a video file, decoded in advance by a PrefetchReader.
+    """
+    kind = "la vidéo"
+
+    def __init__(self, path: str, nb_of_img_skip_between_2: int = 0, skip_strategy: str = 'auto',
+                 prefetch_depth: int = PREFETCH_DEPTH, prefetch_overflow: str = 'block',
+                 camera: Optional[int] = None, time_str: Optional[str] = None):
+        """
+        Describe the video.
+
+        Args:
+            path (str): The path to the video file.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            skip_strategy (str): How the skipped images are handled (see read_sampled_frames). Defaults to 'auto'.
+            prefetch_depth (int): Number of frames decoded in advance (see PrefetchReader). Defaults to PREFETCH_DEPTH.
+            prefetch_overflow (str): 'block' or 'drop_oldest' (see PrefetchReader). Defaults to 'block'.
+            camera (Optional[int]): The camera number. Defaults to None (extracted from the filename).
+            time_str (Optional[str]): The time of the video. Defaults to None (extracted from the filename).
+        """
+        super().__init__(path, camera, time_str)
+        self.nb_of_img_skip_between_2 = nb_of_img_skip_between_2
+        self.skip_strategy = skip_strategy
+        self.prefetch_depth = prefetch_depth
+        self.prefetch_overflow = prefetch_overflow
+        self.cap = None
+        self.reader: Optional[PrefetchReader] = None
+
+    @property
+    def dropped(self) -> int:
+        return self.reader.dropped if self.reader is not None else 0
+
+    def open(self) -> None:
+        self.cap = cv2.VideoCapture(self.name)
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise IOError(f"Erreur: Impossible d'ouvrir {self.kind} {self.name}.")
+        self.reader = PrefetchReader(self.capture(), self.nb_of_img_skip_between_2, self.skip_strategy,
+                                     self.prefetch_depth, self.prefetch_overflow)
+
+    def capture(self) -> Any:
+        """
+        Return the capture read by the PrefetchReader.
+        """
+        return self.cap
+
+    def frames(self) -> Iterator[SampledFrame]:
+        return iter(self.reader)
+
+    def close(self) -> None:
+        # The decoder thread must be stopped before the capture is released
+        if self.reader is not None:
+            self.reader.close()
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ReplaySource(VideoFileSource):
+    """
+    Video file played at the rate of a live camera, to measure the latency of the pipeline offline.
+
+    The frames become available at their timestamp (divided by `speed`), whether they are analysed or not. In
+    latency-bounded mode (the default), the analysis always takes the newest frame and the stale ones are dropped.
+    """
+    live = True
+
+    def __init__(self, path: str, nb_of_img_skip_between_2: int = 0, speed: float = 1.0, latest_only: bool = True,
+                 camera: Optional[int] = None, time_str: Optional[str] = None):
+        """
+        Describe the replay.
+
+        Args:
+            path (str): The path to the video file.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            speed (float): Playback speed, 1.0 for the real-time rate. Defaults to 1.0.
+            latest_only (bool): If True, only the newest frame waits for the analysis. Otherwise the frames are
+                queued (up to PREFETCH_DEPTH) and none is dropped. Defaults to True.
+            camera (Optional[int]): The camera number. Defaults to None (extracted from the filename).
+            time_str (Optional[str]): The time of the video. Defaults to None (extracted from the filename).
+        """
+        super().__init__(path, nb_of_img_skip_between_2, 'grab', *latest_only_prefetch(latest_only),
+                         camera=camera, time_str=time_str)
+        self.speed = speed
+
+    def capture(self) -> Any:
+        return PacedCapture(self.cap, self.speed)
+
+
+class StreamSource(VideoFileSource):
+    """
+    Live RTSP or HTTP stream of a camera.
+    """
+    live = True
+    kind = "le flux"
+
+    def __init__(self, url: str, camera: Optional[int] = None, nb_of_img_skip_between_2: int = 0,
+                 latest_only: bool = True, time_str: Optional[str] = None):
+        """
+        Describe the stream.
+
+        Args:
+            url (str): The URL of the stream.
+            camera (Optional[int]): The camera number. Defaults to None (extracted from the URL).
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            latest_only (bool): If True, only the newest frame waits for the analysis. Otherwise the frames are
+                queued (up to PREFETCH_DEPTH) and none is dropped. Defaults to True.
+            time_str (Optional[str]): The time of the first frame. Defaults to None (time of the opening).
+        """
+        super().__init__(url, nb_of_img_skip_between_2, 'grab', *latest_only_prefetch(latest_only),
+                         camera=camera, time_str=time_str)
+
+    def open(self) -> None:
+        super().open()
+        if self.time is None:
+            self.time = time.strftime('%Hh%Mm%Ss')
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Images of a folder, in the order of their filenames.
+    """
+    def __init__(self, folder_path: str, nb_of_img_skip_between_2: int = 0, fps: Optional[float] = None,
+                 camera: Optional[int] = None, time_str: Optional[str] = None):
+        """
+        Describe the folder.
+
+        Args:
+            folder_path (str): The path to the folder of images.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images. Defaults to 0.
+            fps (Optional[float]): Frame rate of the images, for their timestamps. Defaults to None (unknown).
+            camera (Optional[int]): The camera number. Defaults to None (extracted from the folder name).
+            time_str (Optional[str]): The time of the first image. Defaults to None (extracted from the folder name).
+        """
+        super().__init__(folder_path, camera, time_str)
+        self.nb_of_img_skip_between_2 = nb_of_img_skip_between_2
+        self.fps = fps
+        self.paths: List[str] = []
+
+    def open(self) -> None:
+        if not os.path.isdir(self.name):
+            raise IOError(f"Erreur: Impossible d'ouvrir le dossier {self.name}.")
+        self.paths = sorted(os.path.join(self.name, filename) for filename in os.listdir(self.name)
+                            if filename.lower().endswith(IMAGE_EXTENSIONS))
+
+    def frames(self) -> Iterator[SampledFrame]:
+        for index in range(self.nb_of_img_skip_between_2, len(self.paths), self.nb_of_img_skip_between_2 + 1):
+            frame = cv2.imread(self.paths[index])
+            if frame is None:
+                print(f"Erreur: Impossible de lire l'image {self.paths[index]}.")
+                continue
+            yield SampledFrame(index, index / self.fps if self.fps else None, frame, time.perf_counter())
+
+
+class PacedCapture:
+    """
+    Wrapper of a cv2.VideoCapture releasing each frame of a file at its timestamp, like a live camera.
+    """
+    def __init__(self, cap: Any, speed: float = 1.0):
+        """
+        Wrap the capture.
+
+        Args:
+            cap (Any): The opened cv2.VideoCapture.
+            speed (float): Playback speed, 1.0 for the real-time rate. Defaults to 1.0.
+        """
+        self.cap = cap
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+        self.period = 1 / (fps * speed) if fps > 0 and speed > 0 else 0.0
+        self.position = 0
+        self.start: Optional[float] = None
+
+    def wait(self) -> None:
+        """
+        Wait until the next frame is available.
+        """
+        now = time.perf_counter()
+        if self.start is None:
+            self.start = now
+        delay = self.start + self.position * self.period - now
+        if delay > 0:
+            time.sleep(delay)
+        self.position += 1
+
+    def grab(self) -> bool:
+        self.wait()
+        return self.cap.grab()
+
+    def read(self) -> Any:
+        self.wait()
+        return self.cap.read()
+
+    def get(self, prop_id: int) -> float:
+        return self.cap.get(prop_id)
+
+
+def latest_only_prefetch(latest_only: bool) -> tuple[int, str]:
+    """
+    Return the prefetch depth and overflow policy of a live source.
+
+    Args:
+        latest_only (bool): If True, only the newest frame is kept.
+
+    Returns:
+        tuple[int, str]: The depth and overflow policy of the PrefetchReader.
+    """
+    return (1, 'drop_oldest') if latest_only else (PREFETCH_DEPTH, 'block')
+
+
+def open_frame_source(uri: str, config: Optional[Dict[str, Any]] = None, replay: bool = False,
+                      **options: Any) -> FrameSource:
+    """
+    Create the frame source matching a path or URL.
+
+    URLs starting with STREAM_PREFIXES are live streams, folders are read as images and the other paths as video
+    files, played at the real-time rate if `replay` is True. The camera of a stream listed in the `streams` section
+    of the configuration is taken from there.
+
+    Args:
+        uri (str): The path or URL of the source.
+        config (Optional[Dict[str, Any]]): The configuration dictionary. Defaults to None.
+        replay (bool): If True, a video file is played at the real-time rate (see ReplaySource). Defaults to False.
+        **options (Any): Options forwarded to the source (e.g. nb_of_img_skip_between_2, camera).
+
+    Raises:
+        ValueError: If the camera of a stream is neither in its URL nor in the configuration.
+
+    Returns:
+        FrameSource: The source, not opened yet.
+    """
+    if uri.startswith(STREAM_PREFIXES):
+        for stream in get_streams(config or {}):
+            if stream.get('url') == uri and 'camera' in stream:
+                options.setdefault('camera', stream['camera'])
+        source = StreamSource(uri, **options)
+        if not source.camera:
+            raise ValueError(f"Erreur: Caméra inconnue pour le flux {uri}, l'indiquer dans la section streams "
+                             f"de la configuration.")
+        return source
+    if os.path.isdir(uri):
+        return ImageDirectorySource(uri, **options)
+    if replay:
+        return ReplaySource(uri, **options)
+    return VideoFileSource(uri, **options)
@@ -0,0 +1,192 @@
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+from src.detection.utils.metrics import metrics
+
+# Maximum number of mosaics encoded per second for each camera
+LIVE_MAX_FPS = 5.0
+
+# JPEG quality of the live view (0-100)
+JPEG_QUALITY = 75
+
+# Boundary between 2 JPEG images of the MJPEG stream
+MJPEG_BOUNDARY = 'frame'
+
+# Time (s) a viewer waits for a new image before the stream is checked again
+VIEWER_TIMEOUT = 1.0
+
+
+class LiveBroadcaster:
+    """
+    Mosaic consumer broadcasting the results of a camera as an MJPEG stream to any number of viewers.
+
+    The consumer is only active while a viewer is connected and at most `max_fps` times per second, so the
+    mosaic is not even rendered otherwise. The analysis thread only copies the mosaic: the JPEG encoding runs
+    in a background thread, once per image whatever the number of viewers, and an image arriving while the
+    previous one is still being encoded replaces it instead of waiting.
+    """
+    def __init__(self, camera: int, max_fps: float = LIVE_MAX_FPS, quality: int = JPEG_QUALITY):
+        """
+        Create the broadcaster.
+
+        Args:
+            camera (int): The camera number.
+            max_fps (float): Maximum number of images encoded per second. Defaults to LIVE_MAX_FPS.
+            quality (int): JPEG quality (0-100). Defaults to JPEG_QUALITY.
+        """
+        self.camera = camera
+        self.period = 1 / max_fps if max_fps > 0 else 0.0
+        self.quality = quality
+        self.viewers = 0
+        self.pending: Optional[np.ndarray] = None
+        self.has_pending = False
+        self.last_accepted = 0.0
+        self.jpeg: Optional[bytes] = None
+        self.sequence = 0
+        self.encoder: Optional[threading.Thread] = None
+        self.condition = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        """
+        bool: True if a viewer is connected and the next image is due.
+        """
+        return self.viewers > 0 and time.perf_counter() - self.last_accepted >= self.period
+
+    def __call__(self, mosaic: np.ndarray) -> None:
+        with self.condition:
+            if self.pending is None or self.pending.shape != mosaic.shape:
+                self.pending = np.empty_like(mosaic)
+            np.copyto(self.pending, mosaic)
+            self.has_pending = True
+            self.last_accepted = time.perf_counter()
+            self.condition.notify_all()
+
+    def connect(self) -> None:
+        """
+        Register a viewer, and start the encoder thread with the first one.
+        """
+        with self.condition:
+            self.viewers += 1
+            if self.encoder is None:
+                self.encoder = threading.Thread(target=self._encode, name=f"live-view-cam{self.camera}", daemon=True)
+                self.encoder.start()
+
+    def disconnect(self) -> None:
+        """
+        Unregister a viewer. The encoder thread stops after the last one.
+        """
+        with self.condition:
+            self.viewers = max(self.viewers - 1, 0)
+            self.condition.notify_all()
+
+    def images(self, timeout: float = VIEWER_TIMEOUT) -> Iterator[bytes]:
+        """
+        Yield the JPEG images of a viewer, from its connection until the generator is closed.
+
+        Args:
+            timeout (float): Time waited for a new image before the stream is checked again. Defaults to
+                VIEWER_TIMEOUT.
+
+        Returns:
+            Iterator[bytes]: The JPEG images, shared with the other viewers.
+        """
+        self.connect()
+        try:
+            sequence = self.sequence
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.sequence != sequence, timeout)
+                    if self.sequence == sequence:
+                        continue
+                    sequence, jpeg = self.sequence, self.jpeg
+                yield jpeg
+        finally:
+            self.disconnect()
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Yield the parts of the multipart/x-mixed-replace (MJPEG) response of a viewer.
+
+        Returns:
+            Iterator[bytes]: The parts, one per JPEG image.
+        """
+        for jpeg in self.images():
+            yield (f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+                   .encode() + jpeg + b"\r\n")
+
+    def _encode(self) -> None:
+        image = None
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.has_pending or self.viewers == 0)
+                if self.viewers == 0:
+                    self.encoder = None
+                    self.has_pending = False
+                    return
+                # Swap the buffers so that the analysis thread can copy the next image during the encoding
+                image, self.pending = self.pending, image
+                self.has_pending = False
+
+            with metrics.timer('live_encoding', self.camera):
+                encoded, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not encoded:
+                print(f"Erreur: Impossible d'encoder l'image de la caméra {self.camera}.")
+                continue
+            with self.condition:
+                self.jpeg = buffer.tobytes()
+                self.sequence += 1
+                self.condition.notify_all()
+            metrics.increment('live_frames', self.camera)
+
+
+class LiveViews:
+    """
+    The LiveBroadcaster of each camera, created on demand and shared by the videos and the viewers of the process.
+    """
+    def __init__(self, max_fps: float = LIVE_MAX_FPS, quality: int = JPEG_QUALITY):
+        """
+        Create the registry.
+
+        Args:
+            max_fps (float): Maximum number of images encoded per second for each camera. Defaults to LIVE_MAX_FPS.
+            quality (int): JPEG quality (0-100). Defaults to JPEG_QUALITY.
+        """
+        self.max_fps = max_fps
+        self.quality = quality
+        self.broadcasters: Dict[int, LiveBroadcaster] = {}
+        self.lock = threading.Lock()
+
+    def get(self, camera: int) -> LiveBroadcaster:
+        """
+        Return the broadcaster of a camera, created if needed.
+
+        Args:
+            camera (int): The camera number.
+
+        Returns:
+            LiveBroadcaster: The broadcaster.
+        """
+        with self.lock:
+            broadcaster = self.broadcasters.get(camera)
+            if broadcaster is None:
+                broadcaster = self.broadcasters[camera] = LiveBroadcaster(camera, self.max_fps, self.quality)
+            return broadcaster
+
+    def cameras(self) -> List[Dict[str, int]]:
+        """
+        Describe the cameras broadcast so far.
+
+        Returns:
+            List[Dict[str, int]]: The camera number, number of viewers and number of images encoded of each camera.
+        """
+        with self.lock:
+            return [{'camera': camera, 'viewers': broadcaster.viewers, 'images': broadcaster.sequence}
+                    for camera, broadcaster in sorted(self.broadcasters.items())]
+
+
+# Live views of the cameras, served by the /live routes of the Flask application
+live_views = LiveViews()
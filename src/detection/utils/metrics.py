@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+# Number of latencies kept per stage and camera for the rolling percentiles
+ROLLING_WINDOW = 1024
+
+# Percentiles exported for each stage
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingLatencies:
+    """
+    The last `window` latencies of a stage, in a ring buffer, with the total count and sum since the start.
+    """
+    def __init__(self, window: int = ROLLING_WINDOW):
+        """
+        Create an empty buffer.
+
+        Args:
+            window (int): Number of latencies kept. Defaults to ROLLING_WINDOW.
+        """
+        self.values = np.zeros(window, dtype=np.float64)
+        self.position = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, seconds: float) -> None:
+        """
+        Record a latency.
+
+        Args:
+            seconds (float): The latency, in seconds.
+        """
+        self.values[self.position] = seconds
+        self.position = (self.position + 1) % len(self.values)
+        self.count += 1
+        self.sum += seconds
+
+    def quantiles(self) -> Dict[float, float]:
+        """
+        Return the percentiles of the kept latencies.
+
+        Returns:
+            Dict[float, float]: The latency (s) of each quantile of QUANTILES.
+        """
+        kept = self.values[:min(self.count, len(self.values))]
+        if not len(kept):
+            return {quantile: 0.0 for quantile in QUANTILES}
+        return dict(zip(QUANTILES, np.quantile(kept, QUANTILES).tolist()))
+
+
+class _NullTimer:
+    """
+    Timer doing nothing, returned while the metrics are disabled.
+    """
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """
+    Timer recording the duration of its block.
+    """
+    __slots__ = ('metrics', 'stage', 'camera', 'start')
+
+    def __init__(self, metrics: 'Metrics', stage: str, camera: int):
+        self.metrics = metrics
+        self.stage = stage
+        self.camera = camera
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.metrics.observe(self.stage, self.camera, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    Latencies of the stages of the pipeline and counters, per camera.
+
+    Each stage keeps its last ROLLING_WINDOW latencies per camera, for the rolling p50/p95/p99. The metrics are
+    exported as a dictionary (JSON) or in the Prometheus text format. While they are disabled (the default, unless
+    the environment variable OBJDET_METRICS is set to 1), nothing is recorded: `timed` returns the function itself
+    and `timer` a shared no-op context manager.
+    """
+    def __init__(self, enabled: bool = False, window: int = ROLLING_WINDOW):
+        """
+        Create empty metrics.
+
+        Args:
+            enabled (bool): If True, the latencies and counters are recorded. Defaults to False.
+            window (int): Number of latencies kept per stage and camera. Defaults to ROLLING_WINDOW.
+        """
+        self.enabled = enabled
+        self.window = window
+        self.latencies: Dict[Tuple[str, int], RollingLatencies] = {}
+        self.counters: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def enable(self, enabled: bool = True) -> None:
+        """
+        Enable or disable the recording.
+
+        Args:
+            enabled (bool): True to record the metrics. Defaults to True.
+        """
+        self.enabled = enabled
+
+    def observe(self, stage: str, camera: int, seconds: float) -> None:
+        """
+        Record the latency of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            camera (int): The camera number.
+            seconds (float): The latency, in seconds.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            latencies = self.latencies.get((stage, camera))
+            if latencies is None:
+                latencies = self.latencies[(stage, camera)] = RollingLatencies(self.window)
+            latencies.add(seconds)
+
+    def increment(self, name: str, camera: int, value: int = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): The name of the counter (e.g. 'frames').
+            camera (int): The camera number.
+            value (int): The increment. Defaults to 1.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(name, camera)] += value
+
+    def timer(self, stage: str, camera: int) -> Any:
+        """
+        Return a context manager recording the duration of its block as the latency of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            camera (int): The camera number.
+
+        Returns:
+            Any: The context manager.
+        """
+        return _Timer(self, stage, camera) if self.enabled else _NULL_TIMER
+
+    def timed(self, stage: str, camera: int, function: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap a function so that the duration of each call is recorded as the latency of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            camera (int): The camera number.
+            function (Callable[..., Any]): The function.
+
+        Returns:
+            Callable[..., Any]: The wrapped function, or the function itself while the metrics are disabled.
+        """
+        if not self.enabled:
+            return function
+
+        def timed_function(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(stage, camera, time.perf_counter() - start)
+        return timed_function
+
+    def timed_iterator(self, stage: str, camera: int, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        Wrap an iterable so that the time waited for each item is recorded as the latency of a stage.
+
+        Args:
+            stage (str): The name of the stage.
+            camera (int): The camera number.
+            iterable (Iterable[Any]): The iterable (e.g. the frames of a source).
+
+        Returns:
+            Iterator[Any]: The wrapped iterator, or the iterator itself while the metrics are disabled.
+        """
+        iterator = iter(iterable)
+        if not self.enabled:
+            return iterator
+
+        def timed_iterator() -> Iterator[Any]:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                self.observe(stage, camera, time.perf_counter() - start)
+                yield item
+        return timed_iterator()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current metrics.
+
+        Returns:
+            Dict[str, Any]: 'stages' gives, for each stage and camera, the number of calls, the mean and the rolling
+                p50/p95/p99 latencies in milliseconds; 'counters' the value of each counter per camera.
+        """
+        with self.lock:
+            stages: Dict[str, Dict[int, Dict[str, float]]] = {}
+            for (stage, camera), latencies in sorted(self.latencies.items()):
+                quantiles = latencies.quantiles()
+                stages.setdefault(stage, {})[camera] = {
+                    'count': latencies.count,
+                    'mean_ms': latencies.sum / latencies.count * 1000 if latencies.count else 0.0,
+                    **{f'p{round(quantile * 100)}_ms': value * 1000 for quantile, value in quantiles.items()},
+                }
+            counters: Dict[str, Dict[int, int]] = {}
+            for (name, camera), value in sorted(self.counters.items()):
+                counters.setdefault(name, {})[camera] = value
+        return {'enabled': self.enabled, 'stages': stages, 'counters': counters}
+
+    def to_json(self) -> str:
+        """
+        Export the metrics as JSON (see snapshot).
+
+        Returns:
+            str: The JSON document.
+        """
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix: str = 'objdet') -> str:
+        """
+        Export the metrics in the Prometheus text format: one summary of the latencies (in seconds) labelled by
+        stage and camera, and one counter per counter name labelled by camera.
+
+        Args:
+            prefix (str): The prefix of the metric names. Defaults to 'objdet'.
+
+        Returns:
+            str: The metrics in the Prometheus text format.
+        """
+        lines = [f"# HELP {prefix}_stage_latency_seconds Latency of the stages of the pipeline.",
+                 f"# TYPE {prefix}_stage_latency_seconds summary"]
+        with self.lock:
+            for (stage, camera), latencies in sorted(self.latencies.items()):
+                labels = f'stage="{stage}",camera="{camera}"'
+                for quantile, value in latencies.quantiles().items():
+                    lines.append(f'{prefix}_stage_latency_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_sum{{{labels}}} {latencies.sum:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_count{{{labels}}} {latencies.count}')
+
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for (counter_name, camera), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f'{prefix}_{name}_total{{camera="{camera}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """
+        Forget every latency and counter.
+        """
+        with self.lock:
+            self.latencies.clear()
+            self.counters.clear()
+
+
+# Metrics of the pipeline, shared by every video of the process
+metrics = Metrics(enabled=os.environ.get('OBJDET_METRICS') == '1')
@@ -0,0 +1,181 @@
+import threading
+import cv2
+import numpy as np
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.detection.utils.detections import Detections
+from src.detection.utils.utils import draw_classification
+
+# Titles of the 4 panels: detections, fine-tuning and classification, background subtraction, edge detection
+PANEL_TITLES = ("Detections", "Fine-tuning and Classification", "Background subtraction", "Edge detection")
+
+BOX_COLOR = (0, 255, 0)  # Green for detected objects
+
+
+class MosaicRenderer:
+    """
+    Renderer of the results of a frame into a single 2x2 mosaic of downscaled panels.
+
+    The mosaic buffer is allocated once. The frame is downscaled once, copied into the 4 panels and the boxes
+    of each panel are drawn with a single `cv2.polylines` call. Nothing is rendered while no consumer is
+    attached (or while all the consumers are inactive), so the analysis does not pay for the display when
+    nobody is watching.
+    """
+    def __init__(self, panel_size: Tuple[int, int] = (640, 360)):
+        """
+        Create the renderer.
+
+        Args:
+            panel_size (Tuple[int, int]): The (width, height) of each panel. Defaults to (640, 360).
+        """
+        self.panel_width, self.panel_height = panel_size
+        self.mosaic = np.zeros((2 * self.panel_height, 2 * self.panel_width, 3), np.uint8)
+        self.scaled = np.zeros((self.panel_height, self.panel_width, 3), np.uint8)
+        self.consumers: List[Callable[[np.ndarray], Any]] = []
+        self.lock = threading.Lock()
+
+    def attach(self, consumer: Callable[[np.ndarray], Any]) -> None:
+        """
+        Attach a consumer called with each rendered mosaic.
+
+        Args:
+            consumer (Callable[[np.ndarray], Any]): The consumer. It must copy the mosaic if it keeps it, and can
+                expose an `active` attribute set to False while it does not need the mosaics.
+        """
+        with self.lock:
+            self.consumers.append(consumer)
+
+    def detach(self, consumer: Callable[[np.ndarray], Any]) -> None:
+        """
+        Detach a consumer.
+
+        Args:
+            consumer (Callable[[np.ndarray], Any]): The consumer.
+        """
+        with self.lock:
+            if consumer in self.consumers:
+                self.consumers.remove(consumer)
+
+    @property
+    def active(self) -> bool:
+        """
+        bool: True if at least one active consumer is attached.
+        """
+        return bool(self.active_consumers())
+
+    def active_consumers(self) -> List[Callable[[np.ndarray], Any]]:
+        """
+        Return the consumers that need the mosaic of the current frame.
+
+        The `active` attribute of a consumer can change over time (e.g. a live view becomes due), so the caller
+        reads it once per frame and passes the result to `render`.
+
+        Returns:
+            List[Callable[[np.ndarray], Any]]: The active consumers.
+        """
+        return [consumer for consumer in list(self.consumers) if getattr(consumer, 'active', True)]
+
+    def panel(self, index: int) -> np.ndarray:
+        """
+        Return a view of a panel of the mosaic.
+
+        Args:
+            index (int): The index of the panel (0: top left, 1: top right, 2: bottom left, 3: bottom right).
+
+        Returns:
+            np.ndarray: The view of the panel.
+        """
+        row, column = divmod(index, 2)
+        return self.mosaic[row * self.panel_height:(row + 1) * self.panel_height,
+                           column * self.panel_width:(column + 1) * self.panel_width]
+
+    def render(self, frame: np.ndarray, results: tuple,
+               consumers: Optional[List[Callable[[np.ndarray], Any]]] = None) -> Optional[np.ndarray]:
+        """
+        Render the results of a frame and send the mosaic to the active consumers.
+
+        Args:
+            frame (np.ndarray): The analysed frame.
+            results (tuple): The tuple returned by process_frame.
+            consumers (Optional[List[Callable[[np.ndarray], Any]]]): The consumers to send the mosaic to.
+                Defaults to None (the consumers active now, see active_consumers).
+
+        Returns:
+            Optional[np.ndarray]: The mosaic (reused by the next call), or None if nothing was rendered.
+        """
+        if consumers is None:
+            consumers = self.active_consumers()
+        if not consumers:
+            return None
+
+        (detections, detections_finetuning, classification, detections_subtraction, detections_edgedetection) = results
+        height, width = frame.shape[:2]
+        scale = (self.panel_width / width, self.panel_height / height)
+
+        cv2.resize(frame, (self.panel_width, self.panel_height), dst=self.scaled, interpolation=cv2.INTER_AREA)
+        for index, panel_detections in enumerate((detections, detections_finetuning, detections_subtraction,
+                                                  detections_edgedetection)):
+            panel = self.panel(index)
+            np.copyto(panel, self.scaled)
+            draw_boxes(panel, Detections.coerce(panel_detections), scale)
+            cv2.putText(panel, PANEL_TITLES[index], (10, self.panel_height - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                        (255, 255, 255), 1)
+        draw_classification(self.panel(1), classification, (10, 20), 0.5, 1)
+
+        for consumer in consumers:
+            consumer(self.mosaic)
+        return self.mosaic
+
+
+def draw_boxes(panel: np.ndarray, detections: Detections, scale: Tuple[float, float]) -> None:
+    """
+    Draw the boxes and labels of detections on a downscaled panel, with one polylines call for all the boxes.
+
+    Args:
+        panel (np.ndarray): The panel.
+        detections (Detections): The detections, in the coordinates of the frame.
+        scale (Tuple[float, float]): The (horizontal, vertical) scale from the frame to the panel.
+    """
+    if detections.empty:
+        return
+
+    boxes = np.rint(detections.boxes * (scale[0], scale[1], scale[0], scale[1])).astype(np.int32)
+    x1, y1, x2, y2 = boxes.T
+    corners = np.stack([np.column_stack([x1, y1]), np.column_stack([x2, y1]),
+                        np.column_stack([x2, y2]), np.column_stack([x1, y2])], axis=1)
+    cv2.polylines(panel, list(corners.reshape(-1, 4, 1, 2)), True, BOX_COLOR, 1)
+
+    for (x, y), confidence, name in zip(boxes[:, :2].tolist(), detections.confidence.tolist(), detections.names):
+        if name is not None and not np.isnan(confidence):
+            cv2.putText(panel, f"{name} ({confidence:.2f})", (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.4, BOX_COLOR, 1)
+
+
+class DisplayWindow:
+    """
+    Consumer showing the mosaics in an OpenCV window. Pressing 'q' closes it.
+    """
+    def __init__(self, window_name: str = "Detections", size: Tuple[int, int] = (1280, 720)):
+        """
+        Open the window.
+
+        Args:
+            window_name (str): The name of the window. Defaults to "Detections".
+            size (Tuple[int, int]): The (width, height) of the window. Defaults to (1280, 720).
+        """
+        self.window_name = window_name
+        self.closed = False
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(window_name, *size)
+        cv2.moveWindow(window_name, 0, 0)
+
+    @property
+    def active(self) -> bool:
+        """
+        bool: False once the window was closed with 'q'.
+        """
+        return not self.closed
+
+    def __call__(self, mosaic: np.ndarray) -> None:
+        cv2.imshow(self.window_name, mosaic)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.closed = True
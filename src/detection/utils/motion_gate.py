@@ -0,0 +1,121 @@
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.detection.utils.detections import Detections
+
+
+class MotionGate:
+    """
+    First stage of the detection cascade: decide from the candidates of the background subtraction whether the
+    expensive stages (YOLO, fine-tuned detection, classification) must run on a frame.
+
+    They run when candidates appear, disappear or move compared with the last frame of the camera on which they
+    ran (a candidate without a candidate of that frame of IoU at least `iou_threshold`), and at least every
+    `max_skip` frames. Otherwise their results on that frame are reused. Comparing with the frame of the reused
+    results, and not with the previous frame, keeps a slow drift from being skipped frame after frame.
+    """
+    def __init__(self, iou_threshold: float = 0.5, max_skip: int = 50):
+        """
+        Create the gate.
+
+        Args:
+            iou_threshold (float): Minimum IoU between a candidate and a previous candidate to consider it
+                unchanged. Defaults to 0.5.
+            max_skip (int): Maximum number of frames in a row where the expensive stages are skipped.
+                Defaults to 50.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_skip = max_skip
+        self.candidates: Dict[int, Detections] = {}
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.skip_counts: Dict[int, int] = {}
+        self.runs: Counter = Counter()
+        self.skips: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def candidates_changed(self, camera: int, candidates: Any) -> bool:
+        """
+        Tell whether the candidates of a frame differ from those of the last frame of the camera on which the
+        expensive stages ran.
+
+        Args:
+            camera (int): The index of the camera.
+            candidates (Any): The candidates of the background subtraction, as Detections or as a DataFrame.
+
+        Returns:
+            bool: True if a candidate appeared, disappeared or moved.
+        """
+        candidates = Detections.coerce(candidates)
+        with self.lock:
+            previous = self.candidates.get(camera)
+        if previous is None or len(previous) != len(candidates):
+            return True
+        if candidates.empty:
+            return False
+        return bool((candidates.iou(previous).max(axis=1) < self.iou_threshold).any())
+
+    def previous_results(self, camera: int, candidates: Any) -> Optional[Dict[str, Any]]:
+        """
+        Return the results of the expensive stages to reuse for a frame, if they can be skipped.
+
+        Args:
+            camera (int): The index of the camera.
+            candidates (Any): The candidates of the background subtraction on the frame.
+
+        Returns:
+            Optional[Dict[str, Any]]: The results of the expensive stages on the last frame on which they ran,
+                or None if they must run.
+        """
+        changed = self.candidates_changed(camera, candidates)
+        with self.lock:
+            results = self.results.get(camera)
+            if changed or results is None or self.skip_counts.get(camera, 0) >= self.max_skip:
+                self.runs[camera] += 1
+                return None
+            self.skip_counts[camera] = self.skip_counts.get(camera, 0) + 1
+            self.skips[camera] += 1
+            return results
+
+    def store(self, camera: int, candidates: Any, results: Dict[str, Any]) -> None:
+        """
+        Record the results of the expensive stages on a frame of the camera, and the candidates of the frame that
+        the next frames are compared with.
+
+        Args:
+            camera (int): The index of the camera.
+            candidates (Any): The candidates of the background subtraction on the frame.
+            results (Dict[str, Any]): The results of the expensive stages by name.
+        """
+        candidates = Detections.coerce(candidates)
+        with self.lock:
+            self.candidates[camera] = candidates
+            self.results[camera] = results
+            self.skip_counts[camera] = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return how often the expensive stages ran and were skipped.
+
+        Returns:
+            Dict[str, Any]: The total runs, skips and skip rate, and the runs and skips of each camera.
+        """
+        with self.lock:
+            runs, skips = sum(self.runs.values()), sum(self.skips.values())
+            return {'runs': runs, 'skips': skips, 'skip_rate': skips / (runs + skips) if runs + skips else 0.0,
+                    'cameras': {camera: {'runs': self.runs[camera], 'skips': self.skips[camera]}
+                                for camera in sorted(set(self.runs) | set(self.skips))}}
+
+    def reset(self, camera: Optional[int] = None) -> None:
+        """
+        Forget the previous candidates and results of a camera (the counters are kept).
+
+        Args:
+            camera (Optional[int]): The index of the camera. Defaults to None (every camera).
+        """
+        with self.lock:
+            for state in (self.candidates, self.results, self.skip_counts):
+                if camera is None:
+                    state.clear()
+                else:
+                    state.pop(camera, None)
@@ -0,0 +1,340 @@
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.config.config_loader import get_profiling_config, load_config
+
+PROFILERS = ('cprofile', 'sampling')
+
+# Interval (s) between 2 samples of the stacks by the sampling profiler
+SAMPLING_INTERVAL = 0.005
+
+# Innermost functions of the threads waiting for work, not counted by the sampling profiler
+IDLE_FUNCTIONS = {('threading.py', 'wait'), ('thread.py', '_worker'), ('queue.py', 'get'), ('queue.py', 'put')}
+
+# Interval (s) between 2 readings of the profiling settings by a running FrameProfiler
+SETTINGS_REFRESH_INTERVAL = 10.0
+
+# Set while a torch profile is recorded, so that the forward passes are labelled
+_torch_profiling = threading.Event()
+
+# Held while a window is profiled: cProfile and the torch profiler are global to the process, so the windows of
+# the sources analysed at the same time (e.g. by 2 job workers) are profiled one after the other
+_profiling_lock = threading.Lock()
+
+
+def profiled_section(name: str) -> Any:
+    """
+    Return a context manager labelling a block (e.g. a forward pass) in the torch profile being recorded.
+
+    Args:
+        name (str): The label of the block.
+
+    Returns:
+        Any: torch.profiler.record_function while a torch profile is recorded, a no-op context manager otherwise.
+    """
+    if not _torch_profiling.is_set():
+        return contextlib.nullcontext()
+    import torch
+
+    return torch.profiler.record_function(name)
+
+
+def get_profiling_settings() -> Dict[str, Any]:
+    """
+    Read the profiling settings from the environment, falling back on the 'profiling' section of the configuration.
+
+    The environment variables are OBJDET_PROFILE_FRAMES (number of profiled frames, 0 to disable),
+    OBJDET_PROFILE_SKIP (frames analysed before the profiled window), OBJDET_PROFILE_DIR (folder of the reports),
+    OBJDET_PROFILE_MODE ('cprofile' or 'sampling') and OBJDET_PROFILE_TORCH (1 to record a torch profile too).
+
+    Raises:
+        ValueError: If the value of an environment variable is invalid.
+
+    Returns:
+        Dict[str, Any]: The settings 'frames', 'skip', 'output_dir', 'mode' and 'torch'.
+    """
+    try:
+        settings = get_profiling_config(load_config())
+    except (OSError, ValueError):
+        settings = get_profiling_config({})
+
+    environment = {'frames': ('OBJDET_PROFILE_FRAMES', int), 'skip': ('OBJDET_PROFILE_SKIP', int),
+                   'output_dir': ('OBJDET_PROFILE_DIR', str), 'mode': ('OBJDET_PROFILE_MODE', str),
+                   'torch': ('OBJDET_PROFILE_TORCH', lambda value: value == '1')}
+    for key, (variable, convert) in environment.items():
+        if os.environ.get(variable):
+            try:
+                settings[key] = convert(os.environ[variable])
+            except ValueError:
+                raise ValueError(f"Erreur: Valeur invalide {os.environ[variable]} pour {variable}.")
+    return settings
+
+
+class SamplingProfiler:
+    """
+    Low-overhead profiler sampling the stacks of every thread at a fixed interval.
+
+    Unlike cProfile, it also sees the stages running on the thread pool (process_frame with parallel=True) and
+    does not slow down the profiled code, only the sampling thread takes some CPU.
+    """
+    def __init__(self, interval: float = SAMPLING_INTERVAL):
+        """
+        Create the profiler.
+
+        Args:
+            interval (float): Interval between 2 samples, in seconds. Defaults to SAMPLING_INTERVAL.
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.functions: Counter = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def enable(self) -> None:
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def disable(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _sample(self) -> None:
+        own_thread = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            self.samples += 1
+            functions = set()
+            for thread_id, frame in sys._current_frames().items():
+                code = frame.f_code
+                if thread_id == own_thread or (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+                functions.update(stack)
+            self.functions.update(functions)
+
+    def report(self, limit: int = 40) -> str:
+        """
+        Return the functions running in the most samples (in any thread), followed by the collapsed stacks of the
+        busy threads (flame graph format).
+
+        Args:
+            limit (int): Number of functions listed. Defaults to 40.
+
+        Returns:
+            str: The report.
+        """
+        samples = self.samples or 1
+        lines = [f"{self.samples} échantillons toutes les {self.interval * 1000:.1f} ms", "",
+                 f"{'% samples':>10}  function"]
+        lines += [f"{count / samples * 100:>9.1f}%  {function}"
+                  for function, count in self.functions.most_common(limit)]
+        lines += ["", "# Collapsed stacks"]
+        lines += [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return '\n'.join(lines) + '\n'
+
+
+class FrameProfiler:
+    """
+    Profile a window of frames of a video and write a report.
+
+    The window starts after `skip` analysed frames and lasts `frames` frames (analysis, decoding and drawing
+    included). The profile is taken with cProfile (calling thread only) or with the SamplingProfiler (every
+    thread), and optionally with the torch profiler, whose report labels the YOLO and enhance_net_nopool forward
+    passes (see profiled_section). The reports are written to `output_dir` when the window ends, or when the
+    video ends before.
+
+    With a refresh_interval, the settings are read again while no window is profiled: a change of the settings
+    starts a new window `skip` frames later, so that a live source can be profiled without a restart. Only one
+    window is profiled at a time in the process, a window due while another one is profiled waits for its end.
+    """
+    def __init__(self, name: str, frames: int, skip: int = 0, output_dir: str = 'profiles', mode: str = 'cprofile',
+                 torch: bool = False, refresh_interval: Optional[float] = None):
+        """
+        Prepare the profiler.
+
+        Args:
+            name (str): The name of the profiled run (e.g. the path to the video), used for the report names.
+            frames (int): Number of profiled frames.
+            skip (int): Number of frames analysed before the profiled window. Defaults to 0.
+            output_dir (str): Folder of the reports. Defaults to 'profiles'.
+            mode (str): 'cprofile' or 'sampling'. Defaults to 'cprofile'.
+            torch (bool): If True, a torch profile is recorded too. Defaults to False.
+            refresh_interval (Optional[float]): Interval between 2 readings of the settings (see
+                get_profiling_settings), in seconds. Defaults to None (the settings are never read again).
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        self.name = os.path.splitext(os.path.basename(name.rstrip('/')))[0] or 'run'
+        self.refresh_interval = refresh_interval
+        self.last_refresh = time.monotonic()
+        self.frame_count = 0
+        self.profiler: Any = None
+        self.torch_profiler: Any = None
+        self.start_time = 0.0
+        self.first_frame = 0
+        self.reports: list[str] = []
+        self.settings_error: Optional[str] = None
+        self._configure(frames, skip, output_dir, mode, torch)
+
+    @classmethod
+    def from_settings(cls, name: str) -> 'FrameProfiler':
+        """
+        Create the profiler requested by the environment or the configuration (see get_profiling_settings), which
+        reads them again every SETTINGS_REFRESH_INTERVAL seconds. Invalid settings are reported and ignored.
+
+        Args:
+            name (str): The name of the profiled run.
+
+        Returns:
+            FrameProfiler: The profiler, idle while the settings profile no frame.
+        """
+        profiler = cls(name, 0, refresh_interval=SETTINGS_REFRESH_INTERVAL)
+        profiler._refresh()
+        return profiler
+
+    @property
+    def active(self) -> bool:
+        """
+        bool: True while the window is profiled.
+        """
+        return self.profiler is not None
+
+    def frame_started(self) -> None:
+        """
+        Signal the start of the analysis of a frame.
+        """
+        if self.active:
+            return
+        if self.refresh_interval is not None and time.monotonic() - self.last_refresh >= self.refresh_interval:
+            self._refresh()
+        if self.window_start is not None and self.frame_count >= self.window_start \
+                and _profiling_lock.acquire(blocking=False):
+            try:
+                self._start()
+            except BaseException:
+                _profiling_lock.release()
+                raise
+
+    def frame_done(self) -> None:
+        """
+        Signal the end of the analysis of a frame.
+        """
+        self.frame_count += 1
+        if self.active and self.frame_count >= self.first_frame + self.frames:
+            self._stop()
+
+    def close(self) -> None:
+        """
+        Stop the profile if the video ended during the window, and write the reports.
+
+        The failure to write a report is printed and never interrupts the analysis.
+        """
+        if self.active:
+            self._stop()
+
+    def _configure(self, frames: int, skip: int, output_dir: str, mode: str, torch: bool) -> None:
+        if mode not in PROFILERS:
+            raise ValueError(f"Erreur: Profileur inconnu {mode}, choisir parmi {PROFILERS}.")
+        self.settings: Optional[tuple] = (frames, skip, output_dir, mode, torch)
+        self.frames, self.skip, self.output_dir, self.mode, self.torch = self.settings
+        # Frame from which the next window is profiled, None when no window is due
+        self.window_start: Optional[int] = self.frame_count + skip if frames > 0 else None
+
+    def _refresh(self) -> None:
+        self.last_refresh = time.monotonic()
+        try:
+            settings = get_profiling_settings()
+            settings = (settings['frames'], settings['skip'], settings['output_dir'], settings['mode'],
+                        settings['torch'])
+            if settings != self.settings:
+                self._configure(*settings)
+            self.settings_error = None
+        except ValueError as error:
+            # Idle until the settings are fixed, the same error is only reported once
+            self.settings = None
+            self.window_start = None
+            if str(error) != self.settings_error:
+                print(f"{error} Paramètres de profilage ignorés.")
+            self.settings_error = str(error)
+
+    def _start(self) -> None:
+        self.window_start = None
+        self.first_frame = self.frame_count
+        if self.torch:
+            import torch
+
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self.torch_profiler = torch.profiler.profile(activities=activities)
+            self.torch_profiler.__enter__()
+            _torch_profiling.set()
+
+        self.profiler = cProfile.Profile() if self.mode == 'cprofile' else SamplingProfiler()
+        self.start_time = time.perf_counter()
+        self.profiler.enable()
+
+    def _stop(self) -> None:
+        profiler, torch_profiler = self.profiler, self.torch_profiler
+        self.profiler = self.torch_profiler = None
+        try:
+            profiler.disable()
+            elapsed = time.perf_counter() - self.start_time
+            if torch_profiler is not None:
+                _torch_profiling.clear()
+                torch_profiler.__exit__(None, None, None)
+        finally:
+            _profiling_lock.release()
+
+        try:
+            self._write_reports(profiler, torch_profiler, elapsed)
+        except Exception as error:
+            print(f"Erreur: Échec de l'écriture du profil de {self.name} : {error}")
+
+    def _write_reports(self, profiler: Any, torch_profiler: Any, elapsed: float) -> None:
+        profiled_frames = self.frame_count - self.first_frame
+        reports_before = len(self.reports)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}_{time.strftime('%Y%m%d-%H%M%S')}")
+        header = (f"Profil de {profiled_frames} images de {self.name} (à partir de l'image {self.first_frame}) "
+                  f"en {elapsed:.2f} s\n\n")
+
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(f"{prefix}_cprofile.prof")
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(60)
+            self._write(f"{prefix}_cprofile.txt", header + stream.getvalue())
+            self.reports.append(f"{prefix}_cprofile.prof")
+        else:
+            self._write(f"{prefix}_sampling.txt", header + profiler.report())
+
+        if torch_profiler is not None:
+            torch_profiler.export_chrome_trace(f"{prefix}_torch_trace.json")
+            table = torch_profiler.key_averages().table(sort_by='self_cpu_time_total', row_limit=40)
+            self._write(f"{prefix}_torch.txt", header + table)
+            self.reports.append(f"{prefix}_torch_trace.json")
+
+        print(f"Profil enregistré : {', '.join(self.reports[reports_before:])}")
+
+    def _write(self, path: str, text: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        self.reports.append(path)
@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ResourceRegistry:
+    """
+    Lazy registry of the models and resources of the pipeline.
+
+    Each resource is registered with a loader and only loaded on its first use (or on preload), so importing
+    the pipeline is instantaneous and a run only pays for the stages it actually uses. The loading time of
+    each resource is recorded.
+    """
+    def __init__(self):
+        """
+        Create an empty registry.
+        """
+        self.loaders: Dict[str, Callable[[], Any]] = {}
+        self.resources: Dict[str, Any] = {}
+        self.load_times: Dict[str, float] = {}
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """
+        Register the loader of a resource.
+
+        Args:
+            name (str): The name of the resource.
+            loader (Callable[[], Any]): The function loading the resource.
+        """
+        with self.lock:
+            self.loaders[name] = loader
+            self.locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+        Return a resource, loading it on first use.
+
+        Args:
+            name (str): The name of the resource.
+
+        Raises:
+            KeyError: If no resource is registered under this name.
+
+        Returns:
+            Any: The resource.
+        """
+        try:
+            return self.resources[name]
+        except KeyError:
+            pass
+
+        with self.lock:
+            if name not in self.loaders and name not in self.resources:
+                raise KeyError(f"Erreur: Ressource inconnue {name}.")
+            name_lock = self.locks.setdefault(name, threading.Lock())
+
+        # One lock per resource: different resources can be loaded at the same time by different threads
+        with name_lock:
+            if name not in self.resources:
+                start = time.perf_counter()
+                resource = self.loaders[name]()
+                self.load_times[name] = time.perf_counter() - start
+                self.resources[name] = resource
+                print(f"Chargement de {name} en {self.load_times[name]:.2f} s")
+        return self.resources[name]
+
+    def set(self, name: str, resource: Any) -> None:
+        """
+        Replace a resource by an already loaded object (e.g. a stub for the tests or the benchmarks).
+
+        Args:
+            name (str): The name of the resource.
+            resource (Any): The resource.
+        """
+        with self.lock:
+            self.resources[name] = resource
+            self.load_times[name] = 0.0
+
+    def is_loaded(self, name: str) -> bool:
+        """
+        Tell whether a resource is already loaded.
+
+        Args:
+            name (str): The name of the resource.
+
+        Returns:
+            bool: True if the resource is loaded.
+        """
+        return name in self.resources
+
+    def preload(self, *names: str) -> Dict[str, float]:
+        """
+        Load resources now instead of on first use.
+
+        Args:
+            *names (str): The names of the resources. Defaults to every registered resource.
+
+        Returns:
+            Dict[str, float]: The loading time (s) of each requested resource.
+        """
+        for name in names or tuple(self.loaders):
+            self.get(name)
+        return {name: self.load_times[name] for name in names or tuple(self.loaders)}
+
+    def unload(self, name: Optional[str] = None) -> None:
+        """
+        Forget a loaded resource, it will be loaded again on next use.
+
+        Args:
+            name (Optional[str]): The name of the resource. Defaults to None (every resource).
+        """
+        with self.lock:
+            if name is None:
+                self.resources.clear()
+                self.load_times.clear()
+            else:
+                self.resources.pop(name, None)
+                self.load_times.pop(name, None)
+
+
+# Registry shared by the whole pipeline
+registry = ResourceRegistry()
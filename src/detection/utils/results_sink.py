@@ -0,0 +1,222 @@
+import json
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.detection.utils.detections import Detections
+
+
+def to_builtin(value: Any) -> Any:
+    """
+    Convert a value coming from NumPy or pandas into a JSON serializable Python value.
+
+    Args:
+        value (Any): The value to convert.
+
+    Returns:
+        Any: The converted value (NaN becomes None).
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def detections_to_records(detections: Any) -> List[Dict[str, Any]]:
+    """
+    Convert detections into a list of serializable dictionaries.
+
+    Args:
+        detections (Any): The detections, as Detections or as a DataFrame.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per detection.
+    """
+    if isinstance(detections, Detections):
+        return detections.to_records()
+    return [{key: to_builtin(value) for key, value in row.items()}
+            for row in detections.to_dict(orient='records')]
+
+
+def classification_to_records(classification: list) -> List[Dict[str, Any]]:
+    """
+    Convert the predictions of the classification model into a list of serializable dictionaries.
+
+    Args:
+        classification (list): The list containing the classification results.
+
+    Returns:
+        List[Dict[str, Any]]: One dictionary per prediction.
+    """
+    return [{'class_name': prediction.class_name, 'confidence': to_builtin(prediction.confidence)}
+            for prediction in classification]
+
+
+def frame_to_record(video_path: str, camera_number: int, time_str: Optional[str], frame_index: int,
+                    results: tuple, timestamp: Optional[float] = None,
+                    start_time: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Build the record written to a results sink for one analysed frame.
+
+    Args:
+        video_path (str): The path to the video file.
+        camera_number (int): The camera number.
+        time_str (Optional[str]): The time extracted from the video filename.
+        frame_index (int): The index of the frame in the video.
+        results (tuple): The tuple returned by process_frame.
+        timestamp (Optional[float]): Seconds from the start of the video to the frame. Defaults to None.
+        start_time (Optional[datetime]): The capture time of the first frame (see capture_start), from which the
+            capture time of the frame is computed. Defaults to None (unknown).
+
+    Returns:
+        Dict[str, Any]: The record of the frame.
+    """
+    (detections_df,
+     detections_df_finetuning,
+     classification_df_finetuning,
+     detections_df_subtraction,
+     detections_df_edgedetection) = results
+
+    capture_time = None
+    if start_time is not None:
+        capture_time = (start_time + timedelta(seconds=timestamp or 0.0)).isoformat(timespec='milliseconds')
+
+    return {
+        'video': os.path.basename(video_path),
+        'camera': camera_number,
+        'time': time_str,
+        'frame': frame_index,
+        'timestamp': timestamp,
+        'capture_time': capture_time,
+        'detections': detections_to_records(detections_df),
+        'detections_finetuning': detections_to_records(detections_df_finetuning),
+        'classification': classification_to_records(classification_df_finetuning),
+        'detections_subtraction': detections_to_records(detections_df_subtraction),
+        'detections_edgedetection': detections_to_records(detections_df_edgedetection),
+    }
+
+
+class JsonlResultsSink:
+    """
+    Results sink writing one JSON object per line.
+    """
+    def __init__(self, path: str):
+        """
+        Open the JSONL file, creating its folder if needed.
+
+        Args:
+            path (str): The path to the output file.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Write a record to the file.
+
+        Args:
+            record (Dict[str, Any]): The record of an analysed frame.
+        """
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self.file.close()
+
+
+class ParquetResultsSink:
+    """
+    Results sink writing the records to a Parquet file, one row group every `batch_size` records.
+
+    The lists of detections are stored as JSON strings so that the schema stays the same for every row group.
+    Requires the `pyarrow` package.
+    """
+    def __init__(self, path: str, batch_size: int = 256):
+        """
+        Prepare the Parquet writer, creating the folder of the file if needed.
+
+        Args:
+            path (str): The path to the output file.
+            batch_size (int): Number of records buffered before writing a row group. Defaults to 256.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.path = path
+        self.batch_size = batch_size
+        self.rows: List[Dict[str, Any]] = []
+        self.pa = pa
+        self.schema = pa.schema([
+            ('video', pa.string()),
+            ('camera', pa.int32()),
+            ('time', pa.string()),
+            ('frame', pa.int64()),
+            ('timestamp', pa.float64()),
+            ('capture_time', pa.string()),
+            ('detections', pa.string()),
+            ('detections_finetuning', pa.string()),
+            ('classification', pa.string()),
+            ('detections_subtraction', pa.string()),
+            ('detections_edgedetection', pa.string()),
+        ])
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Buffer a record and write a row group when the buffer is full.
+
+        Args:
+            record (Dict[str, Any]): The record of an analysed frame.
+        """
+        row = {key: (json.dumps(value, ensure_ascii=False) if isinstance(value, list) else value)
+               for key, value in record.items()}
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered records as a row group.
+        """
+        if not self.rows:
+            return
+        self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+        self.rows = []
+
+    def close(self) -> None:
+        """
+        Write the remaining records and close the file.
+        """
+        self.flush()
+        self.writer.close()
+
+
+def open_results_sink(path: str) -> Any:
+    """
+    Open the results sink matching the extension of the given path.
+
+    Args:
+        path (str): The path to the output file (.jsonl or .parquet).
+
+    Raises:
+        ValueError: If the extension is not supported.
+
+    Returns:
+        Any: The results sink, with `write(record)` and `close()` methods.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    match extension:
+        case '.jsonl' | '.json':
+            return JsonlResultsSink(path)
+        case '.parquet':
+            return ParquetResultsSink(path)
+        case _:
+            raise ValueError(f"Erreur: Format de résultats non supporté {extension}.")
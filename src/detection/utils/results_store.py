@@ -0,0 +1,382 @@
+import abc
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# Number of buffered records that triggers a flush
+FLUSH_BATCH_SIZE = 1024
+
+# Maximum time (s) a record stays in memory before being flushed
+FLUSH_INTERVAL = 5.0
+
+# Columns of the detections of each detector stored for each box
+BOX_FIELDS = ('xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'name')
+
+# Detectors whose boxes are stored, as named in the records of frame_to_record
+DETECTORS = ('detections', 'detections_finetuning', 'detections_subtraction', 'detections_edgedetection')
+
+
+def capture_start(path: str, time_str: Optional[str]) -> datetime:
+    """
+    Return the capture time of the first frame of a video.
+
+    The filenames only give the time (extract_camera_data). The date is read from the filename or from the name
+    of its folder ('2025-03-22' or '20250322'), e.g. `videos/2025-03-22/CAM4_12h00m00s.mp4`. Otherwise it is the
+    modification date of the file, which is wrong for a video copied or edited after its capture, or the current
+    date for a live stream.
+
+    Args:
+        path (str): The path or URL of the source.
+        time_str (Optional[str]): The time extracted from the filename ('12h00m00s'). Defaults to the modification
+            time of the file when None.
+
+    Returns:
+        datetime: The capture time of the first frame.
+    """
+    start = datetime.fromtimestamp(os.path.getmtime(path)) if os.path.exists(path) else datetime.now()
+    for name in (os.path.basename(path), os.path.basename(os.path.dirname(path))):
+        date = capture_date(name)
+        if date is not None:
+            start = datetime.combine(date.date(), start.time())
+            break
+    match = re.fullmatch(r'(\d{2})h(\d{2})m(\d{2})s', time_str or '')
+    if match:
+        hour, minute, second = map(int, match.groups())
+        start = start.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    return start
+
+
+def capture_date(name: str) -> Optional[datetime]:
+    """
+    Extract the date ('2025-03-22' or '20250322') of a file or folder name.
+
+    Args:
+        name (str): The name of the file or folder.
+
+    Returns:
+        Optional[datetime]: The date, or None if the name contains no valid date.
+    """
+    for match in re.finditer(r'(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?!\d)', name):
+        try:
+            return datetime(*map(int, match.groups()))
+        except ValueError:
+            continue
+    return None
+
+
+def classification_record_label(classification: List[Dict[str, Any]]) -> tuple[Optional[str], Optional[float]]:
+    """
+    Return the empty/full label of a frame from its classification records.
+
+    Args:
+        classification (List[Dict[str, Any]]): The classification records of frame_to_record.
+
+    Returns:
+        tuple[Optional[str], Optional[float]]: The class name and confidence of the first prediction, or None.
+    """
+    if not classification:
+        return None, None
+    return classification[0]['class_name'], classification[0]['confidence']
+
+
+class BatchedResultsStore(abc.ABC):
+    """
+    Store of the records of the analysed frames, written in batches by a background thread.
+
+    `write` only appends the record to an in-memory buffer, so the frame loop never waits for the disk. The
+    writer thread flushes the buffer every `batch_size` records or every `flush_interval` seconds, and once more
+    when the store is closed. A store can be shared by the videos analysed one after the other.
+
+    If the store cannot be opened or a batch cannot be written, the writer thread stops and the error is raised
+    by the next call to `write` or `close`, so that the analysis does not go on without saving its results.
+    """
+    def __init__(self, batch_size: int = FLUSH_BATCH_SIZE, flush_interval: Optional[float] = FLUSH_INTERVAL):
+        """
+        Start the writer thread.
+
+        Args:
+            batch_size (int): Number of buffered records that triggers a flush. Defaults to FLUSH_BATCH_SIZE.
+            flush_interval (Optional[float]): Maximum time a record stays in memory, in seconds, or None to only
+                flush full batches. Defaults to FLUSH_INTERVAL.
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records: List[Dict[str, Any]] = []
+        self.written = 0
+        self.closed = False
+        self.error: Optional[Exception] = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Buffer the record of an analysed frame (see frame_to_record).
+
+        Args:
+            record (Dict[str, Any]): The record, with its 'capture_time'.
+
+        Raises:
+            Exception: The error of the writer thread, if the store could not be opened or written.
+        """
+        with self.condition:
+            if self.error is not None:
+                raise self.error
+            self.records.append(record)
+            if len(self.records) >= self.batch_size:
+                self.condition.notify()
+
+    def close(self) -> None:
+        """
+        Flush the remaining records and stop the writer thread.
+
+        Raises:
+            Exception: The error of the writer thread, if the store could not be opened or written.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self) -> None:
+        try:
+            self._open()
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: len(self.records) >= self.batch_size or self.closed,
+                                            self.flush_interval)
+                    records, self.records = self.records, []
+                    closed = self.closed
+                if records:
+                    self._write_batch(records)
+                    self.written += len(records)
+                if closed:
+                    break
+        except Exception as error:
+            self._fail(error)
+        finally:
+            try:
+                self._close()
+            except Exception as error:
+                self._fail(error)
+
+    def _fail(self, error: Exception) -> None:
+        print(f"Erreur: Échec de l'écriture des résultats : {error}")
+        with self.condition:
+            # The first error is the one raised, the records buffered in the meantime are lost
+            if self.error is None:
+                self.error = error
+            self.records = []
+
+    def _open(self) -> None:
+        """
+        Prepare the store, in the writer thread.
+        """
+
+    @abc.abstractmethod
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Write a batch of records, in the writer thread.
+
+        Args:
+            records (List[Dict[str, Any]]): The records, in the order they were written.
+        """
+
+    def _close(self) -> None:
+        """
+        Release the store, in the writer thread, even after an error.
+        """
+
+
+class ParquetResultsStore(BatchedResultsStore):
+    """
+    Results store writing a Parquet dataset partitioned by camera and capture date
+    (`<root>/camera=<n>/date=<yyyy-mm-dd>/part-*.parquet`).
+
+    The rows of each partition are kept by the writer thread until they fill a file of `batch_size` rows, the
+    camera moves on to the next date or the store is closed, so that the dataset is not split into many small
+    files. Each file is sorted by capture time so that the statistics of the row groups let the readers skip the
+    time ranges they do not need. The boxes of each detector are stored as a list of structs and the
+    classification as its label and confidence. Requires the `pyarrow` package.
+    """
+    def __init__(self, root: str, batch_size: int = FLUSH_BATCH_SIZE, flush_interval: Optional[float] = None):
+        """
+        Prepare the dataset.
+
+        Args:
+            root (str): The folder of the dataset.
+            batch_size (int): Number of rows of each file of a partition. Defaults to FLUSH_BATCH_SIZE.
+            flush_interval (Optional[float]): Maximum time a record stays in the buffer of `write`, in seconds.
+                Defaults to None (the records are only handed to the partitions by full batches).
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.root = root
+        self.pa = pa
+        self.pq = pq
+        box = pa.struct([(field, pa.string() if field == 'name' else pa.float64()) for field in BOX_FIELDS])
+        self.schema = pa.schema([
+            ('capture_time', pa.timestamp('ms')),
+            ('video', pa.string()),
+            ('frame', pa.int64()),
+            ('timestamp', pa.float64()),
+            ('classification', pa.string()),
+            ('classification_confidence', pa.float64()),
+            *[(detector, pa.list_(box)) for detector in DETECTORS],
+        ])
+        # Rows not written yet, by (camera, date) partition
+        self.partitions: Dict[tuple, List[Dict[str, Any]]] = {}
+        os.makedirs(root, exist_ok=True)
+        super().__init__(batch_size, flush_interval)
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            capture_time = datetime.fromisoformat(record['capture_time'])
+            label, confidence = classification_record_label(record['classification'])
+            row = {'capture_time': capture_time, 'video': record['video'], 'frame': record['frame'],
+                   'timestamp': record['timestamp'], 'classification': label,
+                   'classification_confidence': confidence}
+            for detector in DETECTORS:
+                row[detector] = [{field: box.get(field) for field in BOX_FIELDS} for box in record[detector]]
+            self.partitions.setdefault((record['camera'], capture_time.date().isoformat()), []).append(row)
+
+        last_dates = {}
+        for camera, date in self.partitions:
+            last_dates[camera] = max(date, last_dates.get(camera, date))
+        for (camera, date), rows in list(self.partitions.items()):
+            if len(rows) >= self.batch_size or date < last_dates[camera]:
+                self._write_partition(camera, date)
+
+    def _close(self) -> None:
+        for camera, date in list(self.partitions):
+            self._write_partition(camera, date)
+
+    def _write_partition(self, camera: int, date: str) -> None:
+        rows = self.partitions.pop((camera, date))
+        rows.sort(key=lambda row: row['capture_time'])
+        folder = os.path.join(self.root, f"camera={camera}", f"date={date}")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet")
+        self.pq.write_table(self.pa.Table.from_pylist(rows, schema=self.schema), path)
+
+
+class SqliteResultsStore(BatchedResultsStore):
+    """
+    Results store writing one row per frame to a SQLite table indexed by (camera, capture_time).
+
+    The boxes of each detector are stored as JSON and the classification as its label and confidence. The
+    database is in WAL mode so that it can be read (e.g. by the Flask application) while it is written.
+    """
+    def __init__(self, path: str, batch_size: int = FLUSH_BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        """
+        Prepare the database.
+
+        Args:
+            path (str): The path to the database file.
+            batch_size (int): Number of buffered records that triggers a flush. Defaults to FLUSH_BATCH_SIZE.
+            flush_interval (float): Maximum time a record stays in memory, in seconds. Defaults to FLUSH_INTERVAL.
+        """
+        self.path = path
+        self.connection: Optional[sqlite3.Connection] = None
+        super().__init__(batch_size, flush_interval)
+
+    def _open(self) -> None:
+        # The connection belongs to the writer thread
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS frames (camera INTEGER NOT NULL, capture_time TEXT NOT NULL, video TEXT, "
+            "frame INTEGER, timestamp REAL, classification TEXT, classification_confidence REAL, "
+            + ", ".join(f"{detector} TEXT" for detector in DETECTORS) + ")")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS frames_camera_time ON frames (camera, capture_time)")
+        self.connection.commit()
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        rows = [(record['camera'], record['capture_time'], record['video'], record['frame'], record['timestamp'],
+                 *classification_record_label(record['classification']),
+                 *[json.dumps(record[detector], ensure_ascii=False) for detector in DETECTORS])
+                for record in records]
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO frames VALUES ({', '.join('?' * (7 + len(DETECTORS)))})", rows)
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+
+def open_results_store(path: str, **options: Any) -> BatchedResultsStore:
+    """
+    Open the results store matching the given path: a SQLite database for the .sqlite and .db files, a
+    partitioned Parquet dataset for a folder.
+
+    Args:
+        path (str): The path to the database file or to the folder of the dataset.
+        **options (Any): Options of the store (batch_size, flush_interval).
+
+    Returns:
+        BatchedResultsStore: The store, with `write(record)` and `close()` methods.
+    """
+    match os.path.splitext(path)[1].lower():
+        case '.sqlite' | '.db':
+            return SqliteResultsStore(path, **options)
+        case _:
+            return ParquetResultsStore(path, **options)
+
+
+def load_results(path: str, camera: Optional[int] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Read the results of a store, only the partitions and rows matching the camera and time range.
+
+    Args:
+        path (str): The path to the database file or to the folder of the dataset.
+        camera (Optional[int]): The camera number. Defaults to None (every camera).
+        start (Optional[datetime]): The first capture time. Defaults to None (no limit).
+        end (Optional[datetime]): The last capture time (excluded). Defaults to None (no limit).
+
+    Returns:
+        pd.DataFrame: One row per frame, sorted by camera and capture time.
+    """
+    if os.path.splitext(path)[1].lower() in ('.sqlite', '.db'):
+        conditions, parameters = [], []
+        for condition, value in (("camera = ?", camera), ("capture_time >= ?", start), ("capture_time < ?", end)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value.isoformat(timespec='milliseconds') if isinstance(value, datetime) else value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with sqlite3.connect(path) as connection:
+            results = pd.read_sql_query(f"SELECT * FROM frames{where} ORDER BY camera, capture_time", connection,
+                                        params=parameters)
+        results['capture_time'] = pd.to_datetime(results['capture_time'])
+        for detector in DETECTORS:
+            results[detector] = results[detector].map(json.loads)
+        return results
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([('camera', pa.int32()), ('date', pa.string())]), flavor='hive')
+    dataset = ds.dataset(path, format='parquet', partitioning=partitioning)
+    conditions = []
+    if camera is not None:
+        conditions.append(ds.field('camera') == camera)
+    if start is not None:
+        conditions += [ds.field('date') >= start.date().isoformat(), ds.field('capture_time') >= start]
+    if end is not None:
+        conditions += [ds.field('date') <= end.date().isoformat(), ds.field('capture_time') < end]
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    results = dataset.to_table(filter=expression).to_pandas()
+    return results.sort_values(['camera', 'capture_time'], ignore_index=True)
@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class Stage(NamedTuple):
+    """
+    A stage of the processing of a frame.
+
+    The function is called with the results of the dependencies, in the order of `dependencies`.
+    """
+    function: Callable[..., Any]
+    dependencies: Tuple[str, ...] = ()
+
+
+class StageExecutor:
+    """
+    Run the stages of a frame, sequentially or concurrently on a thread pool.
+
+    A stage starts as soon as all its dependencies are done. OpenCV and torch release the GIL during their
+    computations, so independent stages run in parallel and the latency of a frame drops to roughly the
+    latency of its slowest chain of stages.
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Create the executor. The threads are only started on the first concurrent run.
+
+        Args:
+            max_workers (Optional[int]): Maximum number of threads. Defaults to None (ThreadPoolExecutor default).
+        """
+        self.max_workers = max_workers
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def run(self, stages: Dict[str, Stage], parallel: bool = False) -> Dict[str, Any]:
+        """
+        Run the stages and return their results.
+
+        Args:
+            stages (Dict[str, Stage]): The stages by name. In sequential mode they run in this order,
+                so each stage must come after its dependencies.
+            parallel (bool): If True, independent stages run concurrently. Defaults to False.
+
+        Raises:
+            ValueError: If a dependency is unknown or the dependencies form a cycle.
+
+        Returns:
+            Dict[str, Any]: The result of each stage, by name.
+        """
+        if parallel:
+            return self._run_parallel(stages)
+        return self._run_sequential(stages)
+
+    @staticmethod
+    def _run_sequential(stages: Dict[str, Stage]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        for name, stage in stages.items():
+            missing = [dependency for dependency in stage.dependencies if dependency not in results]
+            if missing:
+                raise ValueError(f"Erreur: L'étape {name} dépend d'étapes non exécutées {missing}.")
+            results[name] = stage.function(*[results[dependency] for dependency in stage.dependencies])
+        return results
+
+    def _run_parallel(self, stages: Dict[str, Stage]) -> Dict[str, Any]:
+        with self.lock:
+            # Several videos may start their first concurrent frame at the same time
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage')
+            pool = self.pool
+
+        results: Dict[str, Any] = {}
+        pending = dict(stages)
+        running: Dict[Future, str] = {}
+        try:
+            while pending or running:
+                ready = [name for name, stage in pending.items()
+                         if all(dependency in results for dependency in stage.dependencies)]
+                for name in ready:
+                    stage = pending.pop(name)
+                    arguments = [results[dependency] for dependency in stage.dependencies]
+                    running[pool.submit(stage.function, *arguments)] = name
+
+                if not running:
+                    raise ValueError(f"Erreur: Dépendances inconnues ou circulaires pour {list(pending)}.")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        finally:
+            for future in running:
+                future.cancel()
+        return results
+
+    def shutdown(self) -> None:
+        """
+        Stop the threads of the executor.
+        """
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
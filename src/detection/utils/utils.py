@@ -1,10 +1,12 @@
+import math
 import os
 import re
 import cv2
 import numpy as np
-import pandas as pd
 from typing import List, Tuple, Optional, Any
 
+from src.detection.utils.detections import Detections
+
 def extract_camera_data(video_path: str) -> Tuple[int, Optional[str]]:
     """
     Extract the camera number and time from the video filename.
@@ -78,37 +80,58 @@ def draw_parallelogram(image: np.ndarray, pts: List[Tuple[int, int]], color: Tup
     cv2.polylines(image, [pts], isClosed=True, color=color, thickness=thickness)
 
 
-def draw_detections(frame: Any, detections_df: pd.DataFrame) -> None:
+def draw_detections(frame: Any, detections: Any) -> None:
     """
     Draw the detections on the given frame.
 
     Args:
         frame (Any): The frame on which to draw the detections.
-        detections_df (pd.DataFrame): The DataFrame containing the detections.
+        detections (Any): The detections, as Detections or as a DataFrame.
     """
-    for index, row in detections_df.iterrows():
-        x1, y1, x2, y2 = int(row['xmin']), int(row['ymin']), int(row['xmax']), int(row['ymax'])
-        color = (0, 255, 0)  # Green for detected objects
+    detections = Detections.coerce(detections)
+    color = (0, 255, 0)  # Green for detected objects
+    for (x1, y1, x2, y2), confidence, name in zip(detections.boxes.astype(int).tolist(),
+                                                  detections.confidence.tolist(), detections.names):
         draw_rectangle(frame, (x1, y1), (x2, y2), color, 2)
-        if row['name'] is not None and row['confidence'] is not None:
-            draw_text(frame, f"{row['name']} ({row['confidence']:.2f})", (x1, y1 - 10), color, 0.5, 2)
+        if name is not None and not math.isnan(confidence):
+            draw_text(frame, f"{name} ({confidence:.2f})", (x1, y1 - 10), color, 0.5, 2)
+
 
+def classification_label(classification: list) -> Optional[Tuple[str, Tuple[int, int, int]]]:
+    """
+    Return the label of the empty/full classification and its color.
 
-def draw_classification(frame: Any, classification_df: list) -> None:
+    Args:
+        classification (list): The list containing the classification results.
+
+    Returns:
+        Optional[Tuple[str, Tuple[int, int, int]]]: The label and its color (green for empty, red for full), or None
+            if there is no result or its class is neither empty nor full.
+    """
+    if not classification:
+        return None
+    match classification[0].class_name:
+        case 'empty':
+            color = (0, 255, 0)
+        case 'full':
+            color = (0, 0, 255)
+        case _:
+            return None
+    return f"{classification[0].class_name} ({classification[0].confidence:.2f})", color
+
+
+def draw_classification(frame: Any, classification_df: list, position: Tuple[int, int] = (10, 30),
+                        font_scale: float = 0.5, thickness: int = 2) -> None:
     """
     Draw the classification on the given frame.
 
     Args:
         frame (Any): The frame on which to draw the classification.
         classification_df (list): The list containing the classification results.
+        position (Tuple[int, int]): The position of the label. Defaults to (10, 30).
+        font_scale (float): The scale of the font. Defaults to 0.5.
+        thickness (int): The thickness of the text. Defaults to 2.
     """
-    if classification_df[0].class_name == 'empty':
-        draw_text(frame,
-                  f"{classification_df[0].class_name} ({classification_df[0].confidence:.2f})",
-                  (10, 30),
-                  (0, 255, 0), 0.5, 2)
-    elif classification_df[0].class_name == 'full':
-        draw_text(frame,
-                  f"{classification_df[0].class_name} ({classification_df[0].confidence:.2f})",
-                  (10, 30),
-                  (0, 0, 255), 0.5, 2)
+    label = classification_label(classification_df)
+    if label is not None:
+        draw_text(frame, label[0], position, label[1], font_scale, thickness)
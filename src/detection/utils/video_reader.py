@@ -0,0 +1,309 @@
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, Iterator, NamedTuple, Optional, Tuple
+
+SKIP_STRATEGIES = ('auto', 'read', 'grab', 'seek')
+
+# From this skip on, 'auto' seeks to the analysed frames instead of grabbing the skipped ones.
+# Measured with benchmarks/bench_frame_skipping.py (1280x800, 25 frames/sec): seek is 3.6x faster than grab
+# with 100 skipped images, but slower with 25 and below because each seek decodes again from the keyframe.
+SEEK_SKIP_THRESHOLD = 50
+
+# What the decoder thread does when the prefetch queue is full
+OVERFLOW_POLICIES = ('block', 'drop_oldest')
+
+# Default number of decoded frames waiting to be analysed
+PREFETCH_DEPTH = 8
+
+
+class SampledFrame(NamedTuple):
+    """
+    An analysed frame of a video.
+    """
+    index: int  # Index of the frame in the video
+    timestamp: Optional[float]  # Seconds since the start of the video (None if the frame rate is unknown)
+    frame: np.ndarray
+    captured_at: Optional[float] = None  # time.perf_counter() when the frame was decoded, for the latency
+
+
+def read_sampled_frames(cap: Any, nb_of_img_skip_between_2: int,
+                        strategy: str = 'auto') -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Read the frames of a video keeping one image out of (nb_of_img_skip_between_2 + 1).
+
+    The analysed frames are the same for every strategy (0-based indices n, 2n + 1, 3n + 2, ...),
+    only the way the skipped frames are handled changes:
+        - 'read': every frame is decoded and converted, then the skipped ones are discarded.
+        - 'grab': the skipped frames are only grabbed, without retrieve(). grab() still decodes each of them,
+          so this only saves the colour conversion and the copy of the skipped frames.
+        - 'seek': the capture jumps to the next analysed frame with CAP_PROP_POS_FRAMES. When the
+          backend lands on the previous keyframe instead, the missing frames are grabbed from there. When
+          the timestamp of the decoded frame shows that the seek missed, the video is read sequentially.
+        - 'auto': 'seek' when nb_of_img_skip_between_2 >= SEEK_SKIP_THRESHOLD, 'grab' otherwise.
+
+    Args:
+        cap (Any): The opened cv2.VideoCapture.
+        nb_of_img_skip_between_2 (int): Number of images to skip between 2 images.
+        strategy (str): One of 'auto', 'read', 'grab' or 'seek'. Defaults to 'auto'.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+
+    Returns:
+        Iterator[Tuple[int, np.ndarray]]: The index of each analysed frame and the frame itself.
+    """
+    if strategy == 'auto':
+        strategy = 'seek' if nb_of_img_skip_between_2 >= SEEK_SKIP_THRESHOLD else 'grab'
+
+    match strategy:
+        case 'read':
+            return _read_all_frames(cap, nb_of_img_skip_between_2)
+        case 'grab':
+            return _grab_skipped_frames(cap, nb_of_img_skip_between_2)
+        case 'seek':
+            return _seek_sampled_frames(cap, nb_of_img_skip_between_2)
+        case _:
+            raise ValueError(f"Erreur: Stratégie de lecture inconnue {strategy}, choisir parmi {SKIP_STRATEGIES}.")
+
+
+def _read_all_frames(cap: Any, nb_of_img_skip_between_2: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode every frame and keep one image out of (nb_of_img_skip_between_2 + 1).
+    """
+    frame_count = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+
+        frame_count += 1
+        if frame_count % (nb_of_img_skip_between_2 + 1) != 0:
+            continue
+
+        yield frame_count - 1, frame
+
+
+def _grab_skipped_frames(cap: Any, nb_of_img_skip_between_2: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Grab the skipped frames without retrieving them and read only the analysed ones.
+    """
+    frame_index = -1
+    while True:
+        for _ in range(nb_of_img_skip_between_2):
+            if not cap.grab():
+                return
+            frame_index += 1
+
+        ret, frame = cap.read()
+        if not ret:
+            return
+        frame_index += 1
+
+        yield frame_index, frame
+
+
+def _seek_sampled_frames(cap: Any, nb_of_img_skip_between_2: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Seek directly to each analysed frame, falling back to grabbing from the keyframe the backend landed on.
+
+    Some backends report the requested position after an inaccurate seek, so the frame actually decoded is
+    checked with its timestamp. When the seek cannot be trusted, the frames are read sequentially from where the
+    backend is, starting at the next analysed frame.
+    """
+    step = nb_of_img_skip_between_2 + 1
+    target = nb_of_img_skip_between_2
+    seek_is_reliable = True
+    fps = cap.get(cv2.CAP_PROP_FPS)
+
+    while True:
+        if seek_is_reliable:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+            if position > target or position < 0:
+                # The backend cannot tell where it is or went past the frame: continue sequentially
+                seek_is_reliable = False
+                position = max(position, 0)
+                target = _next_sampled_index(position, nb_of_img_skip_between_2)
+            # Keyframe-aligned seek: decode forward up to the requested frame
+            if not _grab_frames(cap, target - position):
+                return
+
+        ret, frame = cap.read()
+        if not ret:
+            return
+
+        if seek_is_reliable:
+            landed = _decoded_frame_index(cap, fps)
+            if landed is not None and landed != target:
+                # The reported position was wrong: continue sequentially from the frame actually decoded
+                seek_is_reliable = False
+                target = _next_sampled_index(landed, nb_of_img_skip_between_2)
+                if target != landed:
+                    if not _grab_frames(cap, target - landed - 1):
+                        return
+                    ret, frame = cap.read()
+                    if not ret:
+                        return
+
+        yield target, frame
+
+        if not seek_is_reliable:
+            if not _grab_frames(cap, nb_of_img_skip_between_2):
+                return
+        target += step
+
+
+def _next_sampled_index(index: int, nb_of_img_skip_between_2: int) -> int:
+    """
+    Return the first analysed frame (n, 2n + 1, 3n + 2, ...) at or after a frame index.
+    """
+    return index + (nb_of_img_skip_between_2 - index) % (nb_of_img_skip_between_2 + 1)
+
+
+def _decoded_frame_index(cap: Any, fps: float) -> Optional[int]:
+    """
+    Return the index of the last decoded frame from its timestamp, or None if the frame rate is unknown.
+    """
+    if fps <= 0:
+        return None
+    return int(round(cap.get(cv2.CAP_PROP_POS_MSEC) * fps / 1000))
+
+
+def _grab_frames(cap: Any, count: int) -> bool:
+    """
+    Grab frames without retrieving them, and return False at the end of the video.
+    """
+    for _ in range(count):
+        if not cap.grab():
+            return False
+    return True
+
+
+class PrefetchReader:
+    """
+    Reader decoding the sampled frames of a video in a background thread, so decoding overlaps with the analysis.
+
+    The decoder thread applies the skip strategy (see read_sampled_frames) and fills a bounded queue of
+    SampledFrame. When the queue is full, it either waits for the analysis ('block', every sampled frame is
+    analysed) or drops the oldest queued frame ('drop_oldest', the analysis keeps up with the most recent frames).
+    With a depth of 0, the frames are decoded in the calling thread.
+
+    The capture must not be used elsewhere until the reader is closed.
+    """
+    _END = object()
+
+    def __init__(self, cap: Any, nb_of_img_skip_between_2: int, strategy: str = 'auto',
+                 depth: int = PREFETCH_DEPTH, overflow: str = 'block'):
+        """
+        Prepare the reader. The decoder thread starts with the iteration.
+
+        Args:
+            cap (Any): The opened cv2.VideoCapture.
+            nb_of_img_skip_between_2 (int): Number of images to skip between 2 images.
+            strategy (str): One of SKIP_STRATEGIES. Defaults to 'auto'.
+            depth (int): Maximum number of decoded frames waiting in the queue. Defaults to PREFETCH_DEPTH.
+            overflow (str): One of OVERFLOW_POLICIES. Defaults to 'block'.
+
+        Raises:
+            ValueError: If the strategy or the overflow policy is unknown.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Erreur: Politique de débordement inconnue {overflow}, "
+                             f"choisir parmi {OVERFLOW_POLICIES}.")
+        self.frames = read_sampled_frames(cap, nb_of_img_skip_between_2, strategy)
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+        self.fps = fps if fps > 0 else None
+        self.depth = depth
+        self.overflow = overflow
+        self.queue: queue.Queue = queue.Queue(maxsize=max(depth, 1))
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def sampled_frame(self, index: int, frame: np.ndarray) -> SampledFrame:
+        """
+        Attach its timestamp and decoding time to a frame.
+        """
+        return SampledFrame(index, index / self.fps if self.fps else None, frame, time.perf_counter())
+
+    def __iter__(self) -> Iterator[SampledFrame]:
+        if self.depth <= 0:
+            for index, frame in self.frames:
+                yield self.sampled_frame(index, frame)
+            return
+
+        self.thread = threading.Thread(target=self._decode, name="frame-prefetch", daemon=True)
+        self.thread.start()
+        while True:
+            item = self.queue.get()
+            if item is self._END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _decode(self) -> None:
+        """
+        Decode the sampled frames into the queue, then put the end marker (or the error of the decoder).
+        """
+        try:
+            for index, frame in self.frames:
+                if self.stop_event.is_set():
+                    return
+                sampled_frame = self.sampled_frame(index, frame)
+                if self.overflow == 'drop_oldest':
+                    self._put_dropping_oldest(sampled_frame)
+                else:
+                    self._put(sampled_frame)
+            self._put(self._END)
+        except Exception as error:
+            self._put(error)
+
+    def _put(self, item: Any) -> None:
+        """
+        Wait for a free place in the queue, unless the reader is closed.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _put_dropping_oldest(self, item: Any) -> None:
+        """
+        Put a frame in the queue, dropping the oldest queued frame if it is full.
+        """
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self) -> None:
+        """
+        Stop the decoder thread and wait for it, so the capture can be released.
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            while self.thread.is_alive():
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    self.thread.join(0.05)
+            self.thread = None
+
+    def __enter__(self) -> 'PrefetchReader':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Queue shared with the main process, set in each worker by init_worker
+progress_queue: Optional[Any] = None
+
+# Environment variables read by the thread pools of torch, NumPy and OpenCV
+THREAD_ENV_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'OPENCV_FOR_THREADS_NUM')
+
+
+def init_worker(threads_per_worker: int, worker_progress_queue: Any, resources: Tuple[str, ...] = ()) -> None:
+    """
+    Initialize a worker process: cap its CPU threads and load the models of the run once.
+
+    A resource that fails to load is reported and left to be loaded on first use, so that the videos not using
+    it are still analysed.
+
+    Args:
+        threads_per_worker (int): Maximum number of threads used by torch and OpenCV in the worker.
+        worker_progress_queue (Any): The queue where the progress of the videos is sent.
+        resources (Tuple[str, ...]): The resources of the registry loaded before the first video. Defaults to ().
+    """
+    global progress_queue
+    progress_queue = worker_progress_queue
+
+    # The workers are spawned, so the limits are set before torch and OpenCV start their thread pools
+    for variable in THREAD_ENV_VARIABLES:
+        os.environ[variable] = str(threads_per_worker)
+
+    import cv2
+    cv2.setNumThreads(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass
+
+    # Load the models once per worker, before the first video
+    import src.detection.objet_detection  # noqa: F401
+    from src.detection.utils.registry import registry
+    for name in resources:
+        try:
+            registry.preload(name)
+        except Exception as error:
+            print(f"Erreur: Échec du préchargement de {name}, chargé à la première utilisation : {error}")
+
+
+def report_progress(progress: Dict[str, Any]) -> None:
+    """
+    Send the progress of a video to the main process.
+
+    Args:
+        progress (Dict[str, Any]): The progress reported by process_video.
+    """
+    if progress_queue is not None:
+        progress_queue.put({'type': 'progress', 'pid': os.getpid(), **progress})
+
+
+def process_video_task(video_path: str, nb_of_img_skip_between_2: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process one video in a worker process.
+
+    Args:
+        video_path (str): The path to the video file.
+        nb_of_img_skip_between_2 (int): Number of images to skip between 2 images.
+        options (Dict[str, Any]): Options forwarded to process_video.
+
+    Returns:
+        Dict[str, Any]: The statistics returned by process_video.
+    """
+    from src.detection.objet_detection import process_video
+
+    return process_video(video_path, nb_of_img_skip_between_2, progress_callback=report_progress, **options)
+
+
+def iter_videos_in_pool(videos: List[Tuple[str, Dict[str, Any]]], nb_of_img_skip_between_2: int,
+                        workers: Optional[int] = None,
+                        threads_per_worker: Optional[int] = None,
+                        resources: Iterable[str] = ()) -> Iterator[Dict[str, Any]]:
+    """
+    Process videos in a bounded pool of processes and merge their progress and results in one stream.
+
+    Each worker loads the models of the run once at startup and processes the videos one after the other.
+    The CPU threads of each worker are capped so that the workers do not over-subscribe the cores.
+
+    Args:
+        videos (List[Tuple[str, Dict[str, Any]]]): The path of each video with the options of process_video.
+        nb_of_img_skip_between_2 (int): Number of images to skip between 2 images.
+        workers (Optional[int]): Number of worker processes. Defaults to None (one per core).
+        threads_per_worker (Optional[int]): Threads allowed to torch and OpenCV in each worker.
+            Defaults to None (cores divided by the number of workers).
+        resources (Iterable[str]): The resources of the registry loaded by each worker at startup (see
+            stage_resources), the others are loaded on first use. Defaults to ().
+
+    Returns:
+        Iterator[Dict[str, Any]]: Events of type 'progress' (one per analysed frame), 'result' (statistics
+            of a finished video) or 'error' (video that failed), in the order they happen.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, len(videos) or 1))
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        worker_progress_queue = manager.Queue()
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                                 initargs=(threads_per_worker, worker_progress_queue, tuple(resources))) as pool:
+            futures = {pool.submit(process_video_task, video_path, nb_of_img_skip_between_2, options): video_path
+                       for video_path, options in videos}
+
+            while futures:
+                done, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+                yield from _drain(worker_progress_queue)
+
+                for future in done:
+                    video_path = futures.pop(future)
+                    try:
+                        yield {'type': 'result', 'video': video_path, 'stats': future.result()}
+                    except Exception as error:
+                        yield {'type': 'error', 'video': video_path, 'error': repr(error)}
+
+        yield from _drain(worker_progress_queue)
+
+
+def _drain(worker_progress_queue: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the progress events waiting in the queue.
+    """
+    while True:
+        try:
+            yield worker_progress_queue.get_nowait()
+        except queue.Empty:
+            return
@@ -1,19 +1,28 @@
 from typing import Any
-import pandas as pd
 import os
 import sys
-from inference import get_model
-from shapely.geometry import Polygon, box
+from shapely.geometry import Polygon
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.config.config_loader import load_config, get_windows_detection
+from src.config.config_loader import load_config, get_ai_model_config
+from src.detection.ai.backends import load_backend
+from src.detection.utils.detections import Detections
+from src.detection.utils.registry import registry
+from src.detection.windows.occlusion import is_occluded
 
-config = load_config()
-roboflow_api_key, model_id = get_windows_detection(config)
-if not os.environ.get('ROBOFLOW_API_KEY'):
-    os.environ['ROBOFLOW_API_KEY'] = roboflow_api_key
-model_windows = get_model(model_id=model_id)
+def load_model_windows() -> Any:
+    """
+    Load the window segmentation model with the backend selected in the configuration (Roboflow by default).
+
+    Returns:
+        Any: The model backend.
+    """
+    config = load_config()
+    return load_backend(get_ai_model_config(config, 'ai-windows'), 'segment')
+
+
+registry.register('windows_finetuning', load_model_windows)
 
 def detection_windows(frame: Any) -> list[Polygon]:
     """
@@ -25,7 +34,7 @@ def detection_windows(frame: Any) -> list[Polygon]:
     Returns:
         list[Polygon]: The list of polygons.
     """
-    results = model_windows.infer(image=frame)[0]
+    results = registry.get('windows_finetuning').infer(image=frame)[0]
 
     polygons = []
     for prediction in results.predictions:
@@ -34,27 +43,25 @@ def detection_windows(frame: Any) -> list[Polygon]:
 
     return polygons
 
-def filter_occluded_objects(df: pd.DataFrame, occlusion_polygons: list[Polygon]) -> pd.DataFrame:
+def filter_occluded_objects(detections: Any, occlusion_polygons: list[Polygon]) -> Detections:
     """
-    Filter the occluded objects from the DataFrame of detections.
+    Filter the occluded objects from the detections.
+
+    An object is occluded when at least 75% of its box is inside one of the polygons. The ratios of all
+    the (object, polygon) pairs are computed at once (see occlusion_ratio_matrix).
 
     Args:
-        df (pd.DataFrame): The DataFrame containing the detections.
+        detections (Any): The detections, as Detections or as a DataFrame.
         occlusion_polygons (list[Polygon]: The list of polygons (windows).
 
     Returns:
-        pd.DataFrame: The filtered DataFrame containing the detections.
+        Detections: The detections of the objects that are not occluded.
     """
-    # Fonction pour vérifier le pourcentage d'occlusion d'un objet
-    def is_occluded(row):
-        obj_polygon = box(row['xmin'], row['ymin'], row['xmax'], row['ymax'])
-        obj_area = obj_polygon.area
+    detections = Detections.coerce(detections)
+    if detections.empty or not occlusion_polygons:
+        return detections
 
-        for occ_poly in occlusion_polygons:
-            intersection = obj_polygon.intersection(occ_poly)
-            if intersection.area / obj_area >= 0.75:
-                return True
-        return False
+    occluded = is_occluded(detections.boxes, occlusion_polygons, 0.75)
 
     # Filtrer les objets non occlus
-    return df[~df.apply(is_occluded, axis=1)].reset_index(drop=True)
\ No newline at end of file
+    return detections.filter(~occluded)
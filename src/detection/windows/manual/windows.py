@@ -1,7 +1,19 @@
-from shapely.geometry import Polygon, box
+import os
+import sys
+from functools import lru_cache
+import cv2
+import numpy as np
 import pandas as pd
+from shapely.geometry import Polygon
 from typing import List, Tuple
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.detection.windows.occlusion import is_occluded
+
+# Resolution of the tram cameras (height, width)
+DEFAULT_FRAME_SHAPE = (800, 1280)
+
 def define_occlusion_parallelograms(camera: int) -> List[List[Tuple[int, int]]]:
     coord = []
     match camera:
@@ -58,38 +70,136 @@ def define_occlusion_parallelograms(camera: int) -> List[List[Tuple[int, int]]]:
             coord.append([(x9, y9), (x10, y10), (x10, y10 + 800), (x9, y9 + 800)])
             coord.append([(x11, y11), (x12, y12), (x12, y12 + 40), (x11, y11 + 40)])
         case _:
-            print("Erreur : Camera non reconnue")
-            exit()
+            raise ValueError(f"Erreur : Camera {camera} non reconnue, seules les caméras 4, 5, 7 et 8 ont des "
+                             f"zones d'occlusion.")
     return coord
 
 
-def filter_occluded_objects(df: pd.DataFrame, camera_number: int) -> pd.DataFrame:
+@lru_cache(maxsize=None)
+def get_occlusion_polygons(camera: int) -> Tuple[Polygon, ...]:
+    """
+    Convert the occlusion parallelograms of a camera into Polygon objects, once per camera.
+
+    Args:
+        camera (int): The camera number.
+
+    Returns:
+        Tuple[Polygon, ...]: The occlusion polygons.
+    """
+    return tuple(Polygon(zone) for zone in define_occlusion_parallelograms(camera))
+
+
+@lru_cache(maxsize=None)
+def get_exclusion_mask(camera: int, height: int, width: int) -> np.ndarray:
+    """
+    Rasterize the occlusion parallelograms of a camera into a single mask.
+    The mask is computed once per (camera, resolution) and cached.
+
+    Args:
+        camera (int): The camera number.
+        height (int): The height of the frames.
+        width (int): The width of the frames.
+
+    Returns:
+        np.ndarray: A read-only uint8 mask, 0 inside the occlusion zones and 255 elsewhere.
+    """
+    mask = np.full((height, width), 255, np.uint8)
+    for zone in define_occlusion_parallelograms(camera):
+        cv2.fillPoly(mask, [np.array(zone, np.int32)], 0)
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def get_occlusion_integrals(camera: int, height: int, width: int) -> np.ndarray:
+    """
+    Compute the integral image of each rasterized occlusion parallelogram of a camera.
+    The integral images are computed once per (camera, resolution) and cached.
+
+    Args:
+        camera (int): The camera number.
+        height (int): The height of the frames.
+        width (int): The width of the frames.
+
+    Returns:
+        np.ndarray: A read-only array of shape (nb_zones, height + 1, width + 1), where
+            integrals[k, y, x] is the number of pixels of zone k in the rectangle [0, x) x [0, y).
+    """
+    zones = define_occlusion_parallelograms(camera)
+    integrals = np.empty((len(zones), height + 1, width + 1), np.int32)
+    for k, zone in enumerate(zones):
+        zone_mask = np.zeros((height, width), np.uint8)
+        cv2.fillPoly(zone_mask, [np.array(zone, np.int32)], 1)
+        integrals[k] = cv2.integral(zone_mask)
+    integrals.setflags(write=False)
+    return integrals
+
+
+def occlusion_ratios(boxes: np.ndarray, camera_number: int,
+                     frame_shape: Tuple[int, int] = DEFAULT_FRAME_SHAPE) -> np.ndarray:
+    """
+    Compute the fraction of each box covered by each occlusion parallelogram by counting pixels.
+
+    Args:
+        boxes (np.ndarray): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        camera_number (int): The camera number.
+        frame_shape (Tuple[int, int]): The (height, width) of the frames. Defaults to (800, 1280).
+
+    Returns:
+        np.ndarray: Array of shape (N, nb_zones) with the occlusion ratio of each box by each zone.
+    """
+    height, width = frame_shape[:2]
+    integrals = get_occlusion_integrals(camera_number, height, width)
+
+    boxes = np.rint(np.asarray(boxes, dtype=np.float64).reshape(-1, 4)).astype(np.int64)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+    # Pixels outside the frame are never occluded
+    x1 = np.clip(boxes[:, 0], 0, width)
+    y1 = np.clip(boxes[:, 1], 0, height)
+    x2 = np.clip(boxes[:, 2], 0, width)
+    y2 = np.clip(boxes[:, 3], 0, height)
+
+    occluded_pixels = (integrals[:, y2, x2] - integrals[:, y1, x2]
+                       - integrals[:, y2, x1] + integrals[:, y1, x1]).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = occluded_pixels / areas[:, None]
+    return np.where(areas[:, None] > 0, ratios, 0.0)
+
+
+def filter_occluded_objects(df: pd.DataFrame, camera_number: int,
+                            frame_shape: Tuple[int, int] = DEFAULT_FRAME_SHAPE, method: str = 'geometry') -> pd.DataFrame:
     """
     Filter the occluded objects from the DataFrame of detections.
 
+    An object is occluded when at least 95% of its box is inside one of the occlusion parallelograms.
+
     Args:
         df (pd.DataFrame): The DataFrame containing the detections.
         camera_number (int): The camera number.
+        frame_shape (Tuple[int, int]): The (height, width) of the frames. Defaults to (800, 1280).
+        method (str): 'geometry' computes the exact polygon intersections (see occlusion_ratio_matrix), 'mask'
+            counts pixels in the cached rasterized parallelograms, which can differ from the exact ratio by a few
+            pixels at the edges of the zones. Defaults to 'geometry'.
+
+    Raises:
+        ValueError: If the method is unknown.
 
     Returns:
         pd.DataFrame: The filtered DataFrame containing the detections.
     """
-    # Define the occlusion zones
-    occlusion_zones = define_occlusion_parallelograms(camera_number)
-
-    # Convertir les zones d'occlusion en objets Polygon
-    occlusion_polygons = [Polygon(zone) for zone in occlusion_zones]
+    if df.empty:
+        return df.reset_index(drop=True)
 
-    # Fonction pour vérifier le pourcentage d'occlusion d'un objet
-    def is_occluded(row):
-        obj_polygon = box(row['xmin'], row['ymin'], row['xmax'], row['ymax'])
-        obj_area = obj_polygon.area
-
-        for occ_poly in occlusion_polygons:
-            intersection = obj_polygon.intersection(occ_poly)
-            if intersection.area / obj_area >= 0.95:
-                return True
-        return False
+    boxes = df[['xmin', 'ymin', 'xmax', 'ymax']].to_numpy()
+    match method:
+        case 'mask':
+            occluded = (occlusion_ratios(boxes, camera_number, frame_shape) >= 0.95).any(axis=1)
+        case 'geometry':
+            occluded = is_occluded(boxes, get_occlusion_polygons(camera_number), 0.95)
+        case _:
+            raise ValueError(f"Erreur: Méthode d'occlusion inconnue {method}.")
 
     # Filtrer les objets non occlus
-    return df[~df.apply(is_occluded, axis=1)].reset_index(drop=True)
+    return df[~occluded].reset_index(drop=True)
@@ -0,0 +1,57 @@
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from typing import Sequence
+
+
+def occlusion_ratio_matrix(boxes: np.ndarray, occlusion_polygons: Sequence[Polygon]) -> np.ndarray:
+    """
+    Compute the fraction of each box covered by each occlusion polygon in one call.
+
+    The boxes are built with the vectorized Shapely 2.0 functions and an STRtree of the polygons selects the
+    (box, polygon) pairs that intersect, so the intersections are only computed for those pairs.
+
+    Args:
+        boxes (np.ndarray): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        occlusion_polygons (Sequence[Polygon]): The M occlusion polygons (windows).
+
+    Returns:
+        np.ndarray: Array of shape (N, M) where [i, j] is the area of box i inside polygon j divided by
+            the area of box i (0 for boxes with an empty area).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    ratios = np.zeros((len(boxes), len(occlusion_polygons)))
+    if len(boxes) == 0 or len(occlusion_polygons) == 0:
+        return ratios
+
+    box_geometries = shapely.box(boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3])
+    polygons = np.asarray(occlusion_polygons, dtype=object)
+
+    # Pairs (box, polygon) whose bounding boxes and geometries intersect
+    tree = shapely.STRtree(polygons)
+    box_indices, polygon_indices = tree.query(box_geometries, predicate='intersects')
+    if len(box_indices) == 0:
+        return ratios
+
+    box_areas = shapely.area(box_geometries)
+    intersection_areas = shapely.area(shapely.intersection(box_geometries[box_indices], polygons[polygon_indices]))
+
+    pair_areas = box_areas[box_indices]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios[box_indices, polygon_indices] = np.where(pair_areas > 0, intersection_areas / pair_areas, 0.0)
+    return ratios
+
+
+def is_occluded(boxes: np.ndarray, occlusion_polygons: Sequence[Polygon], threshold: float) -> np.ndarray:
+    """
+    Tell which boxes are covered by one of the occlusion polygons at least up to the threshold.
+
+    Args:
+        boxes (np.ndarray): Array of shape (N, 4) containing xmin, ymin, xmax, ymax.
+        occlusion_polygons (Sequence[Polygon]): The occlusion polygons (windows).
+        threshold (float): Minimum fraction of the box inside a single polygon.
+
+    Returns:
+        np.ndarray: Boolean array of shape (N,).
+    """
+    return (occlusion_ratio_matrix(boxes, occlusion_polygons) >= threshold).any(axis=1)
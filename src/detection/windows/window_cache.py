@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import numpy as np
+import cv2
+from shapely.geometry import Polygon
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.detection.utils.frame_context import FrameContext
+from src.detection.windows.manual.windows import get_occlusion_polygons
+
+# Size (width, height) of the grayscale thumbnails compared to detect a change of scene
+THUMBNAIL_SIZE = (64, 36)
+
+# Mean absolute difference (gray levels) between two thumbnails above which the windows are detected again
+SCENE_CHANGE_THRESHOLD = 20.0
+
+
+class CameraWindows:
+    """
+    Windows of a camera and the state used to decide when to detect them again.
+    """
+    def __init__(self):
+        self.polygons: Optional[List[Polygon]] = None
+        self.thumbnail: Optional[np.ndarray] = None
+        self.age = 0
+        self.lock = threading.Lock()
+
+
+class WindowCache:
+    """
+    Cache of the window polygons of each camera.
+
+    The windows of the tram are fixed relative to the camera, so the segmentation model only runs every
+    `refresh_interval` frames, or earlier when the scene changes (mean difference between grayscale thumbnails
+    of the frame and of the frame of the last detection). When the model fails or detects no window (empty or
+    degenerate polygons only), the last detected windows are kept, or the manual parallelograms of the camera are
+    used if the windows were never detected.
+    """
+    def __init__(self, change_threshold: float = SCENE_CHANGE_THRESHOLD,
+                 thumbnail_size: Tuple[int, int] = THUMBNAIL_SIZE):
+        """
+        Create an empty cache.
+
+        Args:
+            change_threshold (float): Mean absolute difference (gray levels) between the thumbnails above which
+                the windows are detected again. Defaults to SCENE_CHANGE_THRESHOLD.
+            thumbnail_size (Tuple[int, int]): Size (width, height) of the thumbnails. Defaults to THUMBNAIL_SIZE.
+        """
+        self.change_threshold = change_threshold
+        self.thumbnail_size = thumbnail_size
+        self.cameras: Dict[int, CameraWindows] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _camera(self, camera: int) -> CameraWindows:
+        with self.lock:
+            return self.cameras.setdefault(camera, CameraWindows())
+
+    def scene_change(self, camera: int, context: FrameContext) -> float:
+        """
+        Measure the change of scene since the last detection of the windows of a camera.
+
+        Args:
+            camera (int): The index of the camera.
+            context (FrameContext): The context of the frame.
+
+        Returns:
+            float: The mean absolute difference in gray levels (inf if the windows were never detected).
+        """
+        state = self._camera(camera)
+        if state.thumbnail is None:
+            return float('inf')
+        thumbnail = context.downscaled(self.thumbnail_size, gray=True)
+        return float(cv2.absdiff(thumbnail, state.thumbnail).mean())
+
+    def get(self, camera: int, context: FrameContext, detect: Callable[[np.ndarray], List[Polygon]],
+            refresh_interval: int) -> List[Polygon]:
+        """
+        Return the windows of a camera, detecting them again only when they are stale.
+
+        Args:
+            camera (int): The index of the camera.
+            context (FrameContext): The context of the frame.
+            detect (Callable[[np.ndarray], List[Polygon]]): The window detection (see detection_windows).
+            refresh_interval (int): Number of frames after which the windows are detected again.
+
+        Returns:
+            List[Polygon]: The polygons of the windows.
+        """
+        state = self._camera(camera)
+        with state.lock:
+            state.age += 1
+            if (state.polygons is not None and state.age < refresh_interval
+                    and self.scene_change(camera, context) <= self.change_threshold):
+                with self.lock:
+                    self.hits += 1
+                return state.polygons
+
+            # The counters are shared by the cameras, whose frames can be analysed by different threads
+            with self.lock:
+                self.misses += 1
+            try:
+                # The degenerate polygons (less than 3 distinct points) are dropped, no window at all is a failure
+                polygons = [polygon for polygon in detect(context.frame) if polygon.area > 0]
+                if not polygons:
+                    raise ValueError("aucune fenêtre détectée")
+                state.polygons = polygons
+            except Exception as error:
+                # Keep the last detected windows, or use the manual parallelograms until the next refresh
+                print(f"Erreur: Détection des fenêtres impossible pour la caméra {camera} ({error}).")
+                if state.polygons is None:
+                    state.polygons = list(get_occlusion_polygons(camera))
+            state.thumbnail = context.downscaled(self.thumbnail_size, gray=True)
+            state.age = 0
+            return state.polygons
+
+    def reset(self, camera: Optional[int] = None) -> None:
+        """
+        Forget the windows of a camera, they are detected again on the next frame.
+
+        Args:
+            camera (Optional[int]): The index of the camera. Defaults to None (every camera).
+        """
+        with self.lock:
+            if camera is None:
+                self.cameras.clear()
+            else:
+                self.cameras.pop(camera, None)
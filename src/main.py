@@ -2,8 +2,8 @@ import os, sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 
-from src.config.config_loader import load_config, get_video_path
-from src.detection.objet_detection import process_videos
+from src.config.config_loader import load_config, get_streams, get_video_path
+from src.detection.objet_detection import process_sources, process_videos
 
 
 def main():
@@ -11,9 +11,16 @@ def main():
     Main function to load configuration, get video path, and process videos.
 
     This function loads the configuration, retrieves the video path from the configuration,
-    and processes the videos in the specified path.
+    and processes the videos in the specified path. The sources given as arguments (video files, folders of
+    images, rtsp:// or http:// streams) or else the live streams of the `streams` section of the configuration
+    are analysed instead, at the same time.
     """
     config = load_config()
+    sources = sys.argv[1:] or [stream['url'] for stream in get_streams(config)]
+    if sources:
+        process_sources(sources, 100, config)
+        return
+
     video_path = get_video_path(config)
 
     process_videos(video_path, 100)
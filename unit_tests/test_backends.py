@@ -0,0 +1,111 @@
+import unittest
+
+import numpy as np
+
+from src.detection.ai.backends import LocalYoloBackend, load_backend
+
+
+class TestLocalYoloBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a 1280x720 frame, letterboxed by the backends into 640x640 with a scale of 0.5
+        and a padding of 140 pixels at the top.
+        """
+        self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    @staticmethod
+    def detection_output(nb_mask_coefficients: int = 0) -> np.ndarray:
+        """
+        Build a YOLO output with 2 classes and 2 anchors: one confident box and one below the threshold.
+        """
+        anchors = np.zeros((2, 4 + 2 + nb_mask_coefficients), dtype=np.float32)
+        anchors[0, :6] = [320, 320, 100, 50, 0.1, 0.9]
+        anchors[1, :6] = [100, 300, 20, 20, 0.2, 0.1]
+        if nb_mask_coefficients:
+            anchors[:, 6] = 10.0
+        return anchors.T[np.newaxis]
+
+    def test_detect(self) -> None:
+        """
+        Test that the detections are mapped back to the frame with the attributes of the Roboflow predictions.
+        """
+        backend = LocalYoloBackend('', 'detect', class_names=['person', 'dog'],
+                                   session=lambda blob: [self.detection_output()])
+        predictions = backend.infer(image=self.frame)[0].predictions
+
+        self.assertEqual(len(predictions), 1)
+        prediction = predictions[0]
+        self.assertEqual(prediction.class_name, 'dog')
+        self.assertEqual(prediction.class_id, 1)
+        self.assertAlmostEqual(prediction.confidence, 0.9, places=5)
+        self.assertEqual((prediction.x, prediction.y, prediction.width, prediction.height), (640, 360, 200, 100))
+
+    def test_classify(self) -> None:
+        """
+        Test that the classes are sorted by decreasing confidence.
+        """
+        backend = LocalYoloBackend('', 'classify', class_names=['empty', 'full'], imgsz=224,
+                                   session=lambda blob: [np.array([[0.2, 0.8]], dtype=np.float32)])
+        predictions = backend.infer(self.frame)[0].predictions
+
+        self.assertEqual([prediction.class_name for prediction in predictions], ['full', 'empty'])
+        self.assertAlmostEqual(predictions[0].confidence, 0.8, places=5)
+
+    def test_segment(self) -> None:
+        """
+        Test that the mask of a segmentation is converted into a polygon inside its box.
+        """
+        protos = np.zeros((1, 32, 160, 160), dtype=np.float32)
+        protos[0, 0] = 1.0
+        backend = LocalYoloBackend('', 'segment', class_names=['window', 'door'],
+                                   session=lambda blob: [self.detection_output(32), protos])
+        predictions = backend.infer(image=self.frame)[0].predictions
+
+        self.assertEqual(len(predictions), 1)
+        points = np.array([(point.x, point.y) for point in predictions[0].points])
+        self.assertGreaterEqual(len(points), 3)
+        np.testing.assert_allclose(points.min(axis=0), [540, 310], atol=4)
+        np.testing.assert_allclose(points.max(axis=0), [740, 410], atol=4)
+
+    def test_detect_batch(self) -> None:
+        """
+        Test that a list of images is detected in one call with a dynamic batch size, or split into batches of
+        the fixed batch size, each image getting its own predictions.
+        """
+        crop = np.zeros((360, 640, 3), dtype=np.uint8)
+        for batch_size, expected_calls in ((None, [3]), (2, [2, 1])):
+            calls = []
+
+            def session(blob: np.ndarray) -> list:
+                calls.append(len(blob))
+                return [np.concatenate([self.detection_output()] * len(blob))]
+
+            backend = LocalYoloBackend('', 'detect', class_names=['person', 'dog'], session=session)
+            backend.batch_size = batch_size
+            results = backend.infer([self.frame, crop, self.frame])
+
+            self.assertEqual(calls, expected_calls)
+            self.assertEqual(len(results), 3)
+            self.assertEqual((results[0].predictions[0].x, results[1].predictions[0].x), (640, 320))
+
+    def test_unknown_task(self) -> None:
+        """
+        Test that an unknown task raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            LocalYoloBackend('', 'track', session=lambda blob: [])
+
+
+class TestLoadBackend(unittest.TestCase):
+    def test_unknown_backend(self) -> None:
+        """
+        Test that an unknown backend raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            load_backend({'backend': 'tensorrt'}, 'detect')
+
+
+if __name__ == '__main__':
+    unittest.main()
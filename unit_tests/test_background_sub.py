@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from src.detection.background_substraction import background_sub
+from src.detection.background_substraction.background_sub import (background_subtraction,
+                                                                   background_subtraction_on_edges,
+                                                                   get_camera_reference)
+from src.detection.light.equalization.light_fast import enhance_brightness
+from src.detection.utils.detections import Detections
+from src.detection.utils.frame_context import FrameContext
+
+
+class TestBackgroundSubtraction(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method builds a uniform reference frame and a frame containing one object outside the windows.
+        """
+        background_sub.camera_references.clear()
+        self.frame_ref = np.full((800, 1280, 3), 60, dtype=np.uint8)
+        self.frame = self.frame_ref.copy()
+        cv2.rectangle(self.frame, (500, 500), (700, 700), (255, 255, 255), -1)
+
+    def tearDown(self) -> None:
+        background_sub.camera_references.clear()
+
+    def test_camera_reference_is_built_once(self) -> None:
+        """
+        Test that the reference of a camera is computed only once.
+        """
+        with patch.object(background_sub, 'match_frame_reference', return_value=self.frame_ref) as mock_match:
+            reference = get_camera_reference(4)
+            background_subtraction(4, self.frame)
+            background_subtraction_on_edges(4, self.frame)
+
+        mock_match.assert_called_once_with(4)
+        self.assertIs(get_camera_reference(4), reference)
+        self.assertEqual(reference.gray.shape, (800, 1280))
+        self.assertEqual(len(reference.parallelograms), 6)
+
+    def test_unknown_camera(self) -> None:
+        """
+        Test that a camera without reference frame raises a ValueError instead of exiting.
+        """
+        with self.assertRaises(ValueError):
+            background_subtraction(0, self.frame)
+
+    def test_background_subtraction_detects_object(self) -> None:
+        """
+        Test that the object added to the frame is detected by both background subtractions.
+        """
+        with patch.object(background_sub, 'match_frame_reference', return_value=self.frame_ref):
+            detections = background_subtraction(4, self.frame)
+            detections_edges = background_subtraction_on_edges(4, self.frame)
+
+        self.assertIsInstance(detections, Detections)
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(detections.boxes[0].tolist(), [500, 500, 701, 701])
+        self.assertGreaterEqual(len(detections_edges), 1)
+
+    def test_shared_frame_context(self) -> None:
+        """
+        Test that the brightness enhancement runs only once when both subtractions share a FrameContext.
+        """
+        context = FrameContext(self.frame)
+        with patch.object(background_sub, 'match_frame_reference', return_value=self.frame_ref), \
+                patch('src.detection.utils.frame_context.enhance_brightness',
+                      side_effect=enhance_brightness) as mock_enhance:
+            background_subtraction(4, self.frame, context=context)
+            background_subtraction_on_edges(4, self.frame, context=context)
+
+        mock_enhance.assert_called_once_with(self.frame)
+        self.assertIs(context.gray, context.gray)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import os
 import sys
+import json
+import tempfile
+import threading
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 
 import cv2
 import pandas as pd
@@ -10,14 +13,19 @@ import numpy as np
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
 # Functions to unit_tests
-from src.detection.objet_detection import process_frame, process_video, process_videos
+from src.detection.objet_detection import (STAGE_RESOURCES, process_frame, process_sources, process_video,
+                                          process_videos, frame_deduplicator, motion_gate)
+from src.detection.utils.detections import Detections
+from src.detection.utils.metrics import Metrics
 
 @patch('src.detection.background_substraction.background_sub.match_frame_reference', return_value=np.zeros((480, 640, 3), dtype=np.uint8))
 @patch('src.detection.objet_detection.detection_yolov11')
 @patch('src.detection.objet_detection.detection_yolov11_fine_tuning')
 @patch('src.detection.objet_detection.classification_fine_tuning')
+@patch('src.detection.objet_detection.detection_windows', return_value=[])
 class TestDetection(unittest.TestCase):
-    def test_process_frame(self, mock_classification, mock_fine_tuning, mock_detection, mock_match_frame):
+    def test_process_frame(self, mock_detection_windows, mock_classification, mock_fine_tuning, mock_detection,
+                           mock_match_frame):
         """
         Test the process_frame function.
 
@@ -45,11 +53,133 @@ class TestDetection(unittest.TestCase):
         mock_fine_tuning.assert_called_once_with(mock_frame)
         mock_classification.assert_called_once_with(mock_frame)
 
-        self.assertIsInstance(detections_df, pd.DataFrame)
-        self.assertIsInstance(detections_df_finetuning, pd.DataFrame)
+        self.assertIsInstance(detections_df, Detections)
+        self.assertIsInstance(detections_df_finetuning, Detections)
         self.assertIsInstance(classification_df_finetuning, list)
-        self.assertIsInstance(detections_df_subtraction, pd.DataFrame)
-        self.assertIsInstance(detections_df_edgedetection, pd.DataFrame)
+        self.assertIsInstance(detections_df_subtraction, Detections)
+        self.assertIsInstance(detections_df_edgedetection, Detections)
+
+    def test_process_frame_parallel(self, mock_detection_windows, mock_classification, mock_fine_tuning, mock_detection,
+                                    mock_match_frame):
+        """
+        Test that process_frame returns the same results when the stages run concurrently.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.rectangle(mock_frame, (300, 200), (400, 300), (255, 255, 255), -1)
+
+        mock_detection.return_value = pd.DataFrame(
+            {'xmin': [0, 300], 'ymin': [0, 200], 'xmax': [100, 400], 'ymax': [100, 300], 'name': ['chair', 'object'],
+             'confidence': [0.9, 0.8]})
+        mock_fine_tuning.return_value = pd.DataFrame(
+            {'xmin': [10], 'ymin': [10], 'xmax': [90], 'ymax': [90], 'name': ['object'], 'confidence': [0.95]})
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+
+        sequential_results = process_frame(mock_frame, 4, draw_windows=False)
+        parallel_results = process_frame(mock_frame, 4, draw_windows=False, parallel=True)
+
+        self.assertEqual(sequential_results[0].names, ['object'])
+        for sequential_df, parallel_df in zip(sequential_results, parallel_results):
+            if isinstance(sequential_df, Detections):
+                pd.testing.assert_frame_equal(sequential_df.to_dataframe(), parallel_df.to_dataframe())
+            else:
+                self.assertEqual(sequential_df, parallel_df)
+
+    def test_process_frame_deduplicated(self, mock_detection_windows, mock_classification, mock_fine_tuning,
+                                        mock_detection, mock_match_frame):
+        """
+        Test that the stages do not run again for a frame identical to the last analysed frame of the camera.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_detection.return_value = pd.DataFrame(
+            {'xmin': [300], 'ymin': [200], 'xmax': [400], 'ymax': [300], 'name': ['object'], 'confidence': [0.9]})
+        mock_fine_tuning.return_value = pd.DataFrame(columns=['xmin', 'ymin', 'xmax', 'ymax', 'name', 'confidence'])
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+
+        frame_deduplicator.reset()
+        first_results = process_frame(mock_frame, 8, draw_windows=False, deduplicate_frames=True)
+        second_results = process_frame(mock_frame.copy(), 8, draw_windows=False, deduplicate_frames=True)
+
+        mock_detection.assert_called_once()
+        for first_df, second_df in zip(first_results, second_results):
+            self.assertIs(first_df, second_df)
+
+    def test_process_frame_cascade(self, mock_detection_windows, mock_classification, mock_fine_tuning, mock_detection,
+                                   mock_match_frame):
+        """
+        Test that the expensive stages are skipped in cascade mode while the candidates of the background
+        subtraction do not change.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_detection.return_value = pd.DataFrame(
+            {'xmin': [300], 'ymin': [200], 'xmax': [400], 'ymax': [300], 'name': ['object'], 'confidence': [0.9]})
+        mock_fine_tuning.return_value = pd.DataFrame(columns=['xmin', 'ymin', 'xmax', 'ymax', 'name', 'confidence'])
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+
+        motion_gate.reset()
+        first_results = process_frame(mock_frame, 7, draw_windows=False, cascade=True)
+        second_results = process_frame(mock_frame.copy(), 7, draw_windows=False, cascade=True)
+
+        mock_detection.assert_called_once()
+        mock_fine_tuning.assert_called_once()
+        mock_classification.assert_called_once()
+        pd.testing.assert_frame_equal(first_results[0].to_dataframe(), second_results[0].to_dataframe())
+
+    def test_process_frame_metrics(self, mock_detection_windows, mock_classification, mock_fine_tuning, mock_detection,
+                                   mock_match_frame):
+        """
+        Test that the latency of each stage is recorded when the metrics are enabled.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_detection.return_value = Detections()
+        mock_fine_tuning.return_value = Detections()
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+
+        enabled_metrics = Metrics(enabled=True)
+        with patch('src.detection.objet_detection.metrics', enabled_metrics):
+            process_frame(mock_frame, 4, draw_windows=False)
+
+        snapshot = enabled_metrics.snapshot()
+        self.assertEqual(set(snapshot['stages']),
+                         {'windows', 'detections', 'detections_filtered', 'fine_tuning', 'fine_tuning_filtered',
+                          'classification', 'subtraction', 'edge_detection', 'enhancement', 'frame'})
+        self.assertEqual(snapshot['stages']['detections'][4]['count'], 1)
+        self.assertEqual(snapshot['counters'], {'frames': {4: 1}})
+
+    def test_process_frame_batched_yolo(self, mock_detection_windows, mock_classification, mock_fine_tuning,
+                                        mock_detection, mock_match_frame):
+        """
+        Test that YOLO runs through the batcher when one is given.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_fine_tuning.return_value = Detections()
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+        batcher = MagicMock()
+        batcher.detect.return_value = Detections.from_arrays([[0, 0, 100, 100]], [0.9], [0], ['person'])
+
+        detections = process_frame(mock_frame, 4, yolo_batcher=batcher)[0]
+
+        batcher.detect.assert_called_once_with(mock_frame)
+        mock_detection.assert_not_called()
+        self.assertEqual(detections.names, ['person'])
+
+    @patch('src.detection.objet_detection.detection_yolov11_fine_tuning_roi')
+    @patch('src.detection.objet_detection.detection_yolov11_roi')
+    def test_process_frame_roi(self, mock_roi, mock_fine_tuning_roi, mock_detection_windows, mock_classification,
+                               mock_fine_tuning, mock_detection, mock_match_frame):
+        """
+        Test that the detectors receive the candidates of the background subtraction in ROI mode.
+        """
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_roi.return_value = Detections()
+        mock_fine_tuning_roi.return_value = Detections()
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+
+        results = process_frame(mock_frame, 4, draw_windows=False, roi=True)
+
+        mock_detection.assert_not_called()
+        mock_fine_tuning.assert_not_called()
+        self.assertIs(mock_roi.call_args[0][1], results[3])
+        self.assertIs(mock_fine_tuning_roi.call_args[0][1], results[3])
 
 
 @patch('cv2.VideoCapture')
@@ -62,16 +192,14 @@ class TestDetection(unittest.TestCase):
 @patch('src.detection.objet_detection.detection_yolov11')
 @patch('src.detection.objet_detection.detection_yolov11_fine_tuning')
 @patch('src.detection.objet_detection.classification_fine_tuning')
-@patch('src.detection.objet_detection.extract_camera_data')
-@patch('src.detection.objet_detection.draw_detections')
-@patch('src.detection.objet_detection.draw_classification')
+@patch('src.detection.utils.frame_source.extract_camera_data')
 @patch('cv2.cvtColor')
 @patch('src.detection.objet_detection.background_subtraction')
 @patch('src.detection.objet_detection.background_subtraction_on_edges')
 @patch('src.detection.objet_detection.detection_windows')
 class TestVideoProcessing(unittest.TestCase):
     def test_process_video(self, mock_detection_windows, mock_background_subtraction_on_edges, mock_background_subtraction,
-                           mock_cvtColor, mock_draw_classification, mock_draw_detections, mock_extract_camera_data,
+                           mock_cvtColor, mock_extract_camera_data,
                            mock_classification, mock_fine_tuning, mock_detection, mock_move_window, mock_destroy,
                            mock_wait, mock_imshow, mock_resize, mock_named, mock_capture):
         """
@@ -97,6 +225,8 @@ class TestVideoProcessing(unittest.TestCase):
 
         # Mock de la détection des fenêtres
         mock_detection_windows.return_value = []  # Pas de fenêtres détectées dans ce test simplifié
+        mock_background_subtraction.return_value = Detections()
+        mock_background_subtraction_on_edges.return_value = Detections()
 
         # Mock de la conversion de la couleur
         mock_cvtColor.return_value = np.zeros((640, 640, 3), dtype=np.uint8)
@@ -113,9 +243,120 @@ class TestVideoProcessing(unittest.TestCase):
         mock_background_subtraction.assert_called()
         mock_background_subtraction_on_edges.assert_called()
         mock_detection_windows.assert_called()
+        self.assertEqual(mock_imshow.call_count, 2)  # Une seule fenêtre (mosaïque) par image
+        mock_imshow.assert_called_with("Detections", ANY)
         mock_destroy.assert_called_once()
 
 
+@patch('cv2.VideoCapture')
+@patch('cv2.namedWindow')
+@patch('cv2.imshow')
+@patch('cv2.destroyAllWindows')
+@patch('src.detection.objet_detection.detection_yolov11')
+@patch('src.detection.objet_detection.detection_yolov11_fine_tuning')
+@patch('src.detection.objet_detection.classification_fine_tuning')
+@patch('src.detection.objet_detection.background_subtraction')
+@patch('src.detection.objet_detection.background_subtraction_on_edges')
+@patch('src.detection.objet_detection.detection_windows')
+class TestHeadlessVideoProcessing(unittest.TestCase):
+    def test_process_video_headless(self, mock_detection_windows, mock_background_subtraction_on_edges,
+                                    mock_background_subtraction, mock_classification, mock_fine_tuning,
+                                    mock_detection, mock_destroy, mock_imshow, mock_named, mock_capture):
+        """
+        Test the process_video function in headless mode.
+
+        This test verifies that no window is opened and that the results of each analysed frame
+        are written to the JSONL results file.
+        """
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_cap.read.side_effect = [(True, mock_frame), (True, mock_frame), (True, mock_frame), (False, None)]
+        mock_capture.return_value = mock_cap
+
+        empty_df = pd.DataFrame(columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'class', 'name'])
+        mock_detection.return_value = pd.DataFrame(
+            {'xmin': [0], 'ymin': [0], 'xmax': [100], 'ymax': [100], 'name': ['object'], 'confidence': [0.9]})
+        mock_fine_tuning.return_value = empty_df
+        mock_classification.return_value = [MagicMock(class_name='empty', confidence=0.85)]
+        mock_background_subtraction.return_value = empty_df
+        mock_background_subtraction_on_edges.return_value = empty_df
+        mock_detection_windows.return_value = []
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_path = os.path.join(tmp_dir, 'results.jsonl')
+            stats = process_video('CAM4_12h00m00s.mp4', nb_of_img_skip_between_2=0, headless=True,
+                                  results_path=results_path)
+
+            with open(results_path, encoding='utf-8') as file:
+                records = [json.loads(line) for line in file]
+
+        mock_named.assert_not_called()
+        mock_imshow.assert_not_called()
+        mock_destroy.assert_not_called()
+        self.assertEqual(stats['frames_analysed'], 3)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]['camera'], 4)
+        self.assertEqual(records[0]['detections'][0]['name'], 'object')
+        self.assertGreaterEqual(stats['latency_max'], stats['latency_p50'])
+        self.assertEqual(records[0]['classification'][0]['class_name'], 'empty')
+
+    def test_consumers_read_once_per_frame(self, mock_detection_windows, mock_background_subtraction_on_edges,
+                                           mock_background_subtraction, mock_classification, mock_fine_tuning,
+                                           mock_detection, mock_destroy, mock_imshow, mock_named, mock_capture):
+        """
+        Test that the windows are drawn exactly on the frames sent to a consumer whose activity changes over time.
+        """
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.read.side_effect = [(True, np.zeros((480, 640, 3), dtype=np.uint8))] * 3 + [(False, None)]
+        mock_capture.return_value = mock_cap
+
+        class FlickeringConsumer:
+            def __init__(self):
+                self.states = iter([True, False, True])
+                self.reads = 0
+                self.calls = 0
+
+            @property
+            def active(self) -> bool:
+                self.reads += 1
+                return next(self.states, False)
+
+            def __call__(self, mosaic) -> None:
+                self.calls += 1
+
+        consumer = FlickeringConsumer()
+        empty = (Detections(), Detections(), [], Detections(), Detections())
+        with patch('src.detection.objet_detection.process_frame', return_value=empty) as mock_process_frame:
+            process_video('CAM4_12h00m00s.mp4', nb_of_img_skip_between_2=0, headless=True,
+                          mosaic_consumers=[consumer])
+
+        self.assertEqual([call.kwargs['draw_windows'] for call in mock_process_frame.call_args_list],
+                         [True, False, True])
+        self.assertEqual((consumer.reads, consumer.calls), (3, 2))
+
+    def test_process_video_cancelled(self, mock_detection_windows, mock_background_subtraction_on_edges,
+                                     mock_background_subtraction, mock_classification, mock_fine_tuning,
+                                     mock_detection, mock_destroy, mock_imshow, mock_named, mock_capture):
+        """
+        Test that the analysis stops before the next frame once the stop event is set.
+        """
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.read.side_effect = [(True, np.zeros((480, 640, 3), dtype=np.uint8))] * 3 + [(False, None)]
+        mock_capture.return_value = mock_cap
+        stop_event = threading.Event()
+        stop_event.set()
+
+        stats = process_video('CAM4_12h00m00s.mp4', nb_of_img_skip_between_2=0, headless=True,
+                              stop_event=stop_event)
+
+        self.assertTrue(stats['cancelled'])
+        self.assertEqual(stats['frames_analysed'], 0)
+        mock_detection.assert_not_called()
+
+
 @patch('os.listdir')
 @patch('src.detection.objet_detection.process_video')
 class TestVideosProcessing(unittest.TestCase):
@@ -139,5 +380,95 @@ class TestVideosProcessing(unittest.TestCase):
         mock_process_video.assert_any_call(os.path.join('fake_folder', 'video1.mp4'), 0)
         mock_process_video.assert_any_call(os.path.join('fake_folder', 'video2.mp4'), 0)
 
+    @patch('src.detection.objet_detection.iter_videos_in_pool')
+    def test_process_videos_in_pool(self, mock_pool, mock_process_video, mock_listdir):
+        """
+        Test the process_videos function with several worker processes.
+
+        This test verifies that the videos are sent to the process pool in headless mode
+        and that the statistics of each video are collected from the merged stream.
+        """
+        mock_listdir.return_value = ['CAM4.mp4', 'CAM5.mp4', 'notes.txt']
+        mock_pool.return_value = iter([
+            {'type': 'progress', 'video': 'CAM4.mp4', 'frame': 0, 'analysed': 1, 'fps': 1.0},
+            {'type': 'result', 'video': 'CAM4.mp4', 'stats': {'frames_analysed': 1}},
+            {'type': 'error', 'video': 'CAM5.mp4', 'error': 'IOError()'},
+        ])
+
+        stats = process_videos('fake_folder', 100, workers=4)
+
+        mock_process_video.assert_not_called()
+        videos, nb_of_img_skip_between_2, workers, _, resources = mock_pool.call_args.args
+        self.assertEqual([video_path for video_path, _ in videos],
+                         [os.path.join('fake_folder', 'CAM4.mp4'), os.path.join('fake_folder', 'CAM5.mp4')])
+        self.assertTrue(all(options['headless'] for _, options in videos))
+        self.assertEqual((nb_of_img_skip_between_2, workers), (100, 4))
+        # Only the models of the stages and the reference frames of the analysed cameras are preloaded
+        self.assertEqual(resources, list(STAGE_RESOURCES) + ['frame_ref_cam4', 'frame_ref_cam5'])
+        self.assertEqual(stats, [{'frames_analysed': 1}])
+
+
+@patch('src.detection.objet_detection.process_source')
+class TestSourcesProcessing(unittest.TestCase):
+    def test_single_source(self, mock_process_source):
+        """
+        Test that a single source is analysed in the calling thread, with the display.
+        """
+        mock_process_source.return_value = {'frames_analysed': 1}
+        config = {'streams': [{'url': 'rtsp://tram/stream1', 'camera': 4}]}
+
+        stats = process_sources(['rtsp://tram/stream1'], 100, config)
+
+        source = mock_process_source.call_args.args[0]
+        self.assertEqual((source.name, source.camera), ('rtsp://tram/stream1', 4))
+        self.assertEqual(mock_process_source.call_args.kwargs, {})
+        self.assertEqual(stats, [{'frames_analysed': 1}])
+
+    def test_several_sources(self, mock_process_source):
+        """
+        Test that several sources are analysed by one thread each in headless mode, a failed source being skipped.
+        """
+        def process_source(source, **options):
+            if source.camera == 5:
+                raise IOError("Erreur: Impossible d'ouvrir le flux")
+            return {'video': source.name, 'headless': options['headless']}
+        mock_process_source.side_effect = process_source
+
+        stats = process_sources(['videos/CAM4_12h00m00s.mp4', 'rtsp://tram/CAM5'], 0)
+
+        self.assertEqual(stats, [{'video': 'videos/CAM4_12h00m00s.mp4', 'headless': True}])
+        self.assertIsInstance(mock_process_source.call_args.kwargs['stop_event'], threading.Event)
+
+    def test_stream_without_camera(self, mock_process_source):
+        """
+        Test that a stream whose camera is unknown is refused before any analysis.
+        """
+        with self.assertRaises(ValueError):
+            process_sources(['rtsp://tram/stream1'], 0, {'streams': []})
+        mock_process_source.assert_not_called()
+
+    @patch('src.detection.objet_detection.YoloBatcher')
+    def test_sources_with_batched_yolo(self, mock_batcher, mock_process_source):
+        """
+        Test that the sources share one YOLO batcher sized to their number, closed at the end of the analysis.
+        """
+        stats = process_sources(['videos/CAM4_12h00m00s.mp4', 'videos/CAM5_12h00m00s.mp4'], 0, batch_yolo=True)
+
+        mock_batcher.assert_called_once_with(max_batch_size=2)
+        self.assertEqual(len(stats), 2)
+        for call in mock_process_source.call_args_list:
+            self.assertIs(call.kwargs['yolo_batcher'], mock_batcher.return_value)
+        mock_batcher.return_value.close.assert_called_once()
+
+    def test_sources_of_the_same_camera(self, mock_process_source):
+        """
+        Test that 2 sources of the same camera are refused, since they would share the state of the camera.
+        """
+        config = {'streams': [{'url': 'rtsp://tram/stream1', 'camera': 4}]}
+
+        with self.assertRaises(ValueError):
+            process_sources(['videos/CAM4_12h00m00s.mp4', 'rtsp://tram/stream1'], 0, config)
+        mock_process_source.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
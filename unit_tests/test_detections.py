@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.detection.utils.detections import DETECTION_COLUMNS, Detections
+
+
+class TestDetections(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates detections of two classes and one candidate without class.
+        """
+        self.detections = Detections.from_arrays([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]],
+                                                 [0.9, 0.8, np.nan], [0, 56, -1], ['person', 'chair', None])
+
+    def test_dataframe_round_trip(self) -> None:
+        """
+        Test the conversion to and from the former DataFrame of detections.
+        """
+        df = self.detections.to_dataframe()
+
+        self.assertEqual(df.columns.tolist(), DETECTION_COLUMNS)
+        self.assertEqual(df['name'].tolist(), ['person', 'chair', None])
+        pd.testing.assert_frame_equal(Detections.coerce(df).to_dataframe(), df)
+        self.assertIs(Detections.coerce(self.detections), self.detections)
+
+    def test_filter_and_concat(self) -> None:
+        """
+        Test the selection by class name and the concatenation.
+        """
+        chairs = self.detections.isin(['chair', 'couch'])
+        kept = self.detections.filter(~chairs)
+
+        self.assertEqual(chairs.tolist(), [False, True, False])
+        self.assertEqual(kept.names, ['person', None])
+        self.assertEqual(len(Detections.concat([kept, self.detections])), 5)
+        self.assertTrue(Detections.concat([]).empty)
+
+    def test_iou_and_translate(self) -> None:
+        """
+        Test the IoU matrix and the translation of the boxes.
+        """
+        np.testing.assert_allclose(self.detections[:1].iou(self.detections), [[1.0, 1 / 3, 0.0]])
+        self.assertEqual(self.detections[:1].translate(100, 50).boxes.tolist(), [[100, 50, 110, 60]])
+        self.assertEqual(self.detections.boxes[0].tolist(), [0, 0, 10, 10])
+
+    def test_to_records(self) -> None:
+        """
+        Test that the unknown values are None in the serializable records.
+        """
+        records = self.detections.to_records()
+
+        self.assertEqual(records[0], {'xmin': 0.0, 'ymin': 0.0, 'xmax': 10.0, 'ymax': 10.0, 'confidence': 0.9,
+                                      'class': 0, 'name': 'person'})
+        self.assertEqual((records[2]['confidence'], records[2]['class'], records[2]['name']), (None, None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.detection.utils.frame_context import FrameContext
+
+
+class TestFrameContext(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates the context of a uniform frame.
+        """
+        self.context = FrameContext(np.full((72, 128, 3), 100, dtype=np.uint8))
+
+    def test_same_image_is_computed_once(self) -> None:
+        """
+        Test that the threads reading the same image wait for its single computation.
+        """
+        calls = []
+        started = threading.Event()
+
+        def compute() -> np.ndarray:
+            calls.append(1)
+            started.set()
+            threading.Event().wait(0.05)
+            return np.zeros(1)
+
+        with ThreadPoolExecutor(4) as pool:
+            images = list(pool.map(lambda _: self.context._memoize('image', compute), range(4)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(image is images[0] for image in images))
+        self.assertIn('image', self.context.timings)
+
+    def test_different_images_are_computed_concurrently(self) -> None:
+        """
+        Test that the computation of an image does not block the computation of another one.
+        """
+        first_started = threading.Event()
+        second_done = threading.Event()
+
+        def compute_first() -> np.ndarray:
+            first_started.set()
+            # Only returns once the second image was computed while this one is still being computed
+            self.assertTrue(second_done.wait(2))
+            return np.zeros(1)
+
+        def compute_second() -> np.ndarray:
+            second_done.set()
+            return np.ones(1)
+
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(self.context._memoize, 'first', compute_first)
+            self.assertTrue(first_started.wait(2))
+            second = pool.submit(self.context._memoize, 'second', compute_second)
+            self.assertEqual(second.result(2)[0], 1)
+            self.assertEqual(first.result(2)[0], 0)
+
+    def test_derived_images(self) -> None:
+        """
+        Test that the derived images reuse the images they are derived from.
+        """
+        gray = self.context.gray
+
+        self.assertIs(self.context.gray, gray)
+        self.assertEqual(gray.shape, (72, 128))
+        self.assertEqual(self.context.downscaled((32, 18), gray=True).shape, (18, 32))
+        self.assertIn('enhanced', self.context.timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
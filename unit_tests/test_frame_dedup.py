@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from src.detection.utils.frame_context import FrameContext
+from src.detection.utils.frame_dedup import FrameDeduplicator
+
+
+class TestFrameDeduplicator(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a deduplicator and a uniform frame already analysed for camera 4.
+        """
+        self.deduplicator = FrameDeduplicator(tolerance=2.0, max_reuse=3)
+        self.frame = np.full((720, 1280, 3), 100, dtype=np.uint8)
+        self.results = ('detections',)
+        self.deduplicator.store(4, FrameContext(self.frame), self.results)
+
+    def test_nearly_identical_frame_reuses_results(self) -> None:
+        """
+        Test that a frame within the tolerance reuses the results, and a different frame does not.
+        """
+        self.assertIs(self.deduplicator.lookup(4, FrameContext(self.frame + 1)), self.results)
+        self.assertIsNone(self.deduplicator.lookup(4, FrameContext(self.frame + 50)))
+        self.assertIsNone(self.deduplicator.lookup(5, FrameContext(self.frame)))
+
+        stats = self.deduplicator.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['cameras'][4], {'hits': 1, 'misses': 1})
+
+    def test_max_reuse(self) -> None:
+        """
+        Test that the results are reused at most max_reuse times in a row.
+        """
+        reused = [self.deduplicator.lookup(4, FrameContext(self.frame)) for _ in range(4)]
+
+        self.assertEqual(reused, [self.results] * 3 + [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
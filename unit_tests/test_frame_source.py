@@ -0,0 +1,136 @@
+import os
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from src.detection.utils.frame_source import (FrameSource, ImageDirectorySource, PacedCapture, ReplaySource,
+                                              StreamSource, VideoFileSource, open_frame_source)
+
+
+class TestFrameSources(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method writes a short video at 25 frames/sec where each frame encodes its own index,
+        and a folder of 5 images.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, 'CAM4_12h00m00s.mp4')
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (64, 48))
+        for i in range(20):
+            writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+        writer.release()
+
+        self.images_path = os.path.join(self.tmp_dir.name, 'CAM5_08h30m00s')
+        os.mkdir(self.images_path)
+        for i in range(5):
+            cv2.imwrite(os.path.join(self.images_path, f'{i:04d}.png'), np.full((48, 64, 3), i * 10, dtype=np.uint8))
+        open(os.path.join(self.images_path, 'notes.txt'), 'w').close()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_video_file_source(self) -> None:
+        """
+        Test that a video file yields the sampled frames and the camera data of its filename.
+        """
+        with VideoFileSource(self.video_path, 4) as source:
+            frames = list(source.frames())
+
+        self.assertEqual((source.camera, source.time), (4, '12h00m00s'))
+        self.assertEqual([sampled.index for sampled in frames], [4, 9, 14, 19])
+        self.assertEqual(frames[1].timestamp, 9 / 25)
+        self.assertTrue(all(sampled.captured_at is not None for sampled in frames))
+        self.assertEqual(source.dropped, 0)
+
+    def test_video_file_source_cannot_be_opened(self) -> None:
+        """
+        Test that a missing video raises an IOError.
+        """
+        with self.assertRaises(IOError):
+            VideoFileSource(os.path.join(self.tmp_dir.name, 'missing.mp4')).open()
+
+    def test_image_directory_source(self) -> None:
+        """
+        Test that a folder yields its images in order, skipping the other files.
+        """
+        with ImageDirectorySource(self.images_path, 1, fps=5) as source:
+            frames = list(source.frames())
+
+        self.assertEqual((source.camera, source.time), (5, '08h30m00s'))
+        self.assertEqual([(sampled.index, sampled.timestamp) for sampled in frames], [(1, 0.2), (3, 0.6)])
+        self.assertEqual(int(frames[1].frame[0, 0, 0]), 30)
+
+    def test_replay_drops_stale_frames(self) -> None:
+        """
+        Test that a replay yields the newest frames at the real-time rate and drops the stale ones.
+        """
+        start = time.perf_counter()
+        with ReplaySource(self.video_path, speed=2.0) as source:
+            indices = []
+            for sampled in source.frames():
+                indices.append(sampled.index)
+                time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+
+        # 20 frames at 25 frames/sec played twice as fast: 0.4 s
+        self.assertGreaterEqual(elapsed, 0.35)
+        self.assertGreater(source.dropped, 0)
+        self.assertEqual(len(indices) + source.dropped, 20)
+        self.assertEqual(indices[-1], 19)
+
+    def test_paced_capture(self) -> None:
+        """
+        Test that the paced capture waits for the timestamp of each frame.
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        paced = PacedCapture(cap, speed=5.0)
+
+        start = time.perf_counter()
+        for _ in range(6):
+            self.assertTrue(paced.grab())
+        elapsed = time.perf_counter() - start
+        cap.release()
+
+        # The 6th frame is available 5 periods of 1 / (25 * 5) s after the first one
+        self.assertGreaterEqual(elapsed, 5 / 125 - 0.005)
+
+    def test_open_frame_source(self) -> None:
+        """
+        Test that the source matches the path or URL, and that the camera of a stream comes from the configuration.
+        """
+        config = {'streams': [{'url': 'rtsp://tram/cam7', 'camera': 7}]}
+
+        stream = open_frame_source('rtsp://tram/cam7', config)
+        self.assertIsInstance(stream, StreamSource)
+        self.assertEqual(stream.camera, 7)
+        self.assertTrue(stream.live)
+        self.assertEqual(open_frame_source('http://tram/CAM3.mjpg', config).camera, 3)
+
+        self.assertIsInstance(open_frame_source(self.images_path), ImageDirectorySource)
+        self.assertIsInstance(open_frame_source(self.video_path, replay=True), ReplaySource)
+        video = open_frame_source(self.video_path, nb_of_img_skip_between_2=2)
+        self.assertIsInstance(video, VideoFileSource)
+        self.assertFalse(video.live)
+
+    def test_unknown_stream_camera(self) -> None:
+        """
+        Test that a stream without camera in its URL nor in the configuration is refused.
+        """
+        with self.assertRaises(ValueError):
+            open_frame_source('rtsp://tram/stream1', {'streams': [{'url': 'rtsp://tram/stream2', 'camera': 4}]})
+
+    def test_frames_is_abstract(self) -> None:
+        """
+        Test that a source must implement frames().
+        """
+        with self.assertRaises(TypeError):
+            FrameSource('CAM4_12h00m00s.mp4')
+
+
+if __name__ == '__main__':
+    unittest.main()
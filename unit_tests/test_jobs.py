@@ -0,0 +1,224 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from flask.testing import FlaskClient
+
+from src.app import create_app
+from src.app.jobs import Job, JobManager
+
+
+class BlockingRunner:
+    """
+    Runner of the tests: each job waits until it is released or cancelled.
+    """
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, job: Job) -> None:
+        self.started.set()
+        while not self.release.wait(0.01):
+            if job.cancel_event.is_set():
+                return
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runner = BlockingRunner()
+        self.manager = JobManager(workers=1, max_queued=1, runner=self.runner)
+
+    def tearDown(self) -> None:
+        self.runner.release.set()
+        self.manager.shutdown()
+
+    def wait_finished(self, job: Job) -> None:
+        for _ in range(200):
+            if job.finished:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"Job {job.id} not finished")
+
+    def test_submit_runs_in_background(self) -> None:
+        """
+        Test that a job is run by a worker and succeeds.
+        """
+        job, created = self.manager.submit('videos')
+        self.assertTrue(created)
+        self.assertTrue(self.runner.started.wait(1))
+        self.assertEqual(job.state, 'running')
+
+        self.runner.release.set()
+        self.wait_finished(job)
+        self.assertEqual(job.state, 'succeeded')
+
+    def test_same_folder_is_deduplicated(self) -> None:
+        """
+        Test that a folder already being analysed is not queued twice.
+        """
+        job, _ = self.manager.submit('videos')
+        duplicate, created = self.manager.submit('./videos/')
+        self.assertFalse(created)
+        self.assertIs(duplicate, job)
+
+        self.runner.release.set()
+        self.wait_finished(job)
+        _, created = self.manager.submit('videos')
+        self.assertTrue(created)
+
+    def test_queue_is_bounded(self) -> None:
+        """
+        Test that new jobs are refused when the queue is full.
+        """
+        self.manager.submit('videos1')
+        self.assertTrue(self.runner.started.wait(1))
+        self.manager.submit('videos2')
+        with self.assertRaises(RuntimeError):
+            self.manager.submit('videos3')
+
+    def test_cancel(self) -> None:
+        """
+        Test that a queued job never runs and that a running job stops.
+        """
+        running, _ = self.manager.submit('videos1')
+        self.assertTrue(self.runner.started.wait(1))
+        queued, _ = self.manager.submit('videos2')
+
+        self.manager.cancel(queued.id)
+        self.assertEqual(queued.state, 'cancelled')
+        self.manager.cancel(running.id)
+        self.wait_finished(running)
+        self.assertEqual(running.state, 'cancelled')
+        self.assertIsNone(self.manager.cancel('unknown'))
+
+    def test_failed_job(self) -> None:
+        """
+        Test that the error of a job is reported.
+        """
+        manager = JobManager(runner=lambda job: job.missing_attribute)
+        job, _ = manager.submit('videos')
+        self.wait_finished(job)
+        manager.shutdown()
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(len(job.errors), 1)
+
+    def test_failed_videos(self) -> None:
+        """
+        Test that a job is failed when every video failed, and partial when some did.
+        """
+        def runner(job: Job) -> None:
+            job.errors.append({'video': 'CAM4.mp4', 'error': 'Erreur'})
+            if job.folder_path == 'partial':
+                job.results.append({'video': 'CAM5.mp4', 'frames_analysed': 1})
+
+        manager = JobManager(runner=runner)
+        failed, _ = manager.submit('failed')
+        partial, _ = manager.submit('partial')
+        self.wait_finished(failed)
+        self.wait_finished(partial)
+        manager.shutdown()
+        self.assertEqual((failed.state, partial.state), ('failed', 'partial'))
+
+    def test_shutdown_with_full_queue(self) -> None:
+        """
+        Test that the shutdown does not wait behind the queued jobs and cancels them.
+        """
+        self.manager.submit('videos1')
+        self.assertTrue(self.runner.started.wait(1))
+        queued, _ = self.manager.submit('videos2')
+
+        thread = threading.Thread(target=self.manager.shutdown)
+        thread.start()
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(queued.state, 'cancelled')
+        with self.assertRaises(RuntimeError):
+            self.manager.submit('videos3')
+
+
+class TestJob(unittest.TestCase):
+    @patch('src.app.jobs.list_videos', return_value=['videos/CAM4.mp4', 'videos/CAM5.mp4'])
+    @patch('src.app.jobs.process_video')
+    def test_run(self, mock_process_video, mock_list_videos) -> None:
+        """
+        Test that each video is analysed in headless mode and that the failures are recorded.
+        """
+        job = Job('videos', 2)
+
+        def process_video(video_path, nb_of_img_skip_between_2, **options):
+            options['progress_callback']({'video': video_path, 'analysed': 3, 'fps': 6.0})
+            self.assertEqual(job.to_dict()['current_video'], video_path)
+            if video_path.endswith('CAM5.mp4'):
+                raise IOError("Erreur: Impossible d'ouvrir la vidéo")
+            return {'video': video_path, 'frames_analysed': 3}
+        mock_process_video.side_effect = process_video
+
+        job.run()
+
+        mock_process_video.assert_any_call('videos/CAM4.mp4', 2, headless=True, progress_callback=job.report_progress,
+                                           stop_event=job.cancel_event)
+        description = job.to_dict()
+        self.assertEqual((description['videos_total'], description['videos_done']), (2, 2))
+        self.assertEqual(description['frames_analysed'], 3)
+        self.assertIsNone(description['current_video'])
+        self.assertEqual(description['errors'][0]['video'], 'videos/CAM5.mp4')
+
+
+class TestJobRoutes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app: FlaskClient = create_app().test_client()
+        self.runner = BlockingRunner()
+        self.manager = JobManager(runner=self.runner)
+        self.patchers = [patch('src.app.routes.job_manager', self.manager),
+                         patch('src.app.routes.load_config', return_value={}),
+                         patch('src.app.routes.get_video_path', return_value='videos')]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+        self.runner.release.set()
+        self.manager.shutdown()
+
+    def test_start_analysis(self) -> None:
+        """
+        Test that the analysis is started in the background, and that its job can be read and cancelled.
+        """
+        response = self.app.post('/start-analysis', json={'nb_of_img_skip_between_2': 2})
+        self.assertEqual(response.status_code, 202)
+        data = response.get_json()
+        self.assertEqual(data['message'], "Analyse lancée!")
+
+        response = self.app.post('/start-analysis')
+        self.assertEqual(response.get_json()['job_id'], data['job_id'])
+        self.assertEqual(response.get_json()['message'], "Analyse déjà en cours.")
+
+        response = self.app.get(f"/jobs/{data['job_id']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['folder'], 'videos')
+        self.assertEqual(len(self.app.get('/jobs').get_json()), 1)
+
+        response = self.app.post(f"/jobs/{data['job_id']}/cancel")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.manager.get(data['job_id']).cancel_event.is_set())
+
+    def test_invalid_body(self) -> None:
+        """
+        Test that an invalid number of images to skip is refused with a 400 error.
+        """
+        for value in ('2', -1, None, 1.5, True):
+            response = self.app.post('/start-analysis', json={'nb_of_img_skip_between_2': value})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.manager.list(), [])
+
+    def test_unknown_job(self) -> None:
+        """
+        Test that an unknown job returns a 404 error.
+        """
+        self.assertEqual(self.app.get('/jobs/unknown').status_code, 404)
+        self.assertEqual(self.app.post('/jobs/unknown/cancel').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+from flask.testing import FlaskClient
+
+from src.app import create_app
+from src.detection.utils.live_view import LiveBroadcaster, LiveViews
+from src.detection.utils.mosaic import MosaicRenderer
+from src.detection.utils.detections import Detections
+
+
+class TestLiveBroadcaster(unittest.TestCase):
+    def setUp(self) -> None:
+        self.broadcaster = LiveBroadcaster(4, max_fps=1000)
+        self.mosaic = np.full((72, 128, 3), 120, dtype=np.uint8)
+
+    def connect_viewers(self, count: int) -> tuple[list, list, list]:
+        viewers = [self.broadcaster.images(timeout=0.05) for _ in range(count)]
+        images = []
+        threads = [threading.Thread(target=lambda viewer=viewer: images.append(next(viewer))) for viewer in viewers]
+        for thread in threads:
+            thread.start()
+        while self.broadcaster.viewers < count:
+            time.sleep(0.001)
+        return viewers, images, threads
+
+    def test_inactive_without_viewer(self) -> None:
+        """
+        Test that the mosaic is not rendered while nobody watches the live view.
+        """
+        renderer = MosaicRenderer(panel_size=(64, 36))
+        renderer.attach(self.broadcaster)
+
+        self.assertFalse(self.broadcaster.active)
+        self.assertIsNone(renderer.render(self.mosaic, (Detections(), Detections(), [], Detections(), Detections())))
+        self.assertIsNone(self.broadcaster.encoder)
+
+    def test_encoded_once_for_all_viewers(self) -> None:
+        """
+        Test that each image is encoded once and sent to every viewer, and that the encoder stops with the last
+        viewer.
+        """
+        viewers, images, threads = self.connect_viewers(2)
+        self.assertTrue(self.broadcaster.active)
+        encoder = self.broadcaster.encoder
+
+        self.broadcaster(self.mosaic)
+        for thread in threads:
+            thread.join(timeout=2)
+
+        self.assertEqual(len(images), 2)
+        self.assertIs(images[0], images[1])
+        self.assertEqual(cv2.imdecode(np.frombuffer(images[0], np.uint8), cv2.IMREAD_COLOR).shape, self.mosaic.shape)
+        self.assertEqual(self.broadcaster.sequence, 1)
+
+        for viewer in viewers:
+            viewer.close()
+        encoder.join(timeout=2)
+        self.assertFalse(encoder.is_alive())
+        self.assertEqual(self.broadcaster.viewers, 0)
+        self.assertFalse(self.broadcaster.active)
+
+    def test_frame_rate_is_capped(self) -> None:
+        """
+        Test that the broadcaster is inactive until the next image is due.
+        """
+        self.broadcaster = LiveBroadcaster(4, max_fps=1)
+        viewers, _, threads = self.connect_viewers(1)
+
+        self.broadcaster(self.mosaic)
+        self.assertFalse(self.broadcaster.active)
+        threads[0].join(timeout=2)
+        viewers[0].close()
+
+    def test_stream(self) -> None:
+        """
+        Test that the images are sent as the parts of an MJPEG stream.
+        """
+        stream = self.broadcaster.stream()
+        parts = []
+        thread = threading.Thread(target=lambda: parts.append(next(stream)))
+        thread.start()
+        while self.broadcaster.viewers < 1:
+            time.sleep(0.001)
+        self.broadcaster(self.mosaic)
+        thread.join(timeout=2)
+        stream.close()
+
+        self.assertTrue(parts[0].startswith(b"--frame\r\nContent-Type: image/jpeg\r\n"))
+        self.assertTrue(parts[0].endswith(b"\r\n"))
+
+
+class TestLiveViews(unittest.TestCase):
+    def test_get(self) -> None:
+        """
+        Test that each camera has a single broadcaster.
+        """
+        views = LiveViews(max_fps=10)
+        self.assertIs(views.get(4), views.get(4))
+        self.assertEqual(views.cameras(), [{'camera': 4, 'viewers': 0, 'images': 0}])
+
+
+class TestLiveRoutes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app: FlaskClient = create_app().test_client()
+
+    @patch.object(LiveBroadcaster, 'stream', side_effect=lambda: iter([b"--frame\r\n"]))
+    def test_live_view(self, mock_stream) -> None:
+        """
+        Test that the live view of a camera is served as an MJPEG stream.
+        """
+        response = self.app.get('/live/4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'multipart/x-mixed-replace')
+        self.assertEqual(response.data, b"--frame\r\n")
+
+        response = self.app.get('/live')
+        self.assertIn(4, [camera['camera'] for camera in response.get_json()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import time
+import unittest
+
+from src.detection.utils.metrics import Metrics, RollingLatencies
+
+
+class TestRollingLatencies(unittest.TestCase):
+    def test_quantiles_of_the_last_values(self) -> None:
+        """
+        Test that the percentiles only use the last values, while the count and the sum cover every value.
+        """
+        latencies = RollingLatencies(window=100)
+        for value in range(1, 201):
+            latencies.add(value / 1000)
+
+        quantiles = latencies.quantiles()
+        self.assertAlmostEqual(quantiles[0.5], 0.1505)
+        self.assertAlmostEqual(quantiles[0.99], 0.19901)
+        self.assertEqual(latencies.count, 200)
+        self.assertAlmostEqual(latencies.sum, 20.1)
+
+    def test_empty(self) -> None:
+        """
+        Test the percentiles without any value.
+        """
+        self.assertEqual(RollingLatencies().quantiles(), {0.5: 0.0, 0.95: 0.0, 0.99: 0.0})
+
+
+class TestMetrics(unittest.TestCase):
+    def test_disabled(self) -> None:
+        """
+        Test that nothing is recorded, and that the functions are not wrapped, while the metrics are disabled.
+        """
+        metrics = Metrics()
+
+        def function():
+            return 1
+
+        self.assertIs(metrics.timed('stage', 4, function), function)
+        with metrics.timer('stage', 4):
+            pass
+        metrics.observe('stage', 4, 0.1)
+        metrics.increment('frames', 4)
+        self.assertEqual(list(metrics.timed_iterator('decode', 4, [1, 2])), [1, 2])
+
+        self.assertEqual(metrics.snapshot(), {'enabled': False, 'stages': {}, 'counters': {}})
+
+    def test_record_stages_and_counters(self) -> None:
+        """
+        Test that the latencies and counters are recorded per stage and camera.
+        """
+        metrics = Metrics(enabled=True)
+
+        self.assertEqual(metrics.timed('detections', 4, lambda x: x * 2)(3), 6)
+        with metrics.timer('detections', 4):
+            time.sleep(0.01)
+        metrics.observe('detections', 5, 0.002)
+        self.assertEqual(list(metrics.timed_iterator('decode', 4, iter([1, 2, 3]))), [1, 2, 3])
+        metrics.increment('frames', 4)
+        metrics.increment('frames', 4, 2)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['stages']['detections'][4]['count'], 2)
+        self.assertGreaterEqual(snapshot['stages']['detections'][4]['p99_ms'], 9)
+        self.assertAlmostEqual(snapshot['stages']['detections'][5]['p50_ms'], 2.0)
+        self.assertEqual(snapshot['stages']['decode'][4]['count'], 3)
+        self.assertEqual(snapshot['counters'], {'frames': {4: 3}})
+        self.assertEqual(json.loads(metrics.to_json())['counters'], {'frames': {'4': 3}})
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['stages'], {})
+
+    def test_prometheus_export(self) -> None:
+        """
+        Test the Prometheus text format.
+        """
+        metrics = Metrics(enabled=True)
+        metrics.observe('subtraction', 7, 0.004)
+        metrics.increment('frames_reused', 7)
+
+        lines = metrics.to_prometheus().splitlines()
+
+        self.assertIn('# TYPE objdet_stage_latency_seconds summary', lines)
+        self.assertIn('objdet_stage_latency_seconds{stage="subtraction",camera="7",quantile="0.95"} 0.004000', lines)
+        self.assertIn('objdet_stage_latency_seconds_count{stage="subtraction",camera="7"} 1', lines)
+        self.assertIn('# TYPE objdet_frames_reused_total counter', lines)
+        self.assertIn('objdet_frames_reused_total{camera="7"} 1', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+# Functions to unit_tests
+from src.detection.utils.detections import Detections
+from src.detection.utils.mosaic import BOX_COLOR, MosaicRenderer, draw_boxes
+from src.detection.utils.utils import classification_label
+
+
+def make_results(detections=None):
+    """
+    Build results of process_frame with the same detections in every panel.
+    """
+    detections = detections if detections is not None else Detections()
+    return detections, detections, [MagicMock(class_name='full', confidence=0.8)], detections, detections
+
+
+class TestMosaicRenderer(unittest.TestCase):
+    def setUp(self):
+        self.frame = np.full((720, 1280, 3), 50, dtype=np.uint8)
+
+    def test_render_without_consumer(self):
+        """
+        Test that nothing is rendered while no consumer is attached.
+        """
+        renderer = MosaicRenderer()
+
+        self.assertFalse(renderer.active)
+        self.assertIsNone(renderer.render(self.frame, make_results()))
+
+    def test_render_to_consumer(self):
+        """
+        Test that the attached consumers receive the 2x2 mosaic, in the same buffer at each call.
+        """
+        renderer = MosaicRenderer()
+        consumer = MagicMock()
+        renderer.attach(consumer)
+
+        first = renderer.render(self.frame, make_results())
+        second = renderer.render(self.frame, make_results())
+
+        self.assertTrue(renderer.active)
+        self.assertEqual(first.shape, (720, 1280, 3))
+        self.assertIs(first, second)
+        self.assertEqual(consumer.call_count, 2)
+        consumer.assert_called_with(first)
+
+    def test_inactive_consumer_is_skipped(self):
+        """
+        Test that a consumer whose `active` attribute is False does not trigger the rendering.
+        """
+        renderer = MosaicRenderer()
+        consumer = MagicMock(active=False)
+        renderer.attach(consumer)
+
+        self.assertFalse(renderer.active)
+        self.assertIsNone(renderer.render(self.frame, make_results()))
+        consumer.assert_not_called()
+
+        renderer.detach(consumer)
+        self.assertEqual(renderer.consumers, [])
+
+    def test_render_draws_boxes_in_each_panel(self):
+        """
+        Test that the boxes are downscaled and drawn in the 4 panels.
+        """
+        renderer = MosaicRenderer()
+        renderer.attach(MagicMock())
+        detections = Detections.from_arrays([[200, 200, 600, 400]], [0.9], [0], ['person'])
+
+        mosaic = renderer.render(self.frame, make_results(detections))
+
+        # The frame is downscaled by 2: the left edge of the box is at x=100, y in [100, 200]
+        for index in range(4):
+            panel = renderer.panel(index)
+            np.testing.assert_array_equal(panel[150, 100], BOX_COLOR)
+            np.testing.assert_array_equal(panel[300, 500], (50, 50, 50))
+        self.assertIs(renderer.panel(3).base, mosaic)
+
+    def test_render_draws_classification(self):
+        """
+        Test that the label of the classification is drawn in red at the top of the second panel only.
+        """
+        renderer = MosaicRenderer()
+        renderer.attach(MagicMock())
+
+        renderer.render(self.frame, make_results())
+
+        label_color = classification_label([MagicMock(class_name='full', confidence=0.8)])[1]
+        self.assertTrue((renderer.panel(1)[:30] == label_color).all(axis=-1).any())
+        self.assertFalse((renderer.panel(0)[:30] == label_color).all(axis=-1).any())
+
+
+class TestClassificationLabel(unittest.TestCase):
+    def test_classification_label(self):
+        """
+        Test the label and color of the empty and full classes, and that the other results have no label.
+        """
+        self.assertEqual(classification_label([MagicMock(class_name='empty', confidence=0.91)]),
+                         ("empty (0.91)", (0, 255, 0)))
+        self.assertEqual(classification_label([MagicMock(class_name='full', confidence=0.8)]),
+                         ("full (0.80)", (0, 0, 255)))
+        self.assertIsNone(classification_label([MagicMock(class_name='unknown', confidence=0.8)]))
+        self.assertIsNone(classification_label([]))
+
+
+class TestDrawBoxes(unittest.TestCase):
+    def test_draw_boxes_without_detection(self):
+        """
+        Test that an empty panel is left unchanged.
+        """
+        panel = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        draw_boxes(panel, Detections(), (1.0, 1.0))
+
+        self.assertFalse(panel.any())
+
+    def test_draw_boxes_without_confidence(self):
+        """
+        Test that the boxes of the background subtraction (no name, no confidence) are drawn without label.
+        """
+        panel = np.zeros((100, 100, 3), dtype=np.uint8)
+
+        draw_boxes(panel, Detections.from_arrays([[10, 10, 50, 50], [60, 60, 90, 90]]), (1.0, 1.0))
+
+        np.testing.assert_array_equal(panel[30, 10], BOX_COLOR)
+        np.testing.assert_array_equal(panel[90, 75], BOX_COLOR)
+        self.assertFalse(panel[:9].any())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import pandas as pd
+
+from src.detection.utils.motion_gate import MotionGate
+
+
+def candidates(*boxes) -> pd.DataFrame:
+    """
+    Build a DataFrame of candidates from (xmin, ymin, xmax, ymax) boxes.
+    """
+    return pd.DataFrame(list(boxes), columns=['xmin', 'ymin', 'xmax', 'ymax'])
+
+
+class TestMotionGate(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a gate whose camera 4 already ran the expensive stages on one candidate.
+        """
+        self.gate = MotionGate(iou_threshold=0.5, max_skip=2)
+        self.results = {'detections': 'previous detections'}
+        self.candidates = candidates((100, 100, 200, 200))
+        self.assertIsNone(self.gate.previous_results(4, self.candidates))
+        self.gate.store(4, self.candidates, self.results)
+
+    def test_unchanged_candidates_skip_the_expensive_stages(self) -> None:
+        """
+        Test that slightly moving candidates reuse the previous results, at most max_skip times.
+        """
+        self.assertIs(self.gate.previous_results(4, candidates((102, 101, 201, 203))), self.results)
+        self.assertIs(self.gate.previous_results(4, candidates((102, 101, 201, 203))), self.results)
+        self.assertIsNone(self.gate.previous_results(4, candidates((102, 101, 201, 203))))
+
+        self.assertEqual(self.gate.stats()['cameras'][4], {'runs': 2, 'skips': 2})
+
+    def test_changed_candidates_run_the_expensive_stages(self) -> None:
+        """
+        Test that a new, moved or missing candidate runs the expensive stages.
+        """
+        two_candidates = candidates((100, 100, 200, 200), (500, 500, 600, 600))
+        self.assertIsNone(self.gate.previous_results(4, two_candidates))
+        self.gate.store(4, two_candidates, self.results)
+        moved_candidates = candidates((100, 100, 200, 200), (550, 500, 650, 600))
+        self.assertIsNone(self.gate.previous_results(4, moved_candidates))
+        self.gate.store(4, moved_candidates, self.results)
+        self.assertIsNone(self.gate.previous_results(4, candidates()))
+
+    def test_slow_drift_runs_the_expensive_stages(self) -> None:
+        """
+        Test that the candidates are compared with the frame of the reused results, so that a candidate moving
+        a little on each frame runs the expensive stages once it moved away from that frame.
+        """
+        self.gate.max_skip = 50
+        self.assertIs(self.gate.previous_results(4, candidates((120, 100, 220, 200))), self.results)
+        self.assertIsNone(self.gate.previous_results(4, candidates((140, 100, 240, 200))))
+
+
+if __name__ == '__main__':
+    unittest.main()
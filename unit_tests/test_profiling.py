@@ -0,0 +1,182 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.detection.utils.profiling import FrameProfiler, get_profiling_settings, profiled_section
+
+
+def analyse_frame() -> None:
+    time.sleep(0.02)
+
+
+class TestProfilingSettings(unittest.TestCase):
+    @patch('src.detection.utils.profiling.load_config', return_value={'profiling': {'frames': 10, 'skip': 5}})
+    def test_environment_overrides_config(self, mock_load_config) -> None:
+        """
+        Test that the environment variables override the profiling section of the configuration.
+        """
+        with patch.dict(os.environ, {'OBJDET_PROFILE_FRAMES': '', 'OBJDET_PROFILE_SKIP': '',
+                                     'OBJDET_PROFILE_TORCH': ''}):
+            settings = get_profiling_settings()
+        self.assertEqual((settings['frames'], settings['skip'], settings['mode']), (10, 5, 'cprofile'))
+
+        with patch.dict(os.environ, {'OBJDET_PROFILE_FRAMES': '3', 'OBJDET_PROFILE_MODE': 'sampling',
+                                     'OBJDET_PROFILE_TORCH': '1'}):
+            settings = get_profiling_settings()
+        self.assertEqual((settings['frames'], settings['skip'], settings['mode'], settings['torch']),
+                         (3, 5, 'sampling', True))
+
+    @patch('src.detection.utils.profiling.load_config', side_effect=FileNotFoundError)
+    def test_disabled_without_config(self, mock_load_config) -> None:
+        """
+        Test that profiling is disabled without configuration nor environment variable.
+        """
+        with patch.dict(os.environ, {'OBJDET_PROFILE_FRAMES': ''}):
+            profiler = FrameProfiler.from_settings('CAM4_12h00m00s.mp4')
+            for _ in range(3):
+                profiler.frame_started()
+                profiler.frame_done()
+
+        self.assertIsNone(profiler.window_start)
+        self.assertFalse(profiler.active)
+        self.assertEqual(profiler.reports, [])
+
+
+    @patch('src.detection.utils.profiling.load_config', side_effect=FileNotFoundError)
+    def test_invalid_settings_are_ignored(self, mock_load_config) -> None:
+        """
+        Test that invalid settings leave the profiler idle instead of stopping the analysis.
+        """
+        for environment in ({'OBJDET_PROFILE_FRAMES': '2', 'OBJDET_PROFILE_MODE': 'perf'},
+                            {'OBJDET_PROFILE_FRAMES': 'two'}):
+            with patch.dict(os.environ, environment):
+                profiler = FrameProfiler.from_settings('CAM4.mp4')
+                profiler.frame_started()
+                profiler.frame_done()
+
+            self.assertFalse(profiler.active)
+            self.assertIsNone(profiler.window_start)
+
+
+class TestFrameProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def run_frames(self, profiler: FrameProfiler, nb_frames: int) -> None:
+        for _ in range(nb_frames):
+            profiler.frame_started()
+            analyse_frame()
+            profiler.frame_done()
+
+    def test_cprofile_window(self) -> None:
+        """
+        Test that only the frames of the window are profiled and that the reports are written.
+        """
+        profiler = FrameProfiler('/videos/CAM4_12h00m00s.mp4', frames=2, skip=1, output_dir=self.tmp_dir.name)
+
+        self.run_frames(profiler, 5)
+        profiler.close()
+
+        self.assertEqual(len(profiler.reports), 2)
+        self.assertTrue(all(os.path.basename(path).startswith('CAM4_12h00m00s_') for path in profiler.reports))
+        stats = pstats.Stats(next(path for path in profiler.reports if path.endswith('.prof')))
+        calls = {function[2]: values[0] for function, values in stats.stats.items()}
+        self.assertEqual(calls['analyse_frame'], 2)
+
+    def test_sampling_profile_of_a_short_video(self) -> None:
+        """
+        Test that the sampling profile is written when the video ends during the window.
+        """
+        profiler = FrameProfiler('CAM5.mp4', frames=10, output_dir=self.tmp_dir.name, mode='sampling')
+
+        self.run_frames(profiler, 3)
+        self.assertTrue(profiler.active)
+        profiler.close()
+
+        self.assertFalse(profiler.active)
+        with open(profiler.reports[0], encoding='utf-8') as file:
+            report = file.read()
+        self.assertIn('analyse_frame', report)
+
+    def test_settings_are_read_again(self) -> None:
+        """
+        Test that a change of the settings profiles a new window `skip` frames later, and that an unchanged or
+        invalid setting starts no window.
+        """
+        disabled = {'frames': 0, 'skip': 0, 'output_dir': self.tmp_dir.name, 'mode': 'cprofile', 'torch': False}
+        enabled = dict(disabled, frames=2, skip=1)
+        invalid = dict(enabled, mode='perf')
+        profiler = FrameProfiler('CAM4.mp4', frames=0, output_dir=self.tmp_dir.name, refresh_interval=0)
+
+        with patch('src.detection.utils.profiling.get_profiling_settings',
+                   side_effect=[disabled, disabled, enabled] + [enabled] * 6 + [invalid] * 4):
+            self.run_frames(profiler, 2)
+            self.assertEqual(profiler.reports, [])
+            # The window starts 1 frame after the change of the settings and lasts 2 frames
+            self.run_frames(profiler, 7)
+            self.assertEqual(profiler.first_frame, 3)
+            self.assertEqual(len(profiler.reports), 2)
+            self.run_frames(profiler, 4)
+
+        self.assertEqual(len(profiler.reports), 2)
+        self.assertEqual(profiler.mode, 'cprofile')
+
+    def test_one_window_at_a_time(self) -> None:
+        """
+        Test that the window of a second source waits for the end of the window being profiled.
+        """
+        first = FrameProfiler('CAM4.mp4', frames=2, output_dir=self.tmp_dir.name)
+        second = FrameProfiler('CAM5.mp4', frames=1, output_dir=self.tmp_dir.name, mode='sampling')
+
+        first.frame_started()
+        second.frame_started()
+        self.assertTrue(first.active)
+        self.assertFalse(second.active)
+        second.frame_done()
+        first.frame_done()
+        first.frame_done()
+
+        self.run_frames(second, 1)
+        self.assertEqual(second.first_frame, 1)
+        self.assertEqual(len(second.reports), 1)
+
+    def test_report_failure(self) -> None:
+        """
+        Test that a report which cannot be written does not stop the analysis and ends the window.
+        """
+        output_file = os.path.join(self.tmp_dir.name, 'file')
+        open(output_file, 'w').close()
+        profiler = FrameProfiler('CAM4.mp4', frames=1, output_dir=os.path.join(output_file, 'profiles'))
+
+        self.run_frames(profiler, 3)
+        profiler.close()
+
+        self.assertFalse(profiler.active)
+        self.assertEqual(profiler.reports, [])
+        other = FrameProfiler('CAM5.mp4', frames=1, output_dir=self.tmp_dir.name)
+        self.run_frames(other, 1)
+        self.assertEqual(len(other.reports), 2)
+
+    def test_unknown_mode(self) -> None:
+        """
+        Test that an unknown profiler raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            FrameProfiler('CAM4.mp4', frames=1, mode='perf')
+
+    def test_profiled_section_without_torch_profile(self) -> None:
+        """
+        Test that the sections are not labelled while no torch profile is recorded.
+        """
+        with profiled_section('yolo') as section:
+            self.assertIsNone(section)
+
+
+if __name__ == '__main__':
+    unittest.main()
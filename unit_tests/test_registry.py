@@ -0,0 +1,73 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from src.detection.utils.registry import ResourceRegistry
+
+
+class TestResourceRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a registry with one resource whose loader is a mock.
+        """
+        self.registry = ResourceRegistry()
+        self.loader = MagicMock(return_value='model')
+        self.registry.register('model', self.loader)
+
+    def test_resource_is_loaded_on_first_use(self) -> None:
+        """
+        Test that a resource is loaded only when it is requested, and only once.
+        """
+        self.loader.assert_not_called()
+        self.assertFalse(self.registry.is_loaded('model'))
+
+        self.assertEqual(self.registry.get('model'), 'model')
+        self.assertEqual(self.registry.get('model'), 'model')
+
+        self.loader.assert_called_once()
+        self.assertIn('model', self.registry.load_times)
+
+    def test_concurrent_first_use(self) -> None:
+        """
+        Test that threads requesting the same resource at the same time load it once.
+        """
+        barrier = threading.Barrier(4)
+
+        def get():
+            barrier.wait()
+            self.registry.get('model')
+
+        threads = [threading.Thread(target=get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.loader.assert_called_once()
+
+    def test_preload_and_set(self) -> None:
+        """
+        Test the preload, set and unload functions.
+        """
+        load_times = self.registry.preload()
+        self.assertEqual(list(load_times), ['model'])
+        self.assertTrue(self.registry.is_loaded('model'))
+
+        self.registry.set('model', 'stub')
+        self.assertEqual(self.registry.get('model'), 'stub')
+
+        self.registry.unload('model')
+        self.assertEqual(self.registry.get('model'), 'model')
+
+    def test_unknown_resource(self) -> None:
+        """
+        Test that an unknown resource raises a KeyError.
+        """
+        with self.assertRaises(KeyError):
+            self.registry.get('unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
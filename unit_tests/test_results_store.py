@@ -0,0 +1,198 @@
+import importlib.util
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.detection.utils.results_sink import frame_to_record, open_results_sink
+from src.detection.utils.results_store import (BatchedResultsStore, SqliteResultsStore, capture_start, load_results,
+                                               open_results_store)
+
+START = datetime(2025, 3, 22, 23, 59, 59)
+
+
+def make_record(camera: int, frame_index: int, start_time: datetime = START) -> dict:
+    detections = pd.DataFrame({'xmin': [0.0], 'ymin': [0.0], 'xmax': [100.0], 'ymax': [100.0], 'confidence': [0.9],
+                               'name': ['person']})
+    empty = pd.DataFrame(columns=['xmin', 'ymin', 'xmax', 'ymax', 'confidence', 'name'])
+    classification = [SimpleNamespace(class_name='full', confidence=0.8)]
+    return frame_to_record(f'CAM{camera}_23h59m59s.mp4', camera, '23h59m59s', frame_index,
+                           (detections, empty, classification, empty, empty), frame_index * 0.5, start_time)
+
+
+class TestCaptureTime(unittest.TestCase):
+    def test_capture_start(self) -> None:
+        """
+        Test that the time of the filename is applied to the date of the video.
+        """
+        start = capture_start('missing/CAM4_12h30m15s.mp4', '12h30m15s')
+        self.assertEqual((start.date(), start.hour, start.minute, start.second),
+                         (datetime.now().date(), 12, 30, 15))
+
+    def test_capture_date_from_path(self) -> None:
+        """
+        Test that the date of the filename, or else of its folder, is preferred to the modification date.
+        """
+        self.assertEqual(capture_start('videos/2025-03-22/CAM4_12h30m15s.mp4', '12h30m15s'),
+                         datetime(2025, 3, 22, 12, 30, 15))
+        self.assertEqual(capture_start('videos/2024-01-01/CAM4_20250322_12h30m15s.mp4', '12h30m15s'),
+                         datetime(2025, 3, 22, 12, 30, 15))
+        self.assertEqual(capture_start('videos/20251399/CAM4_12h30m15s.mp4', '12h30m15s').date(),
+                         datetime.now().date())
+
+    def test_frame_to_record(self) -> None:
+        """
+        Test that the capture time of a frame is the capture time of the video plus its timestamp.
+        """
+        self.assertEqual(make_record(4, 3)['capture_time'], '2025-03-23T00:00:00.500')
+        self.assertIsNone(make_record(4, 3, None)['capture_time'])
+
+
+class TestResultsSink(unittest.TestCase):
+    def test_folder_is_created(self) -> None:
+        """
+        Test that the sinks create the missing folders of their file.
+        """
+        extensions = ['jsonl'] + (['parquet'] if importlib.util.find_spec('pyarrow') else [])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for extension in extensions:
+                path = os.path.join(tmp_dir, extension, 'results', f'CAM4.{extension}')
+                sink = open_results_sink(path)
+                sink.write(make_record(4, 0))
+                sink.close()
+
+                self.assertTrue(os.path.isfile(path))
+
+
+class TestSqliteResultsStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'results.sqlite')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_batches_are_written_in_background(self) -> None:
+        """
+        Test that the records are flushed by the writer thread once a batch is full, before the store is closed.
+        """
+        store = open_results_store(self.path, batch_size=2, flush_interval=60)
+        self.assertIsInstance(store, SqliteResultsStore)
+        for frame_index in range(2):
+            store.write(make_record(4, frame_index))
+        for _ in range(200):
+            if store.written == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(store.written, 2)
+
+        store.write(make_record(4, 2))
+        store.close()
+        self.assertEqual(store.written, 3)
+
+    def test_open_error_is_raised(self) -> None:
+        """
+        Test that a store that cannot be opened raises its error instead of buffering the records forever.
+        """
+        store = open_results_store(os.path.join(self.tmp_dir.name, 'missing', 'results.sqlite'))
+        store.thread.join()
+        with self.assertRaises(sqlite3.OperationalError):
+            store.write(make_record(4, 0))
+        with self.assertRaises(sqlite3.OperationalError):
+            store.close()
+
+    def test_write_error_is_raised(self) -> None:
+        """
+        Test that the error of a batch is raised by the next write and by close.
+        """
+        class FailingStore(BatchedResultsStore):
+            def _write_batch(self, records: list) -> None:
+                raise IOError("disk full")
+
+        store = FailingStore(batch_size=1, flush_interval=60)
+        store.write(make_record(4, 0))
+        for _ in range(200):
+            if store.error is not None:
+                break
+            time.sleep(0.01)
+        with self.assertRaisesRegex(IOError, "disk full"):
+            store.write(make_record(4, 1))
+        with self.assertRaisesRegex(IOError, "disk full"):
+            store.close()
+        with self.assertRaises(TypeError):
+            BatchedResultsStore()
+
+    def test_load_results(self) -> None:
+        """
+        Test that the results are read back by camera and time range, with the index on (camera, capture_time).
+        """
+        store = open_results_store(self.path)
+        for camera in (4, 5):
+            for frame_index in range(4):
+                store.write(make_record(camera, frame_index))
+        store.close()
+
+        results = load_results(self.path, camera=5, start=datetime(2025, 3, 23))
+        self.assertEqual(results['frame'].tolist(), [2, 3])
+        self.assertEqual(results['classification'].tolist(), ['full', 'full'])
+        self.assertEqual(results['detections'][0][0]['name'], 'person')
+        self.assertEqual(len(load_results(self.path)), 8)
+
+        with sqlite3.connect(self.path) as connection:
+            plan = connection.execute("EXPLAIN QUERY PLAN SELECT * FROM frames WHERE camera = 4 AND "
+                                      "capture_time >= '2025-03-23'").fetchall()
+        self.assertIn('frames_camera_time', str(plan))
+
+
+@unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow n'est pas installé")
+class TestParquetResultsStore(unittest.TestCase):
+    def test_partitions(self) -> None:
+        """
+        Test that the dataset is partitioned by camera and capture date, and read back by camera and time range.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = open_results_store(tmp_dir)
+            for camera in (4, 5):
+                for frame_index in range(4):
+                    store.write(make_record(camera, frame_index))
+            store.close()
+
+            self.assertEqual(sorted(os.listdir(os.path.join(tmp_dir, 'camera=4'))),
+                             ['date=2025-03-22', 'date=2025-03-23'])
+            results = load_results(tmp_dir, camera=4, end=datetime(2025, 3, 23))
+            self.assertEqual(results['frame'].tolist(), [0, 1])
+            self.assertEqual(results['detections'][0][0]['name'], 'person')
+            self.assertEqual(len(load_results(tmp_dir)), 8)
+
+    def test_files_are_written_by_size(self) -> None:
+        """
+        Test that each partition is written in files of batch_size rows whatever the flushes of the buffer, and
+        that the partition of the previous date is written once the camera moved on to the next one.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = open_results_store(tmp_dir, batch_size=3, flush_interval=0.01)
+            for frame_index in range(8):
+                store.write(make_record(4, frame_index, datetime(2025, 3, 22, 12)))
+                time.sleep(0.02)
+            store.write(make_record(4, 0, datetime(2025, 3, 23, 12)))
+            folder = os.path.join(tmp_dir, 'camera=4', 'date=2025-03-22')
+            for _ in range(200):
+                if len(os.listdir(folder)) == 3:
+                    break
+                time.sleep(0.01)
+
+            # 2 full files, and the last 2 rows of the 22nd once the 23rd started
+            self.assertEqual(len(os.listdir(folder)), 3)
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, 'camera=4', 'date=2025-03-23')))
+            store.close()
+            self.assertEqual(len(os.listdir(os.path.join(tmp_dir, 'camera=4', 'date=2025-03-23'))), 1)
+            self.assertEqual(len(load_results(tmp_dir)), 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.detection.ai.backends import InferenceResult, Prediction
+from src.detection.ai.roi_detection import (deduplicate_detections, detection_roi, detection_yolov11_crops,
+                                            detection_yolov11_fine_tuning_roi, merge_regions)
+from src.detection.utils.registry import registry
+from src.detection.utils.detections import DETECTION_COLUMNS, Detections
+
+
+def detections(*rows) -> pd.DataFrame:
+    """
+    Build a DataFrame of detections from (xmin, ymin, xmax, ymax, confidence, name) rows.
+    """
+    return pd.DataFrame([[x1, y1, x2, y2, confidence, 0, name] for x1, y1, x2, y2, confidence, name in rows],
+                        columns=DETECTION_COLUMNS)
+
+
+class TestRoiDetection(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a 1280x720 frame.
+        """
+        self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    def test_merge_regions(self) -> None:
+        """
+        Test that the padded boxes are clipped to the frame and that the overlapping ones are merged.
+        """
+        boxes = np.array([[10, 10, 50, 50], [60, 20, 100, 60], [600, 400, 700, 500]])
+
+        regions = merge_regions(boxes, (720, 1280), padding=10)
+
+        np.testing.assert_array_equal(regions, [[0, 0, 110, 70], [590, 390, 710, 510]])
+
+    def test_merge_regions_grown_over_a_passed_region(self) -> None:
+        """
+        Test that a region grown by a merge is merged with a region it did not overlap before.
+        """
+        boxes = np.array([[0, 0, 100, 10], [50, 50, 300, 60], [200, 0, 300, 55], [90, 20, 120, 40]])
+
+        regions = merge_regions(boxes, (720, 1280), padding=0)
+
+        np.testing.assert_array_equal(regions, [[0, 0, 300, 60]])
+
+    @patch('src.detection.ai.roi_detection.detection_yolov11_batch')
+    def test_yolo_crops_by_size(self, mock_batch) -> None:
+        """
+        Test that the crops of YOLO are batched by inference size and that each crop gets its own detections.
+        """
+        mock_batch.side_effect = lambda crops, imgsz: [f"{crop.shape[0]}@{imgsz}" for crop in crops]
+        crops = [np.zeros((100, 60, 3)), np.zeros((300, 200, 3)), np.zeros((110, 110, 3))]
+
+        crop_detections = detection_yolov11_crops(crops)
+
+        self.assertEqual([call.args[1] for call in mock_batch.call_args_list], [128, 320])
+        self.assertEqual(crop_detections, ['100@128', '300@320', '110@128'])
+
+    def test_boxes_are_mapped_back_to_the_frame(self) -> None:
+        """
+        Test that the detections of each crop are translated into the coordinates of the frame.
+        """
+        candidates = detections((100, 100, 200, 200, None, None), (800, 400, 900, 500, None, None))
+        detect_crops = MagicMock(return_value=[detections((10, 20, 30, 40, 0.9, 'person')), detections()])
+        detect_frame = MagicMock()
+
+        roi_detections = detection_roi(self.frame, candidates, detect_crops, detect_frame, padding=50)
+
+        crops = detect_crops.call_args[0][0]
+        self.assertEqual([crop.shape for crop in crops], [(200, 200, 3), (200, 200, 3)])
+        detect_frame.assert_not_called()
+        self.assertEqual(roi_detections.boxes.tolist(), [[60, 70, 80, 90]])
+
+    def test_large_regions_use_the_full_frame(self) -> None:
+        """
+        Test that the full frame is analysed when the crops cover most of it, and nothing without candidates.
+        """
+        detect_crops = MagicMock()
+        detect_frame = MagicMock(return_value=detections())
+
+        detection_roi(self.frame, detections((0, 0, 1200, 700, None, None)), detect_crops, detect_frame)
+        self.assertTrue(detection_roi(self.frame, detections(), detect_crops, detect_frame).empty)
+
+        detect_frame.assert_called_once()
+        detect_crops.assert_not_called()
+
+    def test_fine_tuning_crops_in_one_call(self) -> None:
+        """
+        Test that the crops of the fine-tuned model are sent to the backend in a single call.
+        """
+        backend = MagicMock()
+        backend.infer.return_value = [InferenceResult([Prediction('person', 0, 0.9, 20, 30, 20, 20)]),
+                                      InferenceResult([])]
+        registry.set('detection_finetuning', backend)
+        try:
+            candidates = detections((100, 100, 200, 200, None, None), (800, 400, 900, 500, None, None))
+            roi_detections = detection_yolov11_fine_tuning_roi(self.frame, candidates)
+        finally:
+            registry.unload('detection_finetuning')
+
+        backend.infer.assert_called_once()
+        self.assertEqual(len(backend.infer.call_args.args[0]), 2)
+        self.assertEqual(roi_detections.boxes.tolist(), [[62, 72, 82, 92]])
+
+    def test_deduplicate_detections(self) -> None:
+        """
+        Test that overlapping detections of the same class are merged, and not those of different classes.
+        """
+        detections_df = detections((0, 0, 100, 100, 0.8, 'person'), (5, 0, 105, 100, 0.9, 'person'),
+                                   (0, 0, 100, 100, 0.7, 'dog'))
+
+        deduplicated = deduplicate_detections(Detections.from_dataframe(detections_df))
+
+        self.assertEqual(deduplicated.confidence.tolist(), [0.9, 0.7])
+
+
+if __name__ == '__main__':
+    unittest.main()
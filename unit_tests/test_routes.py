@@ -20,5 +20,17 @@ class TestRoutes(unittest.TestCase):
         response = self.app.get('/')
         self.assertEqual(response.status_code, 200)
 
+    def test_metrics(self) -> None:
+        """
+        Test the metrics route in the Prometheus text format and in JSON.
+        """
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'objdet_stage_latency_seconds', response.data)
+
+        response = self.app.get('/metrics?format=json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('stages', response.get_json())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from src.detection.utils.stage_executor import Stage, StageExecutor
+
+
+class TestStageExecutor(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates an executor with enough threads for every independent stage.
+        """
+        self.executor = StageExecutor(max_workers=4)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def stages(self) -> dict:
+        return {
+            'a': Stage(lambda: 1),
+            'b': Stage(lambda: 2),
+            'sum': Stage(lambda a, b: a + b, ('a', 'b')),
+            'double': Stage(lambda total: total * 2, ('sum',)),
+        }
+
+    def test_sequential_and_parallel_results_are_identical(self) -> None:
+        """
+        Test that both modes return the same results.
+        """
+        expected = {'a': 1, 'b': 2, 'sum': 3, 'double': 6}
+
+        self.assertEqual(self.executor.run(self.stages(), parallel=False), expected)
+        self.assertEqual(self.executor.run(self.stages(), parallel=True), expected)
+
+    def test_independent_stages_run_concurrently(self) -> None:
+        """
+        Test that independent stages overlap in parallel mode.
+        """
+        barrier = threading.Barrier(3, timeout=5)
+        stages = {name: Stage(barrier.wait) for name in ('a', 'b', 'c')}
+
+        start = time.perf_counter()
+        self.executor.run(stages, parallel=True)
+
+        self.assertLess(time.perf_counter() - start, 5)
+
+    def test_stage_error_is_raised(self) -> None:
+        """
+        Test that the exception of a stage is raised by run.
+        """
+        def fail():
+            raise RuntimeError("stage failed")
+
+        stages = {'a': Stage(fail), 'b': Stage(lambda a: a, ('a',))}
+        for parallel in (False, True):
+            with self.assertRaises(RuntimeError):
+                self.executor.run(stages, parallel=parallel)
+
+    def test_unknown_dependency(self) -> None:
+        """
+        Test that a missing dependency raises a ValueError.
+        """
+        stages = {'a': Stage(lambda b: b, ('b',))}
+        for parallel in (False, True):
+            with self.assertRaises(ValueError):
+                self.executor.run(stages, parallel=parallel)
+
+    def test_pool_is_created_once(self) -> None:
+        """
+        Test that the frames of several threads starting their first concurrent run share a single pool.
+        """
+        pools = []
+
+        def create_pool(**kwargs) -> ThreadPoolExecutor:
+            # Leave time to the other threads to check the pool before it is set
+            time.sleep(0.01)
+            pools.append(ThreadPoolExecutor(**kwargs))
+            return pools[-1]
+
+        with patch('src.detection.utils.stage_executor.ThreadPoolExecutor', side_effect=create_pool):
+            threads = [threading.Thread(target=self.executor.run, args=(self.stages(), True)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(pools), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.detection.utils.registry import ResourceRegistry
+from src.detection.video_pool import init_worker
+
+
+@patch('cv2.setNumThreads')
+class TestInitWorker(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a registry with a resource of the run, a resource that fails to load and a resource
+        that the run does not use.
+        """
+        self.registry = ResourceRegistry()
+        self.registry.register('yolo', MagicMock(return_value='yolo'))
+        self.registry.register('broken', MagicMock(side_effect=ModuleNotFoundError("inference")))
+        self.unused = MagicMock(return_value='unused')
+        self.registry.register('unused', self.unused)
+
+    def test_only_the_resources_of_the_run_are_preloaded(self, mock_set_num_threads) -> None:
+        """
+        Test that the worker preloads the resources of the run only, and survives a resource failing to load.
+        """
+        # The thread limits of torch cannot be changed once set, the test process keeps its own
+        with patch.dict(os.environ), patch.dict('sys.modules', {'torch': MagicMock()}), \
+                patch('src.detection.utils.registry.registry', self.registry):
+            init_worker(2, MagicMock(), ('yolo', 'broken'))
+
+        self.assertTrue(self.registry.is_loaded('yolo'))
+        self.assertFalse(self.registry.is_loaded('broken'))
+        self.unused.assert_not_called()
+        mock_set_num_threads.assert_called_once_with(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
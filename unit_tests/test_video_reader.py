@@ -0,0 +1,205 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+
+from src.detection.utils.video_reader import SEEK_SKIP_THRESHOLD, SKIP_STRATEGIES, PrefetchReader, read_sampled_frames
+
+
+class InaccurateSeekCapture:
+    """
+    Capture whose seeks land `offset` frames away from the requested frame, as with some backends.
+    """
+    def __init__(self, path: str, offset: int, reports_requested_position: bool):
+        self.cap = cv2.VideoCapture(path)
+        self.offset = offset
+        self.reports_requested_position = reports_requested_position
+        self.requested_position = None
+
+    def set(self, prop: int, value: float) -> bool:
+        if self.reports_requested_position:
+            self.requested_position = value
+        return self.cap.set(prop, value + self.offset)
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_POS_FRAMES and self.requested_position is not None:
+            return self.requested_position
+        return self.cap.get(prop)
+
+    def grab(self) -> bool:
+        self.requested_position = None
+        return self.cap.grab()
+
+    def read(self) -> tuple:
+        self.requested_position = None
+        return self.cap.read()
+
+
+class TestReadSampledFrames(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method writes a short video where each frame encodes its own index.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, 'CAM4_12h00m00s.mp4')
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (64, 48))
+        for i in range(50):
+            writer.write(np.full((48, 64, 3), i * 5, dtype=np.uint8))
+        writer.release()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def read(self, nb_of_img_skip_between_2: int, strategy: str) -> list:
+        cap = cv2.VideoCapture(self.video_path)
+        frames = list(read_sampled_frames(cap, nb_of_img_skip_between_2, strategy))
+        cap.release()
+        return frames
+
+    def test_strategies_return_the_same_frames(self) -> None:
+        """
+        Test that every skipping strategy analyses the same frames as the original modulo check.
+        """
+        for nb_of_img_skip_between_2 in (0, 3, 10):
+            reference = self.read(nb_of_img_skip_between_2, 'read')
+            expected_indices = list(range(nb_of_img_skip_between_2, 50, nb_of_img_skip_between_2 + 1))
+            self.assertEqual([index for index, _ in reference], expected_indices)
+
+            for strategy in SKIP_STRATEGIES:
+                frames = self.read(nb_of_img_skip_between_2, strategy)
+                self.assertEqual([index for index, _ in frames], expected_indices)
+                for (_, expected_frame), (_, frame) in zip(reference, frames):
+                    np.testing.assert_array_equal(frame, expected_frame)
+
+    def test_inaccurate_seek(self) -> None:
+        """
+        Test that a seek landing before or after the requested frame, reported or not, is detected and the video
+        read sequentially from the next analysed frame.
+        """
+        reference = self.read(3, 'read')
+        for offset, reports_requested_position, expected in ((-2, True, reference), (2, True, reference[1:]),
+                                                            (2, False, reference[1:])):
+            cap = InaccurateSeekCapture(self.video_path, offset, reports_requested_position)
+            frames = list(read_sampled_frames(cap, 3, 'seek'))
+            cap.cap.release()
+
+            self.assertEqual([index for index, _ in frames], [index for index, _ in expected])
+            for (_, expected_frame), (_, frame) in zip(expected, frames):
+                np.testing.assert_array_equal(frame, expected_frame)
+
+    @patch('src.detection.utils.video_reader._grab_skipped_frames')
+    @patch('src.detection.utils.video_reader._seek_sampled_frames')
+    def test_auto_strategy(self, mock_seek: MagicMock, mock_grab: MagicMock) -> None:
+        """
+        Test that the default strategy seeks for large skips and grabs for small ones.
+        """
+        cap = MagicMock()
+        self.assertIs(read_sampled_frames(cap, SEEK_SKIP_THRESHOLD), mock_seek.return_value)
+        self.assertIs(read_sampled_frames(cap, 100), mock_seek.return_value)
+        self.assertIs(read_sampled_frames(cap, SEEK_SKIP_THRESHOLD - 1), mock_grab.return_value)
+        self.assertIs(read_sampled_frames(cap, 10), mock_grab.return_value)
+        mock_seek.assert_called_with(cap, 100)
+        mock_grab.assert_called_with(cap, 10)
+
+    def test_unknown_strategy(self) -> None:
+        """
+        Test that an unknown strategy raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            read_sampled_frames(None, 0, 'decode')
+
+
+class TestPrefetchReader(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method writes a short video at 25 frames/sec where each frame encodes its own index.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.video_path = os.path.join(self.tmp_dir.name, 'CAM4_12h00m00s.mp4')
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'mp4v'), 25, (64, 48))
+        for i in range(50):
+            writer.write(np.full((48, 64, 3), i * 5, dtype=np.uint8))
+        writer.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+
+    def tearDown(self) -> None:
+        self.cap.release()
+        self.tmp_dir.cleanup()
+
+    def test_same_frames_as_sequential_reading(self) -> None:
+        """
+        Test that the prefetched frames are the sampled frames, in order, with their timestamps.
+        """
+        reference_cap = cv2.VideoCapture(self.video_path)
+        reference = list(read_sampled_frames(reference_cap, 3, 'grab'))
+        reference_cap.release()
+
+        for depth in (0, 1, 4):
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            with PrefetchReader(self.cap, 3, 'grab', depth=depth) as reader:
+                frames = list(reader)
+
+            self.assertEqual([sampled.index for sampled in frames], [index for index, _ in reference])
+            self.assertEqual([sampled.timestamp for sampled in frames], [index / 25 for index, _ in reference])
+            for (_, expected_frame), sampled in zip(reference, frames):
+                np.testing.assert_array_equal(sampled.frame, expected_frame)
+            self.assertEqual(reader.dropped, 0)
+
+    def test_drop_oldest(self) -> None:
+        """
+        Test that the decoder drops the oldest frames instead of waiting for a slow analysis.
+        """
+        with PrefetchReader(self.cap, 0, depth=2, overflow='drop_oldest') as reader:
+            indices = []
+            for sampled in reader:
+                indices.append(sampled.index)
+                time.sleep(0.01)
+
+        self.assertGreater(reader.dropped, 0)
+        self.assertEqual(len(indices) + reader.dropped, 50)
+        self.assertEqual(indices, sorted(indices))
+        self.assertEqual(indices[-1], 49)
+
+    def test_close_stops_the_decoder(self) -> None:
+        """
+        Test that closing the reader in the middle of the video stops the decoder thread.
+        """
+        reader = PrefetchReader(self.cap, 0, depth=2)
+        iterator = iter(reader)
+        next(iterator)
+        thread = reader.thread
+
+        reader.close()
+
+        self.assertFalse(thread.is_alive())
+
+    def test_decoder_error(self) -> None:
+        """
+        Test that an error of the decoder thread is raised in the analysis thread.
+        """
+        cap = MagicMock()
+        cap.get.return_value = 25.0
+        cap.read.side_effect = RuntimeError("decode")
+
+        with PrefetchReader(cap, 0) as reader:
+            with self.assertRaises(RuntimeError):
+                list(reader)
+
+    def test_unknown_overflow_policy(self) -> None:
+        """
+        Test that an unknown overflow policy raises a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            PrefetchReader(self.cap, 0, overflow='drop_newest')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import Polygon
+
+from src.detection.windows.manual.windows import (filter_occluded_objects, get_exclusion_mask,
+                                                  occlusion_ratios)
+from src.detection.windows.occlusion import is_occluded, occlusion_ratio_matrix
+from src.detection.windows.window_cache import WindowCache
+from src.detection.utils.frame_context import FrameContext
+
+
+class TestManualWindows(unittest.TestCase):
+    def test_exclusion_mask_is_cached(self) -> None:
+        """
+        Test that the exclusion mask is computed once per camera and resolution.
+        """
+        mask = get_exclusion_mask(4, 800, 1280)
+
+        self.assertIs(get_exclusion_mask(4, 800, 1280), mask)
+        self.assertEqual(mask.dtype, np.uint8)
+        self.assertEqual(mask[400, 100], 0)     # Inside the left zone (x < 210)
+        self.assertEqual(mask[700, 600], 255)   # Floor of the tram
+        self.assertFalse(mask.flags.writeable)
+
+    def test_occlusion_ratios(self) -> None:
+        """
+        Test the occlusion ratio of boxes fully inside, half inside and outside the left zone of camera 4.
+        """
+        boxes = np.array([[10, 100, 110, 200],
+                          [160, 100, 260, 200],
+                          [600, 600, 700, 700]])
+
+        ratios = occlusion_ratios(boxes, 4)
+
+        self.assertEqual(ratios.shape, (3, 6))
+        self.assertAlmostEqual(ratios[0].max(), 1.0)
+        self.assertAlmostEqual(ratios[1].max(), 0.51, places=2)
+        self.assertEqual(ratios[2].max(), 0.0)
+
+    def test_filter_occluded_objects(self) -> None:
+        """
+        Test that only the objects inside an occlusion zone are removed.
+        """
+        df = pd.DataFrame({'xmin': [10, 600], 'ymin': [100, 600], 'xmax': [110, 700], 'ymax': [200, 700],
+                           'name': ['inside', 'outside']})
+
+        for method in ('geometry', 'mask'):
+            filtered_df = filter_occluded_objects(df, 4, method=method)
+
+            self.assertEqual(filtered_df['name'].tolist(), ['outside'])
+            self.assertTrue(filter_occluded_objects(df.iloc[:0], 4, method=method).empty)
+
+    def test_filter_occluded_objects_geometry(self) -> None:
+        """
+        Test that the geometry method removes the same objects as the pixel counting on clear cases.
+        """
+        df = pd.DataFrame({'xmin': [10, 600, 160], 'ymin': [100, 600, 100], 'xmax': [110, 700, 260],
+                           'ymax': [200, 700, 200], 'name': ['inside', 'outside', 'half']})
+
+        filtered_df = filter_occluded_objects(df, 4, method='geometry')
+
+        self.assertEqual(filtered_df['name'].tolist(), ['outside', 'half'])
+        with self.assertRaises(ValueError):
+            filter_occluded_objects(df, 4, method='unknown')
+
+
+class TestOcclusionRatioMatrix(unittest.TestCase):
+    def test_occlusion_ratio_matrix(self) -> None:
+        """
+        Test the N x M matrix of occlusion ratios against hand computed values.
+        """
+        polygons = [Polygon([(0, 0), (100, 0), (100, 100), (0, 100)]),
+                    Polygon([(50, 0), (200, 0), (200, 100), (50, 100)])]
+        boxes = np.array([[0, 0, 50, 50],
+                          [25, 0, 75, 100],
+                          [300, 300, 400, 400],
+                          [10, 10, 10, 20]])
+
+        ratios = occlusion_ratio_matrix(boxes, polygons)
+
+        np.testing.assert_allclose(ratios, [[1.0, 0.0],
+                                            [1.0, 0.5],
+                                            [0.0, 0.0],
+                                            [0.0, 0.0]])
+        np.testing.assert_array_equal(is_occluded(boxes, polygons, 0.75), [True, True, False, False])
+
+    def test_empty_inputs(self) -> None:
+        """
+        Test the shape of the matrix when there is no box or no polygon.
+        """
+        polygon = Polygon([(0, 0), (1, 0), (1, 1)])
+
+        self.assertEqual(occlusion_ratio_matrix(np.empty((0, 4)), [polygon]).shape, (0, 1))
+        self.assertEqual(occlusion_ratio_matrix(np.array([[0, 0, 1, 1]]), []).shape, (1, 0))
+
+
+class TestWindowCache(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates a cache and a window detection returning one polygon.
+        """
+        self.cache = WindowCache()
+        self.polygons = [Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])]
+        self.detect = MagicMock(return_value=self.polygons)
+        self.frame = np.full((720, 1280, 3), 100, dtype=np.uint8)
+
+    def test_refresh_interval(self) -> None:
+        """
+        Test that the windows are detected again only every refresh_interval frames of a camera.
+        """
+        for _ in range(10):
+            self.assertEqual(self.cache.get(4, FrameContext(self.frame), self.detect, 5), self.polygons)
+        self.cache.get(5, FrameContext(self.frame), self.detect, 5)
+
+        self.assertEqual(self.detect.call_count, 3)
+        self.assertEqual((self.cache.hits, self.cache.misses), (8, 3))
+
+    def test_counters_of_concurrent_cameras(self) -> None:
+        """
+        Test that every call is counted when the cameras are analysed by different threads.
+        """
+        def analyse(camera: int) -> None:
+            for _ in range(200):
+                self.cache.get(camera, FrameContext(self.frame), self.detect, 10)
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(analyse, (4, 5, 7, 8)))
+
+        self.assertEqual(self.cache.hits + self.cache.misses, 800)
+        self.assertEqual(self.cache.misses, 4 * 20)
+
+    def test_scene_change(self) -> None:
+        """
+        Test that the windows are detected again when the scene changes.
+        """
+        self.cache.get(4, FrameContext(self.frame), self.detect, 100)
+        self.cache.get(4, FrameContext(self.frame + 5), self.detect, 100)
+        self.assertEqual(self.detect.call_count, 1)
+
+        self.cache.get(4, FrameContext(self.frame + 100), self.detect, 100)
+        self.assertEqual(self.detect.call_count, 2)
+
+    def test_fallback_to_manual_parallelograms(self) -> None:
+        """
+        Test that the manual parallelograms are used when the windows were never detected.
+        """
+        self.detect.side_effect = RuntimeError("model unavailable")
+
+        polygons = self.cache.get(4, FrameContext(self.frame), self.detect, 5)
+
+        self.assertEqual(len(polygons), 6)
+
+    def test_empty_or_degenerate_detection_is_a_failure(self) -> None:
+        """
+        Test that a detection without any window, or with degenerate polygons only, falls back to the manual
+        parallelograms and then to the last detected windows.
+        """
+        for detected in ([], [Polygon([(0, 0), (100, 0), (200, 0)])]):
+            self.cache.reset()
+            self.detect.return_value = detected
+            self.assertEqual(len(self.cache.get(4, FrameContext(self.frame), self.detect, 1)), 6)
+
+        self.detect.return_value = self.polygons
+        self.cache.get(4, FrameContext(self.frame), self.detect, 1)
+        self.detect.return_value = []
+        self.assertEqual(self.cache.get(4, FrameContext(self.frame), self.detect, 1), self.polygons)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.detection.ai.detection import YoloBatcher, detection_yolov11_batch
+from src.detection.utils.detections import Detections
+
+
+def fake_yolo(frames, **kwargs):
+    """
+    Fake YOLO model returning one box per frame whose confidence is the value of the frame's first pixel.
+    """
+    results = []
+    for frame in frames:
+        result = MagicMock()
+        result.boxes.data.cpu.return_value.numpy.return_value = np.array(
+            [[0, 0, 10, 10, frame[0, 0, 0] / 100, 0]], dtype=np.float32)
+        results.append(result)
+    return results
+
+
+@patch('src.detection.ai.detection.get_model_yolo')
+class TestYoloBatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+
+        This method creates frames that can be told apart by their first pixel.
+        """
+        self.frames = [np.full((32, 32, 3), i, dtype=np.uint8) for i in range(6)]
+
+    def configure(self, mock_get_model: MagicMock) -> MagicMock:
+        mock_model = mock_get_model.return_value
+        mock_model.side_effect = fake_yolo
+        mock_model.names = {0: 'person'}
+        return mock_model
+
+    def test_detection_batch(self, mock_get_model) -> None:
+        """
+        Test that detection_yolov11_batch runs all the frames in one call and returns the detections of each frame.
+        """
+        mock_model = self.configure(mock_get_model)
+
+        detections = detection_yolov11_batch(self.frames[:3], imgsz=320)
+
+        mock_model.assert_called_once()
+        self.assertEqual(mock_model.call_args.kwargs['imgsz'], 320)
+        self.assertEqual(len(detections), 3)
+        self.assertIsInstance(detections[0], Detections)
+        self.assertEqual(detections[2].names, ['person'])
+        self.assertAlmostEqual(detections[2].confidence[0], 0.02)
+
+    def test_batcher_groups_concurrent_frames(self, mock_get_model) -> None:
+        """
+        Test that frames submitted by several threads are batched and each caller gets its own result.
+        """
+        self.configure(mock_get_model)
+        batcher = YoloBatcher(max_batch_size=3, max_wait=1.0)
+        results = {}
+        barrier = threading.Barrier(len(self.frames))
+
+        def caller(i):
+            barrier.wait()
+            results[i] = batcher.detect(self.frames[i])
+
+        threads = [threading.Thread(target=caller, args=(i,)) for i in range(len(self.frames))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        self.assertEqual(sum(batcher.batch_sizes), 6)
+        self.assertLessEqual(max(batcher.batch_sizes), 3)
+        self.assertLess(len(batcher.batch_sizes), 6)
+        for i, detections in results.items():
+            self.assertAlmostEqual(detections.confidence[0], i / 100, places=5)
+
+    def test_batcher_propagates_errors(self, mock_get_model) -> None:
+        """
+        Test that an inference error is raised to the caller.
+        """
+        mock_get_model.return_value.side_effect = RuntimeError("inference failed")
+        batcher = YoloBatcher(max_wait=0)
+
+        with self.assertRaises(RuntimeError):
+            batcher.detect(self.frames[0])
+        batcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()